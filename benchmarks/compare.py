@@ -0,0 +1,50 @@
+"""
+Compares two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Prints the p50/p99 change for every case present in both files and exits with
+status 1 if any case's p50 regressed by more than the threshold percentage.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Maximum allowed p50 regression in percent (default 10)')
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"baseline  {baseline['meta']['commit'][:12]}  candidate  {candidate['meta']['commit'][:12]}")
+    print(f"{'case':<55} {'p50 ms':>17} {'p99 ms':>17} {'change':>8}")
+
+    regressions = []
+    for name, before in baseline['results'].items():
+        after = candidate['results'].get(name)
+        if after is None:
+            continue
+        change = (after['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+        print(f"{name:<55} {before['p50_ms']:>8.2f}{after['p50_ms']:>9.2f} "
+              f"{before['p99_ms']:>8.2f}{after['p99_ms']:>9.2f} {change:>+7.1f}%")
+        if change > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
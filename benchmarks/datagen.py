@@ -0,0 +1,185 @@
+"""
+Synthetic garden data generator for benchmarks.
+
+Seeds a database with realistically shaped data at a given scale N:
+N irrigation zones, 10N garden locations, 100N plants, and a configurable
+number of measurements per location and observations per plant. Rows are
+written with Core bulk inserts and the output is fully determined by the seed.
+"""
+import random
+from datetime import datetime, time, timedelta
+
+from garden_ai_agent.data.database import db
+from garden_ai_agent.data.models import (
+    IrrigationZone, GardenLocation, Plant, Observation, Measurement, LatestMeasurement, MeasurementSource
+)
+from garden_ai_agent.data.fields import (
+    Drainage, GrowthForm, GrowthStage, LifeCycle, MeasurementType, MeasurementUnit,
+    ObservationType, SunExposure, UseCategory, WindExposure
+)
+
+INSERT_CHUNK_SIZE = 10000
+
+# Measurement streams recorded at every location: (type, unit, typical value, noise)
+SENSOR_STREAMS = [
+    (MeasurementType.TEMPERATURE, MeasurementUnit.CELSIUS, 18.0, 0.4),
+    (MeasurementType.HUMIDITY, MeasurementUnit.PERCENT, 60.0, 1.0),
+    (MeasurementType.SOIL_MOISTURE, MeasurementUnit.PERCENT, 35.0, 0.5),
+    (MeasurementType.SOIL_PH, MeasurementUnit.PH, 6.5, 0.02),
+]
+
+PLANT_NAMES = [
+    'Tomato', 'Basil', 'Pepper', 'Lettuce', 'Carrot', 'Blueberry', 'Apple', 'Fig', 'Rose',
+    'Lavender', 'Rosemary', 'Thyme', 'Hosta', 'Fern', 'Maple', 'Oak', 'Clematis', 'Squash',
+    'Bean', 'Pea', 'Strawberry', 'Raspberry', 'Sage', 'Mint', 'Daylily', 'Coneflower'
+]
+VARIETY_WORDS = ['Early', 'Giant', 'Golden', 'Red', 'Dwarf', 'Sweet', 'Royal', 'Wild', 'Summer', 'Winter']
+DESCRIPTION_WORDS = [
+    'hardy', 'vigorous', 'compact', 'fragrant', 'drought', 'tolerant', 'heirloom', 'prolific',
+    'disease', 'resistant', 'climbing', 'trailing', 'evergreen', 'deciduous', 'flowering', 'edible'
+]
+CARE_WORDS = [
+    'water', 'weekly', 'mulch', 'prune', 'spring', 'fertilize', 'monthly', 'stake', 'support',
+    'full', 'sun', 'shade', 'deadhead', 'divide', 'autumn', 'protect', 'frost'
+]
+
+
+def _sentence(rng: random.Random, words, length: int) -> str:
+    return ' '.join(rng.choice(words) for _ in range(length)).capitalize() + '.'
+
+
+def _insert(table, rows) -> None:
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + INSERT_CHUNK_SIZE])
+
+
+def seed_database(scale: int = 1, measurements_per_location: int = 1000,
+                  observations_per_plant: int = 10, seed: int = 42,
+                  end_time: datetime = datetime(2025, 1, 1)) -> dict:
+    """
+    Creates the schema and fills it with synthetic data. Must run in an app context.
+
+    Args:
+        scale: Scale factor N
+        measurements_per_location: Readings per location, spread over its sensor streams
+        observations_per_plant: Observations recorded for each plant
+        seed: Random seed; the same arguments always produce the same data
+        end_time: Timestamp of the most recent reading
+
+    Returns:
+        dict: Number of rows written per table
+    """
+    rng = random.Random(seed)
+    db.create_all()
+
+    zones = [{
+        'id': i + 1,
+        'name': f'Zone {i + 1}',
+        'scheduled_days': ','.join(str(d) for d in sorted(rng.sample(range(7), 3))),
+        'start_time': time(5 + i % 4, 0),
+        'duration_minutes': rng.randint(10, 60),
+        'flow_rate_gpm': round(rng.uniform(0.5, 5.0), 2)
+    } for i in range(scale)]
+    _insert(IrrigationZone.__table__, zones)
+
+    locations = [{
+        'id': i + 1,
+        'irrigation_zone_id': i % scale + 1,
+        'name': f'Bed {i + 1}',
+        'longitude': round(rng.uniform(-124.0, -70.0), 5),
+        'latitude': round(rng.uniform(25.0, 48.0), 5),
+        'elevation': round(rng.uniform(0, 2000), 1),
+        'hardiness_zone': rng.randint(3, 10),
+        'sun_exposure': rng.choice(list(SunExposure)),
+        'wind_exposure': rng.choice(list(WindExposure)),
+        'drainage': rng.choice(list(Drainage))
+    } for i in range(10 * scale)]
+    _insert(GardenLocation.__table__, locations)
+
+    plants = []
+    for i in range(100 * scale):
+        zone_min = rng.randint(2, 8)
+        ph_min = round(rng.uniform(4.5, 6.5), 1)
+        plants.append({
+            'id': i + 1,
+            'garden_location_id': rng.randint(1, len(locations)),
+            'name': rng.choice(PLANT_NAMES),
+            'scientific_name': None,
+            'variety': f'{rng.choice(VARIETY_WORDS)} {rng.choice(VARIETY_WORDS)}',
+            'growth_form': rng.choice(list(GrowthForm)),
+            'life_cycle': rng.choice(list(LifeCycle)),
+            'primary_use': rng.choice(list(UseCategory)),
+            'secondary_use': rng.choice([None, *UseCategory]),
+            'expected_height_inches': rng.randint(6, 240),
+            'expected_spread_inches': rng.randint(6, 120),
+            'hardiness_zone_min': zone_min,
+            'hardiness_zone_max': min(zone_min + rng.randint(1, 5), 13),
+            'preferred_soil_ph_min': ph_min,
+            'preferred_soil_ph_max': round(ph_min + rng.uniform(0.5, 2.0), 1),
+            'planting_depth_inches': round(rng.uniform(0.1, 6.0), 2),
+            'spacing_inches': rng.randint(6, 120),
+            'description': _sentence(rng, DESCRIPTION_WORDS, 12),
+            'care_instructions': _sentence(rng, CARE_WORDS, 10),
+            'notes': None
+        })
+    _insert(Plant.__table__, plants)
+
+    measurement_count = 0
+    readings_per_stream = measurements_per_location // len(SENSOR_STREAMS)
+    for location in locations:
+        rows = []
+        for measurement_type, unit, typical, noise in SENSOR_STREAMS:
+            value = typical
+            for step in range(readings_per_stream):
+                value += rng.gauss(0, noise) + (typical - value) * 0.05
+                rows.append({
+                    'garden_location_id': location['id'],
+                    'measurement_type': measurement_type,
+                    'unit': unit,
+                    'value': round(value, 3),
+                    'timestamp': end_time - timedelta(minutes=15 * (readings_per_stream - step)),
+                    'period_minutes': 15,
+                    'source': f"SENSOR-{location['id']}",
+                    'notes': None,
+                    'flagged': False
+                })
+        _insert(Measurement.__table__, rows)
+        measurement_count += len(rows)
+
+    _insert(MeasurementSource.__table__, [{
+        'name': f"SENSOR-{location['id']}",
+        'first_seen_at': end_time - timedelta(minutes=15 * readings_per_stream),
+        'last_seen_at': end_time
+    } for location in locations])
+
+    observations = []
+    for plant in plants:
+        for step in range(observations_per_plant):
+            observation_type = rng.choice(list(ObservationType))
+            is_stage = observation_type is ObservationType.GROWTH_STAGE
+            observations.append({
+                'plant_id': plant['id'],
+                'timestamp': end_time - timedelta(days=7 * (observations_per_plant - step)),
+                'observation_type': observation_type,
+                'numeric_value': None if is_stage else round(rng.uniform(1, 100), 1),
+                'stage_value': rng.choice(list(GrowthStage)) if is_stage else None,
+                'notes': None,
+                'image_data': None,
+                'recorded_by': 'benchmark'
+            })
+        if len(observations) >= INSERT_CHUNK_SIZE:
+            _insert(Observation.__table__, observations)
+            observations = []
+    _insert(Observation.__table__, observations)
+
+    latest_count = LatestMeasurement.rebuild()
+    db.session.commit()
+
+    return {
+        'irrigation_zones': len(zones),
+        'garden_locations': len(locations),
+        'plants': len(plants),
+        'measurements': measurement_count,
+        'observations': len(plants) * observations_per_plant,
+        'latest_measurements': latest_count
+    }
@@ -0,0 +1,94 @@
+"""
+Enum property micro-benchmark.
+
+Times enum-backed model properties against the conversions they used to do:
+re-wrapping the stored value with the Enum constructor on every read, and
+`value.upper()` plus an `Enum[...]` lookup on every string write. Writes also
+pay for SQLAlchemy's attribute instrumentation, so the string conversion is
+timed on its own as well.
+
+Usage:
+    python -m benchmarks.enum_lookup --accesses 1000000
+"""
+import argparse
+import time
+
+from garden_ai_agent.data.fields import MeasurementType, MeasurementUnit, enum_lookup
+from garden_ai_agent.data.models import Measurement
+
+
+def _legacy_get(measurement):
+    return MeasurementType(measurement._measurement_type)
+
+
+def _legacy_set(measurement, value):
+    if isinstance(value, str):
+        try:
+            value = MeasurementType[value.upper()]
+        except KeyError:
+            raise ValueError(f"Invalid measurement type: {value}")
+    measurement._measurement_type = value
+
+
+def _legacy_coerce(measurement, value):
+    try:
+        return MeasurementType[value.upper()]
+    except KeyError:
+        raise ValueError(f"Invalid measurement type: {value}")
+
+
+def _current_coerce(measurement, value, _lookup=enum_lookup(MeasurementType)):
+    member = _lookup.get(value)
+    if member is None:
+        raise ValueError(f"Invalid measurement type: {value}")
+    return member
+
+
+def _current_get(measurement):
+    return measurement.measurement_type
+
+
+def _current_set(measurement, value):
+    measurement.measurement_type = value
+
+
+def _time(function, measurement, args, accesses: int) -> float:
+    started = time.perf_counter()
+    for _ in range(accesses):
+        function(measurement, *args)
+    return time.perf_counter() - started
+
+
+def run(accesses: int) -> dict:
+    """
+    Returns:
+        dict: Seconds per case for `accesses` calls, keyed by (operation, implementation)
+    """
+    measurement = Measurement(garden_location_id=1, measurement_type=MeasurementType.TEMPERATURE,
+                              unit=MeasurementUnit.CELSIUS, value=20.0)
+    cases = {
+        ('read', 'legacy'): (_legacy_get, ()),
+        ('read', 'lookup'): (_current_get, ()),
+        ('write str', 'legacy'): (_legacy_set, ('soil_moisture',)),
+        ('write str', 'lookup'): (_current_set, ('soil_moisture',)),
+        ('coerce str', 'legacy'): (_legacy_coerce, ('soil_moisture',)),
+        ('coerce str', 'lookup'): (_current_coerce, ('soil_moisture',)),
+    }
+    return {case: _time(function, measurement, args, accesses) for case, (function, args) in cases.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark enum property reads and writes.')
+    parser.add_argument('--accesses', type=int, default=1000000, help='Accesses per case (default 1000000)')
+    args = parser.parse_args(argv)
+
+    results = run(args.accesses)
+    print(f"{'operation':<12} {'legacy ns':>10} {'lookup ns':>10} {'speedup':>8}")
+    for operation in ('read', 'write str', 'coerce str'):
+        legacy, lookup = results[(operation, 'legacy')], results[(operation, 'lookup')]
+        print(f"{operation:<12} {legacy / args.accesses * 1e9:>10.0f} {lookup / args.accesses * 1e9:>10.0f} "
+              f"{legacy / lookup:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
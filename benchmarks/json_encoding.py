@@ -0,0 +1,89 @@
+"""
+JSON response encoder benchmark.
+
+Seeds an in-memory database, marshals the `/measurements/` and `/plants/`
+list payloads once, then times encoding them with each available
+`JSON_ENCODER` and with flask-restx's own JSON representation, and the full
+list requests through the test client with each encoder.
+
+Usage:
+    python -m benchmarks.json_encoding --scale 10 --repeat 20
+"""
+import argparse
+import time
+from importlib.util import find_spec
+
+from flask_restx import marshal
+from flask_restx.representations import output_json
+
+from garden_ai_agent import create_app
+from garden_ai_agent.api.measurement import measurement_output_model
+from garden_ai_agent.api.plant import plant_output_model
+from garden_ai_agent.data.models import Measurement, Plant
+from garden_ai_agent.representations import json_encoder
+from .datagen import seed_database
+
+ENDPOINTS = {
+    '/measurements/': (Measurement, measurement_output_model),
+    '/plants/': (Plant, plant_output_model)
+}
+
+
+def _encoders() -> dict:
+    encoders = {'restx': lambda data: output_json(data, 200).get_data()}
+    for name in ('json', 'orjson'):
+        if name == 'json' or find_spec(name):
+            dumps = json_encoder(name)
+            encoders[name] = lambda data, dumps=dumps: dumps(data)
+    return encoders
+
+
+def _time(function, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def run(scale: int, repeat: int, seed: int = 42) -> dict:
+    """
+    Returns:
+        dict: Per endpoint, the payload size and items, and mean seconds to
+        encode it and to serve the list request, keyed by encoder name
+    """
+    encoders = _encoders()
+    apps = {name: create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                              'JSON_ENCODER': name, 'COMPRESSION_ENABLED': False})
+            for name in encoders if name != 'restx'}
+    for app in apps.values():
+        with app.app_context():
+            seed_database(scale, observations_per_plant=0, seed=seed)
+
+    results = {}
+    app = next(iter(apps.values()))
+    for endpoint, (model, output_model) in ENDPOINTS.items():
+        with app.test_request_context():
+            data = marshal(model.query.all(), output_model, envelope='data')
+            encode = {name: _time(lambda: encoder(data), repeat) for name, encoder in encoders.items()}
+            size = len(encoders['json'](data))
+        serve = {name: _time(lambda: other.test_client().get(endpoint), repeat) for name, other in apps.items()}
+        results[endpoint] = {'items': len(data['data']), 'bytes': size, 'encode': encode, 'serve': serve}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark JSON response encoders.')
+    parser.add_argument('--scale', type=int, default=10, help='Scale factor N (default 10)')
+    parser.add_argument('--repeat', type=int, default=20, help='Repetitions per case (default 20)')
+    args = parser.parse_args(argv)
+
+    for endpoint, result in run(args.scale, args.repeat).items():
+        print(f"{endpoint}: {result['items']} items, {result['bytes'] / 1024:.0f} KiB")
+        for name, seconds in result['encode'].items():
+            print(f"  encode {name:<7} {seconds * 1000:8.2f} ms")
+        for name, seconds in result['serve'].items():
+            print(f"  serve  {name:<7} {seconds * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
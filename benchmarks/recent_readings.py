@@ -0,0 +1,115 @@
+"""
+Recent readings buffer benchmark.
+
+Seeds an in-memory database whose newest readings end now, then compares the
+recent readings buffer with the ORM and the database: memory held per reading
+in the buffer against loaded `Measurement` instances, and the time to read
+one stream's recent window from the buffer against a query. With --shared
+the buffer is the memory-mapped `SharedRecentReadings` used across workers.
+
+Usage:
+    python -m benchmarks.recent_readings --scale 10 --queries 1000 [--shared]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from garden_ai_agent import create_app
+from garden_ai_agent.data.database import db
+from garden_ai_agent.data.fields import MeasurementType
+from garden_ai_agent.data.models import Measurement
+from garden_ai_agent.services import RecentReadings, SharedRecentReadings
+from .datagen import SENSOR_STREAMS, seed_database
+
+WINDOW = timedelta(hours=48)
+
+
+def _orm_bytes(cutoff: datetime):
+    """Returns the readings in the window and the memory their loaded instances hold."""
+    db.session.expunge_all()
+    tracemalloc.start()
+    measurements = Measurement.query.filter(Measurement.timestamp > cutoff).all()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    count = len(measurements)
+    del measurements
+    db.session.expunge_all()
+    return count, size
+
+
+def _time_queries(read, streams, queries: int) -> float:
+    started = time.perf_counter()
+    for location_id, measurement_type in streams[:queries]:
+        read(location_id, measurement_type)
+    return time.perf_counter() - started
+
+
+def run(scale: int, queries: int, shared: bool = False, seed: int = 42) -> dict:
+    """
+    Returns:
+        dict: Readings in the window, bytes per reading for the buffer and the
+        ORM, and seconds for `queries` stream reads from the buffer and the database
+    """
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with app.app_context():
+        seed_database(scale, measurements_per_location=1000, observations_per_plant=0, seed=seed,
+                      end_time=datetime.utcnow())
+        cutoff = datetime.utcnow() - WINDOW
+        if shared:
+            directory = tempfile.TemporaryDirectory()
+            recent = SharedRecentReadings(os.path.join(directory.name, 'recent.bin'), WINDOW, capacity=256,
+                                          max_streams=40 * scale)
+        else:
+            recent = RecentReadings(WINDOW, capacity=256)
+
+        started = time.perf_counter()
+        recent.query(1, MeasurementType.TEMPERATURE, cutoff + timedelta(seconds=1))
+        warm_seconds = time.perf_counter() - started
+
+        readings, orm_bytes = _orm_bytes(cutoff)
+        rng = random.Random(seed)
+        streams = [(rng.randint(1, 10 * scale), rng.choice(SENSOR_STREAMS)[0]) for _ in range(queries)]
+        since = cutoff + timedelta(minutes=1)
+        table = Measurement.__table__
+
+        def from_buffer(location_id, measurement_type):
+            return recent.query(location_id, measurement_type, since)
+
+        def from_database(location_id, measurement_type):
+            statement = db.select(table.c.id, table.c.timestamp, table.c.value, table.c.unit, table.c.flagged) \
+                .where(table.c.garden_location_id == location_id, table.c.measurement_type == measurement_type,
+                       table.c.timestamp >= since) \
+                .order_by(table.c.timestamp)
+            return db.session.execute(statement).all()
+
+        return {
+            'readings': readings,
+            'warm_seconds': warm_seconds,
+            'buffer_bytes_per_reading': recent.nbytes / readings,
+            'orm_bytes_per_reading': orm_bytes / readings,
+            'buffer_seconds': _time_queries(from_buffer, streams, queries),
+            'database_seconds': _time_queries(from_database, streams, queries)
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the recent readings buffer.')
+    parser.add_argument('--scale', type=int, default=10, help='Scale factor N (default 10)')
+    parser.add_argument('--queries', type=int, default=1000, help='Stream reads per source (default 1000)')
+    parser.add_argument('--shared', action='store_true', help='Benchmark the memory-mapped shared buffer')
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.queries, args.shared)
+    print(f"readings in window: {results['readings']} (warm-up {results['warm_seconds'] * 1000:.0f} ms)")
+    print(f"bytes per reading:  buffer {results['buffer_bytes_per_reading']:.0f}, "
+          f"ORM {results['orm_bytes_per_reading']:.0f}")
+    print(f"us per stream read: buffer {results['buffer_seconds'] / args.queries * 1e6:.0f}, "
+          f"database {results['database_seconds'] / args.queries * 1e6:.0f}")
+
+
+if __name__ == '__main__':
+    main()
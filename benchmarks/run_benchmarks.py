@@ -0,0 +1,363 @@
+"""
+API benchmark suite.
+
+Seeds a temporary SQLite database with synthetic data, then drives every API
+endpoint through the Flask test client and through a real threaded WSGI
+server, measures cold startup (see `benchmarks/startup.py`), and writes
+latency percentiles and rows/sec to a JSON file that can be compared across
+commits with `benchmarks/compare.py`.
+
+Usage:
+    python -m benchmarks.run_benchmarks --scale 1 --output bench_results.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from werkzeug.serving import make_server
+
+from garden_ai_agent import create_app
+from garden_ai_agent.data.database import db
+from .datagen import seed_database
+
+DEFAULT_OUTPUT = 'bench_results.json'
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(durations, rows: int) -> dict:
+    durations = sorted(durations)
+    total = sum(durations)
+    return {
+        'iterations': len(durations),
+        'mean_ms': total / len(durations) * 1000,
+        'p50_ms': percentile(durations, 0.50) * 1000,
+        'p90_ms': percentile(durations, 0.90) * 1000,
+        'p99_ms': percentile(durations, 0.99) * 1000,
+        'max_ms': durations[-1] * 1000,
+        'rows': rows,
+        'rows_per_sec': rows / total if total else 0.0
+    }
+
+
+class TestClientDriver:
+    """Sends requests in-process through the Flask test client."""
+    name = 'test_client'
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+    def close(self):
+        pass
+
+
+class WSGIServerDriver:
+    """Sends requests over HTTP to the app served by a threaded WSGI server."""
+    name = 'wsgi_server'
+
+    def __init__(self, app):
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.server_port)
+
+    def request(self, method: str, path: str, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        payload = json.dumps(body) if body is not None else None
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, response.read()
+
+    def close(self):
+        self.connection.close()
+        self.server.shutdown()
+
+
+def _count_rows(payload: bytes) -> int:
+    try:
+        data = json.loads(payload).get('data')
+    except (ValueError, AttributeError):
+        return 0
+    if isinstance(data, list):
+        return len(data)
+    return 1 if data else 0
+
+
+def _created_id(payload: bytes):
+    try:
+        return json.loads(payload)['data']['id']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def build_cases(counts: dict, iterations: int):
+    """
+    Returns the benchmark cases: (name, method, path factory, body factory, iterations, collect).
+
+    Path and body factories receive the iteration number so that write cases can
+    target distinct rows. Full-table list endpoints run fewer iterations. Create
+    cases collect the IDs of the rows they insert, and the matching delete cases,
+    which run after everything else, delete those rows so that the seeded data
+    stays intact for the other cases and the second driver.
+
+    `/measurements/ingest/<id>` is left out: it only exists with the write-behind
+    queue and reads one status file, so it says nothing about the database.
+    """
+    zones = counts['irrigation_zones']
+    locations = counts['garden_locations']
+    plants = counts['plants']
+    few = max(1, iterations // 10)
+    created = {name: [] for name in ('irrigation_zones', 'garden_locations', 'plants', 'observations', 'measurements')}
+
+    def created_path(name: str):
+        # With write-behind, creates are only queued (202) and leave nothing to delete
+        return lambda i: f'/{name}/{created[name].pop() if created[name] else 0}'
+
+    def measurement_body(i):
+        return {
+            'garden_location_id': i % locations + 1,
+            'measurement_type': 'TEMPERATURE',
+            'unit': 'CELSIUS',
+            'value': 18.0 + (i % 7) * 0.1,
+            'timestamp': datetime(2030, 1, 1, i // 60 % 24, i % 60).isoformat(),
+            'source': f'BENCH-{i}'
+        }
+
+    def plant_body(i):
+        return {
+            'garden_location_id': i % locations + 1,
+            'name': f'Bench plant {i}',
+            'growth_form': 'HERB',
+            'life_cycle': 'ANNUAL',
+            'primary_use': 'VEGETABLE',
+            'hardiness_zone_min': 4,
+            'hardiness_zone_max': 8
+        }
+
+    def zone_body(i):
+        return {
+            'name': f'Bench zone {i}',
+            'scheduled_days': ['MONDAY', 'THURSDAY'],
+            'start_time': '06:00:00',
+            'duration_minutes': 20 + i % 10,
+            'flow_rate_gpm': 2.5
+        }
+
+    def location_body(i):
+        return {
+            'name': f'Bench bed {i}',
+            'longitude': -122.4,
+            'latitude': 37.7,
+            'hardiness_zone': 4 + i % 6,
+            'sun_exposure': 'FULL',
+            'wind_exposure': 'PROTECTED',
+            'drainage': 'GOOD',
+            'irrigation_zone_id': i % zones + 1
+        }
+
+    def observation_body(i):
+        return {
+            'plant_id': i % plants + 1,
+            'timestamp': datetime(2030, 1, 1, i // 60 % 24, i % 60).isoformat(),
+            'observation_type': 'HEIGHT',
+            'numeric_value': 10.0 + i % 5,
+            'recorded_by': 'BENCH'
+        }
+
+    recent = '&'.join(['garden_location_id={}', 'measurement_type=TEMPERATURE', 'start=2000-01-01T00:00:00'])
+    return [
+        ('irrigation_zones.list', 'GET', lambda i: '/irrigation_zones/', None, iterations, None),
+        ('irrigation_zones.get', 'GET', lambda i: f'/irrigation_zones/{i % zones + 1}', None, iterations, None),
+        ('irrigation_zones.create', 'POST', lambda i: '/irrigation_zones/', zone_body, iterations,
+         created['irrigation_zones']),
+        ('irrigation_zones.update', 'PUT', lambda i: f'/irrigation_zones/{i % zones + 1}', zone_body,
+         iterations, None),
+        ('garden_locations.list', 'GET', lambda i: '/garden_locations/', None, iterations, None),
+        ('garden_locations.get', 'GET', lambda i: f'/garden_locations/{i % locations + 1}', None, iterations, None),
+        ('garden_locations.suitable_plants', 'GET',
+         lambda i: f'/garden_locations/{i % locations + 1}/suitable_plants', None, iterations, None),
+        ('garden_locations.create', 'POST', lambda i: '/garden_locations/', location_body, iterations,
+         created['garden_locations']),
+        ('garden_locations.update', 'PUT', lambda i: f'/garden_locations/{i % locations + 1}', location_body,
+         iterations, None),
+        ('plants.list', 'GET', lambda i: '/plants/', None, few, None),
+        ('plants.get', 'GET', lambda i: f'/plants/{i % plants + 1}', None, iterations, None),
+        ('plants.search', 'GET', lambda i: '/plants/search?q=hardy+tomato', None, iterations, None),
+        ('plants.suitable_locations', 'GET', lambda i: f'/plants/{i % plants + 1}/suitable_locations',
+         None, iterations, None),
+        ('plants.create', 'POST', lambda i: '/plants/', plant_body, iterations, created['plants']),
+        ('plants.update', 'PUT', lambda i: f'/plants/{i % plants + 1}', plant_body, iterations, None),
+        ('plants.bulk_update_100', 'PATCH', lambda i: '/plants/',
+         lambda i: {'ids': [(i * 100 + j) % plants + 1 for j in range(100)], 'values': {'hardiness_zone_max': 9}},
+         few, None),
+        ('observations.list', 'GET', lambda i: '/observations/', None, few, None),
+        ('observations.list_filtered', 'GET', lambda i: f'/observations/?plant_id={i % plants + 1}',
+         None, iterations, None),
+        ('observations.get', 'GET', lambda i: f'/observations/{i % counts["observations"] + 1}',
+         None, iterations, None),
+        ('observations.create', 'POST', lambda i: '/observations/', observation_body, iterations,
+         created['observations']),
+        ('observations.update', 'PUT', lambda i: f'/observations/{i % counts["observations"] + 1}',
+         lambda i: {'notes': f'Bench note {i}'}, iterations, None),
+        ('measurements.list', 'GET', lambda i: '/measurements/', None, few, None),
+        ('measurements.list_flagged', 'GET', lambda i: '/measurements/?flagged=true', None, iterations, None),
+        ('measurements.summary', 'GET', lambda i: '/measurements/summary', None, few, None),
+        ('measurements.export', 'GET', lambda i: '/measurements/export', None, few, None),
+        ('measurements.recent', 'GET', lambda i: f'/measurements/recent?{recent.format(i % locations + 1)}',
+         None, iterations, None),
+        ('measurements.get', 'GET', lambda i: f'/measurements/{i % counts["measurements"] + 1}',
+         None, iterations, None),
+        ('measurements.latest', 'GET', lambda i: '/measurements/latest', None, iterations, None),
+        ('measurements.sources', 'GET', lambda i: '/measurements/sources', None, iterations, None),
+        ('measurements.create', 'POST', lambda i: '/measurements/', measurement_body, iterations,
+         created['measurements']),
+        ('measurements.create_duplicate', 'POST', lambda i: '/measurements/',
+         lambda i: measurement_body(0), iterations, None),
+        ('measurements.batch_100', 'POST', lambda i: '/measurements/batch',
+         lambda i: [measurement_body(100000 + i * 100 + j) for j in range(100)], few, None),
+        ('measurements.update', 'PUT', lambda i: f'/measurements/{i % counts["measurements"] + 1}',
+         lambda i: {'notes': f'Bench note {i}'}, iterations, None),
+        # Deletes remove what the create cases inserted, children before parents
+        ('measurements.delete', 'DELETE', created_path('measurements'), None, iterations, None),
+        ('observations.delete', 'DELETE', created_path('observations'), None, few, None),
+        ('observations.bulk_delete', 'DELETE',
+         lambda i: f'/observations/?recorded_by=BENCH&plant_id={i % plants + 1}', None, few, None),
+        ('plants.delete', 'DELETE', created_path('plants'), None, iterations, None),
+        ('garden_locations.delete', 'DELETE', created_path('garden_locations'), None, iterations, None),
+        ('irrigation_zones.delete', 'DELETE', created_path('irrigation_zones'), None, iterations, None),
+    ]
+
+
+def run_case(driver, case, offset: int) -> dict:
+    name, method, path_for, body_for, iterations, collect = case
+    durations = []
+    rows = 0
+    statuses = set()
+    for i in range(iterations):
+        path = path_for(offset + i)
+        body = body_for(offset + i) if body_for else None
+        started = time.perf_counter()
+        status, payload = driver.request(method, path, body)
+        durations.append(time.perf_counter() - started)
+        statuses.add(status)
+        if collect is not None and status == 201:
+            collect.append(_created_id(payload))
+        if method == 'POST' and isinstance(body, list):
+            rows += len(body)
+        else:
+            rows += _count_rows(payload)
+    result = summarize(durations, rows)
+    result['statuses'] = sorted(statuses)
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(scale: int, measurements_per_location: int, observations_per_plant: int,
+        iterations: int, seed: int, write_behind: bool = False, startup_iterations: int = 5) -> dict:
+    # Imported here because the startup benchmark reuses `summarize`
+    from . import startup
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}"}
+        with create_app(config).app_context():
+            started = time.perf_counter()
+            counts = seed_database(scale, measurements_per_location, observations_per_plant, seed)
+            seed_seconds = time.perf_counter() - started
+
+        if write_behind:
+            config.update({'WRITE_BEHIND_ENABLED': True, 'WRITE_BEHIND_LOG_DIR': os.path.join(tmp, 'ingest_log')})
+        app = create_app(config)
+
+        results = {}
+        for offset, driver_class in enumerate((TestClientDriver, WSGIServerDriver)):
+            driver = driver_class(app)
+            try:
+                for case in build_cases(counts, iterations):
+                    # Offset write cases per driver so both insert distinct rows
+                    results[f'{driver.name}:{case[0]}'] = run_case(driver, case, offset * 1000000)
+            finally:
+                driver.close()
+
+        if write_behind:
+            app.extensions['write_behind'].stop()
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    if startup_iterations:
+        results.update(startup.run(startup_iterations))
+
+    return {
+        'meta': {
+            'commit': git_revision(),
+            'created_at': datetime.utcnow().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'scale': scale,
+            'measurements_per_location': measurements_per_location,
+            'observations_per_plant': observations_per_plant,
+            'iterations': iterations,
+            'seed': seed,
+            'write_behind': write_behind,
+            'rows': counts,
+            'seed_seconds': seed_seconds,
+            'seed_rows_per_sec': sum(counts.values()) / seed_seconds
+        },
+        'results': results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Garden API against synthetic data.')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='N: creates N zones, 10N locations and 100N plants (default 1)')
+    parser.add_argument('--measurements-per-location', type=int, default=1000)
+    parser.add_argument('--observations-per-plant', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=50, help='Requests per endpoint (default 50)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--write-behind', action='store_true', help='Run with the write-behind ingest queue')
+    parser.add_argument('--startup-iterations', type=int, default=5,
+                        help='Fresh processes for the startup cases, 0 to skip (default 5)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'Result file (default {DEFAULT_OUTPUT})')
+    args = parser.parse_args(argv)
+
+    report = run(args.scale, args.measurements_per_location, args.observations_per_plant,
+                 args.iterations, args.seed, args.write_behind, args.startup_iterations)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    print(f"{'case':<55} {'p50 ms':>9} {'p99 ms':>9} {'rows/s':>12}")
+    for name, result in report['results'].items():
+        print(f"{name:<55} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['rows_per_sec']:>12.0f}")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
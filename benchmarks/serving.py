@@ -0,0 +1,145 @@
+"""
+Production server scaling benchmark.
+
+Seeds a database, then starts `serve.py` with each requested worker count and
+drives it with concurrent HTTP clients for a fixed duration, reporting
+throughput and latency percentiles per worker count.
+
+Usage:
+    python -m benchmarks.serving --workers 1 2 4 --concurrency 16 --duration 10
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from garden_ai_agent import create_app
+from .datagen import seed_database
+from .run_benchmarks import git_revision, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_OUTPUT = 'bench_results_serving.json'
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(port: int, process, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with status {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/irrigation_zones/')
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('Server did not become ready')
+
+
+def _client(port: int, paths, stop_at: float, durations: list, errors: list) -> None:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    i = 0
+    while time.perf_counter() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(path)
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        durations.append(time.perf_counter() - started)
+        if response.status >= 500:
+            errors.append(path)
+    connection.close()
+
+
+def measure(database_uri: str, workers: int, threads: int, concurrency: int, duration: float, paths) -> dict:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'serve.py'), '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--threads', str(threads), '--database-uri', database_uri],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_until_ready(port, process)
+        durations, errors = [], []
+        stop_at = time.perf_counter() + duration
+        clients = [threading.Thread(target=_client, args=(port, paths, stop_at, durations, errors))
+                   for _ in range(concurrency)]
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    result = summarize(durations, len(durations))
+    result.update({
+        'workers': workers,
+        'threads': threads,
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'requests_per_sec': len(durations) / elapsed
+    })
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure API throughput as the worker count grows.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=1, help='Threads per worker (default 1)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per worker count')
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}"
+        with create_app({'SQLALCHEMY_DATABASE_URI': database_uri}).app_context():
+            counts = seed_database(args.scale, measurements_per_location=200, observations_per_plant=5)
+
+        # A mix of single-row and list reads
+        paths = ['/garden_locations/', '/measurements/latest', '/plants/search?q=tomato']
+        paths += [f'/plants/{i + 1}' for i in range(0, counts['plants'], 10)]
+
+        results = []
+        for workers in args.workers:
+            result = measure(database_uri, workers, args.threads, args.concurrency, args.duration, paths)
+            results.append(result)
+            print(f"workers={workers:<3} threads={args.threads:<3} {result['requests_per_sec']:>9.0f} req/s  "
+                  f"p50 {result['p50_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms  errors {result['errors']}")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {'commit': git_revision(), 'cpu_count': os.cpu_count(), 'scale': args.scale,
+                     'duration': args.duration},
+            'results': results
+        }, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
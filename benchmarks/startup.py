@@ -0,0 +1,76 @@
+"""
+Startup time benchmark.
+
+Starts fresh interpreters that import the app factory, create the app and
+serve a first request through the test client, and reports each phase's
+latency. `run_benchmarks` includes these as the `startup:*` cases, so they are
+compared across commits like the endpoint cases.
+
+Usage:
+    python -m benchmarks.startup --iterations 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from .run_benchmarks import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ('import', 'create_app', 'first_request', 'total')
+
+# Runs in a fresh interpreter and prints the duration of each phase in seconds
+PROBE = """
+import json, time
+started = time.perf_counter()
+from garden_ai_agent import create_app
+imported = time.perf_counter()
+app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+created = time.perf_counter()
+with app.app_context():
+    from garden_ai_agent.data.database import db
+    db.create_all()
+    schema_created = time.perf_counter()
+    status = app.test_client().get('/irrigation_zones/').status_code
+    assert status == 200, status
+responded = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': responded - schema_created,
+    'total': responded - started - (schema_created - created)
+}))
+"""
+
+
+def measure_once() -> dict:
+    """Returns the duration in seconds of each startup phase in a new process."""
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(iterations: int) -> dict:
+    """
+    Measures startup in `iterations` fresh processes.
+
+    Returns:
+        dict: Latency summary per `startup:<phase>` case
+    """
+    samples = [measure_once() for _ in range(iterations)]
+    return {f'startup:{phase}': summarize([sample[phase] for sample in samples], 0) for phase in PHASES}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark cold import and first-request latency.')
+    parser.add_argument('--iterations', type=int, default=10, help='Processes to start (default 10)')
+    args = parser.parse_args(argv)
+
+    print(f"{'phase':<25} {'p50 ms':>9} {'max ms':>9}")
+    for name, result in run(args.iterations).items():
+        print(f"{name:<25} {result['p50_ms']:>9.1f} {result['max_ms']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,10 @@
-from .app import create_app
-
 __all__ = ['create_app']
+
+
+def __getattr__(name):
+    # Import the app factory on first use, so that importing the package (for
+    # example `garden_ai_agent.config`) does not load Flask and every namespace
+    if name == 'create_app':
+        from .app import create_app
+        return create_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,206 @@
+"""
+Per-client rate limiting and load shedding for writes.
+
+Every request takes a token from its client's bucket: reads (GET, HEAD,
+OPTIONS) from the read bucket and everything else from the write bucket, so
+a gateway flooding ingest endpoints runs out of write tokens without
+affecting its own or anyone else's reads. Clients are identified by their
+address, or by the `RATE_LIMIT_CLIENT_HEADER` request header when the request
+comes from one of the `RATE_LIMIT_TRUSTED_PROXIES`, such as a gateway that
+sets it for the devices behind it; anyone else could pick a new header value
+for every request to get a fresh bucket. Requests over budget get a 429 with
+`Retry-After`.
+
+Buckets live in process memory by default, so each worker enforces the
+budget on its own; `RATE_LIMIT_STORE` can be set to any object with the
+same `take` method as `MemoryBucketStore` to share them, for example in
+Redis.
+
+Independently of the client, writes are shed with a 503 and `Retry-After`
+while the database is overloaded: when more than `LOAD_SHED_QUEUE_DEPTH`
+writes are in flight or waiting in the write-behind queue, or when write
+statements have recently been taking longer than `LOAD_SHED_WRITE_WAIT_MS`,
+which is mostly time spent waiting for the database's write lock.
+"""
+import math
+import threading
+import time
+
+from flask import g, request
+from sqlalchemy import event
+
+from .data.database import db
+
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+# Endpoints that are never limited, so that monitoring keeps working under load
+EXEMPT_ENDPOINTS = {'metrics'}
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+# Buckets that have refilled are dropped once there are more than this many
+MAX_BUCKETS = 10000
+
+
+class MemoryBucketStore:
+    """Token buckets held in process memory."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        """
+        Takes a token from a bucket that refills at `rate` tokens per second up to `burst`.
+
+        Args:
+            key: Bucket key, e.g. 'write:gateway-1'
+            rate: Tokens added per second
+            burst: Bucket capacity; a new bucket starts full
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            taken = tokens >= 1
+            if taken:
+                tokens -= 1
+            # Buckets are stored with the time they will be full again
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            if len(self._buckets) > MAX_BUCKETS:
+                self._prune(now)
+            return 0.0 if taken else (1 - tokens) / rate
+
+    def _prune(self, now: float) -> None:
+        # A bucket that has refilled is the same as a new one
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+
+
+class WriteWaitMonitor:
+    """
+    Tracks how long write statements take, as a moving average that decays
+    while there are no writes, so that shedding every write cannot keep the
+    average high forever.
+
+    Args:
+        half_life: Seconds without writes after which the average has halved
+        weight: Weight of each new statement in the moving average
+    """
+
+    def __init__(self, half_life: float = 1.0, weight: float = 0.2):
+        self.half_life = half_life
+        self.weight = weight
+        self._average = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._write_wait_start = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip()[:6].upper().startswith(WRITE_STATEMENTS):
+            return
+        self.observe(time.perf_counter() - context._write_wait_start)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._average = self._decayed(now) * (1 - self.weight) + seconds * self.weight
+            self._updated = now
+
+    def average(self) -> float:
+        """Returns the decayed moving average of write statement durations, in seconds."""
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+    def _decayed(self, now: float) -> float:
+        return self._average * 0.5 ** ((now - self._updated) / self.half_life)
+
+
+def _client_key(header: str, trusted_proxies: frozenset) -> str:
+    address = request.remote_addr or 'unknown'
+    if address in trusted_proxies:
+        return request.headers.get(header) or address
+    return address
+
+
+def _too_busy(app, in_flight: int, monitor: WriteWaitMonitor):
+    """Returns why writes are being shed, or None."""
+    max_depth = app.config['LOAD_SHED_QUEUE_DEPTH']
+    if max_depth is not None:
+        write_behind = app.extensions.get('write_behind')
+        depth = in_flight + (write_behind.pending if write_behind is not None else 0)
+        if depth >= max_depth:
+            return f"{depth} writes are queued"
+    if monitor is not None and monitor.average() * 1000 > app.config['LOAD_SHED_WRITE_WAIT_MS']:
+        return "database writes are slow"
+    return None
+
+
+def init_admission(app) -> None:
+    """
+    Limits requests per client if `RATE_LIMIT_ENABLED` is set, and sheds writes
+    if `LOAD_SHED_QUEUE_DEPTH` or `LOAD_SHED_WRITE_WAIT_MS` is set.
+
+    Read and write buckets refill at `RATE_LIMIT_READ_PER_SECOND` and
+    `RATE_LIMIT_WRITE_PER_SECOND` tokens per second, up to
+    `RATE_LIMIT_READ_BURST` and `RATE_LIMIT_WRITE_BURST`. Shed writes are told
+    to retry after `LOAD_SHED_RETRY_AFTER_SECONDS`.
+    """
+    config = app.config
+    limits = None
+    trusted_proxies = frozenset(config['RATE_LIMIT_TRUSTED_PROXIES'])
+    if config['RATE_LIMIT_ENABLED']:
+        store = config['RATE_LIMIT_STORE'] or MemoryBucketStore()
+        app.extensions['rate_limit_store'] = store
+        limits = {
+            'read': (config['RATE_LIMIT_READ_PER_SECOND'], config['RATE_LIMIT_READ_BURST']),
+            'write': (config['RATE_LIMIT_WRITE_PER_SECOND'], config['RATE_LIMIT_WRITE_BURST'])
+        }
+    monitor = None
+    if config['LOAD_SHED_WRITE_WAIT_MS'] is not None:
+        monitor = WriteWaitMonitor()
+        app.extensions['write_wait_monitor'] = monitor
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', monitor.before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', monitor.after_cursor_execute)
+    shedding = monitor is not None or config['LOAD_SHED_QUEUE_DEPTH'] is not None
+    if limits is None and not shedding:
+        return
+
+    in_flight = 0
+    in_flight_lock = threading.Lock()
+
+    @app.before_request
+    def admit_request():
+        nonlocal in_flight
+        if request.endpoint in EXEMPT_ENDPOINTS:
+            return None
+        kind = 'read' if request.method in SAFE_METHODS else 'write'
+        if kind == 'write' and shedding:
+            reason = _too_busy(app, in_flight, monitor)
+            if reason is not None:
+                retry_after = config['LOAD_SHED_RETRY_AFTER_SECONDS']
+                return {"error": f"Server is busy: {reason}"}, 503, {'Retry-After': str(retry_after)}
+        if limits is not None:
+            rate, burst = limits[kind]
+            client = _client_key(config['RATE_LIMIT_CLIENT_HEADER'], trusted_proxies)
+            wait = store.take(f'{kind}:{client}', rate, burst)
+            if wait > 0:
+                return {"error": f"Too many {kind} requests"}, 429, {'Retry-After': str(math.ceil(wait))}
+        if kind == 'write' and shedding:
+            with in_flight_lock:
+                in_flight += 1
+            g.admitted_write = True
+        return None
+
+    @app.teardown_request
+    def release_request(exception=None):
+        nonlocal in_flight
+        if g.pop('admitted_write', False):
+            with in_flight_lock:
+                in_flight -= 1
@@ -4,6 +4,7 @@ from flask import request
 from ..data.models import GardenLocation
 from ..data.database import db
 from ..data.fields import SunExposure, WindExposure, Drainage
+from .validation import ValidationError, Validator, validation_error_response
 
 garden_location_ns = Namespace('garden_locations', description='Operations related to garden locations')
 
@@ -12,6 +13,7 @@ base_garden_location_fields = {
     'longitude': fields.Float(required=True, description='The longitude of the garden location'),
     'latitude': fields.Float(required=True, description='The latitude of the garden location'),
     'elevation': fields.Float(description='The elevation of the garden location'),
+    'hardiness_zone': fields.Integer(description='The USDA plant hardiness zone of the garden location (1-13)'),
     'sun_exposure': fields.String(required=True, description='The sun exposure of the garden location. Possible values: FULL, PARTIAL_SUN, PARTIAL_SHADE, DAPPLED, FULL_SHADE'),
     'wind_exposure': fields.String(required=True, description='The wind exposure of the garden location. Possible values: EXPOSED, PARTIALLY_EXPOSED, PROTECTED, INDOOR'),
     'drainage': fields.String(required=True, description='The drainage of the garden location. Possible values: EXCELLENT, GOOD, POOR')
@@ -24,6 +26,12 @@ garden_location_output_model = garden_location_ns.model('GardenLocationOutput',
     **base_garden_location_fields
 })
 
+garden_location_validator = Validator(garden_location_input_model, {
+    'sun_exposure': SunExposure,
+    'wind_exposure': WindExposure,
+    'drainage': Drainage
+})
+
 @garden_location_ns.route('/')
 class GardenLocationList(Resource):
     def get(self):
@@ -36,27 +44,24 @@ class GardenLocationList(Resource):
         """Create a new garden location"""
         data = request.json
         try:
-            # Validate sun_exposure, wind_exposure, and drainage values
-            if data['sun_exposure'] not in SunExposure.__members__:
-                raise ValueError("Invalid value for field: 'sun_exposure'")
-            if data['wind_exposure'] not in WindExposure.__members__:
-                raise ValueError("Invalid value for field: 'wind_exposure'")
-            if data['drainage'] not in Drainage.__members__:
-                raise ValueError("Invalid value for field: 'drainage'")
+            garden_location_validator.validate(data)
 
             new_location = GardenLocation(
                 name=data['name'],
                 longitude=data['longitude'],
                 latitude=data['latitude'],
                 elevation=data.get('elevation'),
-                sun_exposure=SunExposure[data['sun_exposure']],
-                wind_exposure=WindExposure[data['wind_exposure']],
-                drainage=Drainage[data['drainage']],
+                hardiness_zone=data.get('hardiness_zone'),
+                sun_exposure=data['sun_exposure'],
+                wind_exposure=data['wind_exposure'],
+                drainage=data['drainage'],
                 irrigation_zone_id=data['irrigation_zone_id']
             )
             db.session.add(new_location)
             db.session.commit()
             return marshal(new_location, garden_location_output_model, envelope='data'), 201
+        except ValidationError as e:
+            return validation_error_response(e)
         except KeyError as e:
             return {"error": f"Missing field: {str(e)}"}, 400
         except (TypeError, ValueError) as e:
@@ -75,13 +80,21 @@ class GardenLocationResource(Resource):
         data = request.json
         location = GardenLocation.query.get_or_404(id)
 
-        location.name = data['name']
-        location.longitude = data['longitude']
-        location.latitude = data['latitude']
-        location.elevation = data.get('elevation')
-        location.sun_exposure = data['sun_exposure']
-        location.wind_exposure = data['wind_exposure']
-        location.drainage = data['drainage']
+        try:
+            garden_location_validator.validate(data)
+            location.name = data['name']
+            location.longitude = data['longitude']
+            location.latitude = data['latitude']
+            location.elevation = data.get('elevation')
+            location.hardiness_zone = data.get('hardiness_zone')
+            location.sun_exposure = data['sun_exposure']
+            location.wind_exposure = data['wind_exposure']
+            location.drainage = data['drainage']
+        except ValidationError as e:
+            return validation_error_response(e)
+        except (TypeError, ValueError) as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
 
         db.session.commit()
         return marshal(location, garden_location_output_model, envelope='data')
@@ -1,9 +1,10 @@
-from flask_restx import Namespace, Resource, fields, marshal_with
+from flask_restx import Namespace, Resource, fields, marshal, marshal_with
 from flask import request
 
 from ..data.models import IrrigationZone
 from ..data.database import db
 from flask_restx import fields as restx_fields
+from .validation import ValidationError, Validator, validation_error_response
 
 irrigation_zone_ns = Namespace('irrigation_zones', description='Operations related to irrigation zones')
 
@@ -27,6 +28,8 @@ irrigation_zone_output_model = irrigation_zone_ns.model('IrrigationZoneOutput',
     **base_irrigation_zone_fields
 })
 
+irrigation_zone_validator = Validator(irrigation_zone_input_model)
+
 @irrigation_zone_ns.route('/')
 class IrrigationZoneList(Resource):
     @marshal_with(irrigation_zone_output_model, envelope='data')
@@ -36,21 +39,26 @@ class IrrigationZoneList(Resource):
         return zones
 
     @irrigation_zone_ns.expect(irrigation_zone_input_model)
-    @marshal_with(irrigation_zone_output_model, envelope='data')
     def post(self):
         """Create a new irrigation zone"""
         data = request.json
-        new_zone = IrrigationZone(
-            name=data['name'],
-            scheduled_days=data['scheduled_days'],
-            start_time=data['start_time'],
-            duration_minutes=data['duration_minutes'],
-            flow_rate_gpm=data['flow_rate_gpm']
-        )
+        try:
+            irrigation_zone_validator.validate(data)
+            new_zone = IrrigationZone(
+                name=data['name'],
+                scheduled_days=data['scheduled_days'],
+                start_time=data['start_time'],
+                duration_minutes=data['duration_minutes'],
+                flow_rate_gpm=data['flow_rate_gpm']
+            )
+        except ValidationError as e:
+            return validation_error_response(e)
+        except (TypeError, ValueError) as e:
+            return {"error": str(e)}, 400
         db.session.add(new_zone)
         db.session.commit()
-        
-        return new_zone, 201
+
+        return marshal(new_zone, irrigation_zone_output_model, envelope='data'), 201
 
 @irrigation_zone_ns.route('/<int:id>')
 class IrrigationZoneResource(Resource):
@@ -61,20 +69,25 @@ class IrrigationZoneResource(Resource):
         return zone
 
     @irrigation_zone_ns.expect(irrigation_zone_input_model)
-    @marshal_with(irrigation_zone_output_model, envelope='data')
     def put(self, id):
         """Update an irrigation zone"""
         data = request.json
         zone = IrrigationZone.query.get_or_404(id)
-
-        zone.name = data['name']
-        zone.scheduled_days = data['scheduled_days']
-        zone.start_time = data['start_time']
-        zone.duration_minutes = data['duration_minutes']
-        zone.flow_rate_gpm = data['flow_rate_gpm']
+        try:
+            irrigation_zone_validator.validate(data)
+            zone.name = data['name']
+            zone.scheduled_days = data['scheduled_days']
+            zone.start_time = data['start_time']
+            zone.duration_minutes = data['duration_minutes']
+            zone.flow_rate_gpm = data['flow_rate_gpm']
+        except ValidationError as e:
+            return validation_error_response(e)
+        except (TypeError, ValueError) as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
 
         db.session.commit()
-        return zone
+        return marshal(zone, irrigation_zone_output_model, envelope='data')
 
     def delete(self, id):
         """Delete an irrigation zone"""
@@ -1,10 +1,16 @@
 from flask_restx import Namespace, Resource, fields, marshal
-from flask import request
-from datetime import datetime
+from flask import Response, request, current_app, stream_with_context, url_for
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 
-from ..data.models import Measurement
+from ..data.models import Measurement, LatestMeasurement, MeasurementSource
 from ..data.database import db
-from ..data.fields import MeasurementType, MeasurementUnit
+from ..data.fields import MeasurementType, MeasurementUnit, enum_lookup
+from ..data.partitions import measurement_rows, measurement_summary
+from ..data.timestamps import parse_timestamp
+from ..services.ingest import ingest_measurements
+from ..services.export import EXPORT_FORMATS, export_measurements
+from .validation import ValidationError, Validator, validation_error_response
 
 measurement_ns = Namespace('measurements', description='Operations related to measurements')
 
@@ -23,51 +29,332 @@ measurement_input_model = measurement_ns.model('MeasurementInput', base_measurem
 
 measurement_output_model = measurement_ns.model('MeasurementOutput', {
     'id': fields.Integer(description='The ID of the measurement'),
-    **base_measurement_fields
+    **base_measurement_fields,
+    'flagged': fields.Boolean(description='Whether anomaly detection flagged the measurement as an outlier')
 })
 
+latest_measurement_output_model = measurement_ns.model('LatestMeasurementOutput', {
+    'garden_location_id': fields.Integer(description='ID of the associated garden location'),
+    'measurement_type': fields.String(description='Type of measurement'),
+    'measurement_id': fields.Integer(description='ID of the most recent measurement'),
+    'unit': fields.String(description='Unit of measurement'),
+    'value': fields.Float(description='Most recent measurement value'),
+    'timestamp': fields.DateTime(description='When the most recent measurement was taken')
+})
+
+measurement_source_output_model = measurement_ns.model('MeasurementSourceOutput', {
+    'id': fields.Integer(description='The ID of the source'),
+    'name': fields.String(description='Source identifier as stored on measurements'),
+    'first_seen_at': fields.DateTime(description='When the source first submitted a measurement'),
+    'last_seen_at': fields.DateTime(description='When the source last submitted a measurement')
+})
+
+recent_reading_output_model = measurement_ns.model('RecentReadingOutput', {
+    'id': fields.Integer(description='The ID of the measurement'),
+    'timestamp': fields.DateTime(description='When the measurement was taken'),
+    'value': fields.Float(description='Measurement value'),
+    'unit': fields.String(description='Unit of measurement'),
+    'flagged': fields.Boolean(description='Whether anomaly detection flagged the measurement as an outlier')
+})
+
+recent_measurements_output_model = measurement_ns.model('RecentMeasurementsOutput', {
+    'garden_location_id': fields.Integer(description='ID of the associated garden location'),
+    'measurement_type': fields.String(description='Type of measurement'),
+    'start': fields.DateTime(description='Start of the window'),
+    'count': fields.Integer(description='Number of readings in the window'),
+    'min': fields.Float(description='Lowest value in the window'),
+    'max': fields.Float(description='Highest value in the window'),
+    'mean': fields.Float(description='Mean value in the window'),
+    'readings': fields.List(fields.Nested(recent_reading_output_model), description='Readings, oldest first')
+})
+
+measurement_summary_output_model = measurement_ns.model('MeasurementSummaryOutput', {
+    'garden_location_id': fields.Integer(description='ID of the associated garden location'),
+    'measurement_type': fields.String(description='Type of measurement'),
+    'unit': fields.String(description='Unit of measurement'),
+    'count': fields.Integer(description='Number of measurements'),
+    'min': fields.Float(description='Lowest value'),
+    'max': fields.Float(description='Highest value'),
+    'mean': fields.Float(description='Mean value')
+})
+
+measurement_validator = Validator(measurement_input_model, {
+    'measurement_type': MeasurementType,
+    'unit': MeasurementUnit
+})
+
+def measurement_from_input(data, validated=False):
+    """
+    Builds a transient Measurement from request data.
+
+    Args:
+        data: Measurement input
+        validated: Whether `data` already passed `measurement_validator`
+
+    Raises:
+        ValidationError: If a field is missing or has a value of the wrong type
+        TypeError, ValueError: If a field has a value the model rejects
+    """
+    if not validated:
+        measurement_validator.validate(data)
+
+    # Parse timestamp if it's provided, as naive UTC so offsets match stored readings
+    timestamp = data.get('timestamp')
+    if timestamp is None:
+        timestamp = datetime.utcnow()
+    else:
+        timestamp = parse_timestamp(timestamp)
+
+    return Measurement(
+        garden_location_id=data['garden_location_id'],
+        measurement_type=data['measurement_type'],
+        unit=data['unit'],
+        value=data['value'],
+        timestamp=timestamp,
+        period_minutes=data.get('period_minutes'),
+        source=data.get('source'),
+        notes=data.get('notes')
+    )
+
+measurement_filter_params = {
+    'garden_location_id': 'Only return measurements for this garden location',
+    'measurement_type': 'Only return measurements of this type',
+    'start': 'Only return measurements taken at or after this time (ISO 8601)',
+    'end': 'Only return measurements taken before this time (ISO 8601)',
+    'flagged': 'Only return measurements that were (true) or were not (false) flagged as outliers'
+}
+
+def measurement_filters_from_args(args):
+    """
+    Parses the measurement list filters from query string arguments.
+
+    Returns:
+        dict: Keyword arguments for `filter_table`
+
+    Raises:
+        ValueError: If a filter has an invalid value
+    """
+    filters = {}
+    if 'garden_location_id' in args:
+        try:
+            filters['garden_location_id'] = int(args['garden_location_id'])
+        except ValueError:
+            raise ValueError("Invalid value for field: 'garden_location_id'") from None
+    if 'measurement_type' in args:
+        filters['measurement_type'] = enum_lookup(MeasurementType).get(args['measurement_type'])
+        if filters['measurement_type'] is None:
+            raise ValueError("Invalid value for field: 'measurement_type'")
+    for field in ('start', 'end'):
+        if field in args:
+            try:
+                filters[field] = parse_timestamp(args[field])
+            except ValueError:
+                raise ValueError(f"Invalid value for field: '{field}'") from None
+    if 'flagged' in args:
+        flagged = args['flagged'].lower()
+        if flagged not in ('true', 'false'):
+            raise ValueError("Invalid value for field: 'flagged'")
+        filters['flagged'] = flagged == 'true'
+    return filters
+
+def submit_write_behind(write_behind, measurements, items):
+    """
+    Queues validated measurements for a write-behind commit.
+
+    Timestamps are filled in now so that a delayed commit or a replay stores
+    the time the reading was received.
+
+    Returns:
+        tuple: 202 response with the ingest ID and a Location header for its status
+    """
+    items = [{**item, 'timestamp': measurement.timestamp.isoformat()}
+             for measurement, item in zip(measurements, items)]
+    ingest_id = write_behind.submit(items)
+    location = url_for('measurements_ingest_status', ingest_id=ingest_id)
+    return {'data': {'ingest_id': ingest_id, 'status': 'pending'}}, 202, {'Location': location}
+
 @measurement_ns.route('/')
 class MeasurementList(Resource):
+    @measurement_ns.doc(params=measurement_filter_params)
     def get(self):
-        """List all measurements"""
-        measurements = Measurement.query.all()
+        """List all measurements, including archived time partitions"""
+        try:
+            filters = measurement_filters_from_args(request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        columns = [column.name for column in Measurement.__table__.columns]
+        measurements = [dict(zip(columns, row)) for row in measurement_rows(columns, **filters)]
         return marshal(measurements, measurement_output_model, envelope='data')
 
     @measurement_ns.expect(measurement_input_model)
     def post(self):
-        """Create a new measurement"""
+        """Create a new measurement, or return the existing one if this reading was already submitted"""
+        data = request.json
+        try:
+            new_measurement = measurement_from_input(data)
+            write_behind = current_app.extensions.get('write_behind')
+            if write_behind is not None:
+                return submit_write_behind(write_behind, [new_measurement], [data])
+            detector = current_app.extensions['anomaly_detector']
+            [(measurement, created)] = ingest_measurements([new_measurement], detector,
+                                                           recent=current_app.extensions.get('recent_readings'))
+            return marshal(measurement, measurement_output_model, envelope='data'), 201 if created else 200
+        except ValidationError as e:
+            return validation_error_response(e)
+        except (TypeError, ValueError) as e:
+            return {"error": str(e)}, 400
+
+@measurement_ns.route('/summary')
+class MeasurementSummary(Resource):
+    @measurement_ns.doc(params=measurement_filter_params)
+    def get(self):
+        """Summarize measurements per garden location, type and unit, including archived history"""
+        try:
+            filters = measurement_filters_from_args(request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return marshal(measurement_summary(**filters), measurement_summary_output_model, envelope='data')
+
+@measurement_ns.route('/batch')
+class MeasurementBatch(Resource):
+    @measurement_ns.expect([measurement_input_model])
+    def post(self):
+        """Create many measurements at once, skipping readings that were already submitted"""
         data = request.json
+        if not isinstance(data, list):
+            return {"error": "Request body must be a list of measurements"}, 400
+
         try:
-            # Validate measurement_type and unit values
-            if data['measurement_type'] not in MeasurementType.__members__:
-                raise ValueError("Invalid value for field: 'measurement_type'")
-            if data['unit'] not in MeasurementUnit.__members__:
-                raise ValueError("Invalid value for field: 'unit'")
-
-            # Parse timestamp if it's provided as string
-            timestamp = (
-                datetime.fromisoformat(data['timestamp'])
-                if isinstance(data.get('timestamp'), str)
-                else data.get('timestamp', datetime.utcnow())
+            measurement_validator.validate_many(data)
+        except ValidationError as e:
+            return validation_error_response(e)
+
+        measurements = []
+        for index, item in enumerate(data):
+            try:
+                measurements.append(measurement_from_input(item, validated=True))
+            except (TypeError, ValueError) as e:
+                return {"error": f"Item {index}: {str(e)}"}, 400
+
+        write_behind = current_app.extensions.get('write_behind')
+        if write_behind is not None:
+            return submit_write_behind(write_behind, measurements, data)
+
+        results = ingest_measurements(measurements, current_app.extensions['anomaly_detector'],
+                                      recent=current_app.extensions.get('recent_readings'))
+        created = [measurement.id for measurement, is_new in results if is_new]
+        duplicates = [measurement.id for measurement, is_new in results if not is_new]
+        return {'data': {'created': created, 'duplicates': duplicates}}, 201 if created else 200
+
+@measurement_ns.route('/export')
+class MeasurementExport(Resource):
+    @measurement_ns.doc(params={'format': 'Export format: csv (default), arrow or parquet', **measurement_filter_params})
+    def get(self):
+        """Export measurements as a CSV, Arrow IPC stream or Parquet file"""
+        output_format = request.args.get('format', 'csv').lower()
+        try:
+            filters = measurement_filters_from_args(request.args)
+            chunks = export_measurements(output_format, filters, current_app.config['EXPORT_BATCH_SIZE'])
+        except (ValueError, ImportError) as e:
+            return {"error": str(e)}, 400
+        mimetype, extension = EXPORT_FORMATS[output_format]
+        return Response(stream_with_context(chunks), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename=measurements.{extension}'})
+
+@measurement_ns.route('/ingest/<string:ingest_id>', endpoint='measurements_ingest_status')
+class MeasurementIngestStatus(Resource):
+    def get(self, ingest_id):
+        """Get the status of a write-behind submission"""
+        write_behind = current_app.extensions.get('write_behind')
+        status = write_behind.status(ingest_id) if write_behind is not None else None
+        if status is None:
+            return {"error": "Unknown ingest ID"}, 404
+        return {'data': status}
+
+@measurement_ns.route('/sources')
+class MeasurementSourceList(Resource):
+    def get(self):
+        """List all registered measurement sources"""
+        sources = MeasurementSource.query.order_by(MeasurementSource.name).all()
+        return marshal(sources, measurement_source_output_model, envelope='data')
+
+@measurement_ns.route('/latest')
+class LatestMeasurementList(Resource):
+    def get(self):
+        """List the most recent measurement for each garden location and type"""
+        try:
+            filters = measurement_filters_from_args(
+                {name: request.args[name] for name in ('garden_location_id', 'measurement_type')
+                 if name in request.args}
             )
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        # Served from memory when the shared recent readings file holds the table
+        recent = current_app.extensions.get('recent_readings')
+        latest = recent.latest(**filters) if recent is not None else None
+        if latest is None:
+            latest = LatestMeasurement.query.filter_by(**filters).order_by(LatestMeasurement.garden_location_id).all()
+        return marshal(latest, latest_measurement_output_model, envelope='data')
+
+recent_measurement_params = {
+    'garden_location_id': 'Garden location of the readings (required)',
+    'measurement_type': 'Type of the readings (required)',
+    'start': 'Only return readings taken at or after this time (ISO 8601); defaults to the recent readings window',
+    'flagged': measurement_filter_params['flagged']
+}
 
-            new_measurement = Measurement(
-                garden_location_id=data['garden_location_id'],
-                measurement_type=MeasurementType[data['measurement_type']],
-                unit=MeasurementUnit[data['unit']],
-                value=data['value'],
-                timestamp=timestamp,
-                period_minutes=data.get('period_minutes'),
-                source=data.get('source'),
-                notes=data.get('notes')
+def recent_readings(garden_location_id, measurement_type, start, flagged=None):
+    """
+    Returns a stream's readings taken at or after `start`, oldest first.
+
+    Readings come from the app's recent readings buffer when it is enabled and
+    covers the range, and from the database otherwise.
+
+    Returns:
+        list: (id, timestamp, value, unit, flagged) per reading
+    """
+    recent = current_app.extensions.get('recent_readings')
+    if recent is not None:
+        readings = recent.query(garden_location_id, measurement_type, start, flagged)
+        if readings is not None:
+            return readings
+    columns = ['id', 'timestamp', 'value', 'unit', 'flagged']
+    readings = [tuple(row) for row in measurement_rows(
+        columns, garden_location_id=garden_location_id, measurement_type=measurement_type,
+        start=start, flagged=flagged)]
+    readings.sort(key=lambda reading: (reading[1], reading[0]))
+    return readings
+
+@measurement_ns.route('/recent')
+class RecentMeasurementList(Resource):
+    @measurement_ns.doc(params=recent_measurement_params)
+    def get(self):
+        """Get the recent readings of one garden location and measurement type, with their summary"""
+        try:
+            for field in ('garden_location_id', 'measurement_type'):
+                if field not in request.args:
+                    raise ValueError(f"Missing required field: '{field}'")
+            filters = measurement_filters_from_args(
+                {name: request.args[name] for name in recent_measurement_params if name in request.args}
             )
-            db.session.add(new_measurement)
-            db.session.commit()
-            return marshal(new_measurement, measurement_output_model, envelope='data'), 201
-        except KeyError as e:
-            return {"error": f"Missing required field: {str(e)}"}, 400
-        except (TypeError, ValueError) as e:
+        except ValueError as e:
             return {"error": str(e)}, 400
+        if 'start' not in filters:
+            filters['start'] = datetime.utcnow() - timedelta(hours=current_app.config['RECENT_READINGS_WINDOW_HOURS'])
+
+        readings = recent_readings(filters['garden_location_id'], filters['measurement_type'], filters['start'],
+                                   filters.get('flagged'))
+        values = [reading[2] for reading in readings]
+        summary = {
+            **filters,
+            'count': len(values),
+            'min': min(values, default=None),
+            'max': max(values, default=None),
+            'mean': sum(values) / len(values) if values else None,
+            'readings': [dict(zip(('id', 'timestamp', 'value', 'unit', 'flagged'), reading)) for reading in readings]
+        }
+        return marshal(summary, recent_measurements_output_model, envelope='data')
 
 @measurement_ns.route('/<int:id>')
 class MeasurementResource(Resource):
@@ -81,35 +368,57 @@ class MeasurementResource(Resource):
         """Update a measurement"""
         data = request.json
         measurement = Measurement.query.get_or_404(id)
+        previous_type = measurement.measurement_type
 
         try:
+            measurement_validator.validate(data, partial=True)
             if 'measurement_type' in data:
-                measurement.measurement_type = MeasurementType[data['measurement_type']]
+                measurement.measurement_type = data['measurement_type']
             if 'unit' in data:
-                measurement.unit = MeasurementUnit[data['unit']]
+                measurement.unit = data['unit']
             if 'value' in data:
                 measurement.value = data['value']
             if 'timestamp' in data:
-                measurement.timestamp = (
-                    datetime.fromisoformat(data['timestamp'])
-                    if isinstance(data['timestamp'], str)
-                    else data['timestamp']
-                )
+                measurement.timestamp = parse_timestamp(data['timestamp'])
             if 'period_minutes' in data:
                 measurement.period_minutes = data['period_minutes']
             if 'source' in data:
                 measurement.source = data['source']
             if 'notes' in data:
                 measurement.notes = data['notes']
+            if 'flagged' in data:
+                if not isinstance(data['flagged'], bool):
+                    raise TypeError("Flagged must be a boolean")
+                measurement.flagged = data['flagged']
 
+            db.session.flush()
+            LatestMeasurement.refresh(measurement.garden_location_id, previous_type)
+            if measurement.measurement_type != previous_type:
+                LatestMeasurement.refresh(measurement.garden_location_id, measurement.measurement_type)
             db.session.commit()
+            recent = current_app.extensions.get('recent_readings')
+            if recent is not None:
+                recent.invalidate(measurement.garden_location_id, previous_type)
+                recent.invalidate(measurement.garden_location_id, measurement.measurement_type)
             return marshal(measurement, measurement_output_model, envelope='data')
+        except ValidationError as e:
+            return validation_error_response(e)
         except (TypeError, ValueError) as e:
             return {"error": str(e)}, 400
+        except IntegrityError:
+            # Moved onto the garden location, type, timestamp and source of another reading
+            db.session.rollback()
+            return {"error": "A measurement with this garden location, type, timestamp and source already exists"}, 409
 
     def delete(self, id):
         """Delete a measurement"""
         measurement = Measurement.query.get_or_404(id)
+        key = (measurement.garden_location_id, measurement.measurement_type)
         db.session.delete(measurement)
+        db.session.flush()
+        LatestMeasurement.refresh(*key)
         db.session.commit()
+        recent = current_app.extensions.get('recent_readings')
+        if recent is not None:
+            recent.invalidate(*key)
         return '', 204 
\ No newline at end of file
@@ -1,10 +1,11 @@
-from flask_restx import Namespace, Resource, fields, marshal_with
+from flask_restx import Namespace, Resource, fields, marshal, marshal_with
 from flask import request
 from datetime import datetime
 
 from ..data.models import Observation
 from ..data.database import db
-from ..data.fields import ObservationType, GrowthStage
+from ..data.fields import ObservationType, GrowthStage, enum_lookup
+from .validation import ValidationError, Validator, validation_error_response
 
 observation_ns = Namespace('observations', description='Operations related to plant observations')
 
@@ -28,38 +29,102 @@ observation_output_model = observation_ns.model('ObservationOutput', {
     **base_observation_fields
 })
 
+observation_validator = Validator(observation_input_model, {
+    'observation_type': ObservationType,
+    'stage_value': GrowthStage
+})
+
+observation_filter_params = {
+    'plant_id': 'Only observations of this plant',
+    'observation_type': 'Only observations of this type',
+    'recorded_by': 'Only observations recorded by this user',
+    'start': 'Only observations made at or after this time (ISO 8601)',
+    'end': 'Only observations made before this time (ISO 8601)'
+}
+
+def observation_filters_from_args(args):
+    """
+    Parses the observation filters from query string arguments.
+
+    Returns:
+        list: Conditions on `Observation`, empty if no filter is given
+
+    Raises:
+        ValueError: If a filter has an invalid value
+    """
+    conditions = []
+    if 'plant_id' in args:
+        try:
+            conditions.append(Observation.plant_id == int(args['plant_id']))
+        except ValueError:
+            raise ValueError("Invalid value for field: 'plant_id'") from None
+    if 'observation_type' in args:
+        observation_type = enum_lookup(ObservationType).get(args['observation_type'])
+        if observation_type is None:
+            raise ValueError("Invalid value for field: 'observation_type'")
+        conditions.append(Observation.observation_type == observation_type)
+    if 'recorded_by' in args:
+        conditions.append(Observation.recorded_by == args['recorded_by'])
+    for field in ('start', 'end'):
+        if field in args:
+            try:
+                timestamp = datetime.fromisoformat(args[field])
+            except ValueError:
+                raise ValueError(f"Invalid value for field: '{field}'") from None
+            conditions.append(Observation.timestamp >= timestamp if field == 'start' else
+                              Observation.timestamp < timestamp)
+    return conditions
+
 @observation_ns.route('/')
 class ObservationList(Resource):
-    @marshal_with(observation_output_model, envelope='data')
+    @observation_ns.doc(params=observation_filter_params)
     def get(self):
         """List all observations"""
-        observations = Observation.query.all()
-        return observations
+        try:
+            conditions = observation_filters_from_args(request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        observations = Observation.query.filter(*conditions).all()
+        return marshal(observations, observation_output_model, envelope='data')
+
+    @observation_ns.doc(params=observation_filter_params)
+    def delete(self):
+        """Delete every observation matching the filters; at least one filter is required"""
+        try:
+            conditions = observation_filters_from_args(request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        if not conditions:
+            return {"error": "At least one filter is required to delete observations"}, 400
+        result = db.session.execute(
+            db.delete(Observation).where(*conditions).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return {'data': {'deleted': result.rowcount}}
 
     @observation_ns.expect(observation_input_model)
-    @marshal_with(observation_output_model, envelope='data')
     def post(self):
         """Create a new observation"""
         data = request.json
-        
-        # Parse timestamp if it's provided as string
-        timestamp = datetime.fromisoformat(data['timestamp']) if isinstance(data['timestamp'], str) else data['timestamp']
-        
-        new_observation = Observation(
-            plant_id=data['plant_id'],
-            timestamp=timestamp,
-            observation_type=data['observation_type'],
-            numeric_value=data.get('numeric_value'),
-            stage_value=data.get('stage_value'),
-            notes=data.get('notes'),
-            image_data=data.get('image_data').encode('utf-8') if data.get('image_data') else None,
-            recorded_by=data.get('recorded_by')
-        )
-        
+        try:
+            observation_validator.validate(data)
+            new_observation = Observation(
+                plant_id=data['plant_id'],
+                timestamp=datetime.fromisoformat(data['timestamp']),
+                observation_type=data['observation_type'],
+                numeric_value=data.get('numeric_value'),
+                stage_value=data.get('stage_value'),
+                notes=data.get('notes'),
+                image_data=data.get('image_data').encode('utf-8') if data.get('image_data') else None,
+                recorded_by=data.get('recorded_by')
+            )
+        except ValidationError as e:
+            return validation_error_response(e)
+
         db.session.add(new_observation)
         db.session.commit()
-        
-        return new_observation, 201
+
+        return marshal(new_observation, observation_output_model, envelope='data'), 201
 
 @observation_ns.route('/<int:id>')
 class ObservationResource(Resource):
@@ -70,20 +135,17 @@ class ObservationResource(Resource):
         return observation
 
     @observation_ns.expect(observation_input_model)
-    @marshal_with(observation_output_model, envelope='data')
     def put(self, id):
         """Update an observation"""
         data = request.json
         observation = Observation.query.get_or_404(id)
+        try:
+            observation_validator.validate(data, partial=True)
+        except ValidationError as e:
+            return validation_error_response(e)
 
-        # Parse timestamp if it's provided as string
         if 'timestamp' in data:
-            observation.timestamp = (
-                datetime.fromisoformat(data['timestamp']) 
-                if isinstance(data['timestamp'], str) 
-                else data['timestamp']
-            )
-        
+            observation.timestamp = datetime.fromisoformat(data['timestamp'])
         if 'observation_type' in data:
             observation.observation_type = data['observation_type']
         if 'numeric_value' in data:
@@ -98,7 +160,7 @@ class ObservationResource(Resource):
             observation.recorded_by = data.get('recorded_by')
 
         db.session.commit()
-        return observation
+        return marshal(observation, observation_output_model, envelope='data')
 
     def delete(self, id):
         """Delete an observation"""
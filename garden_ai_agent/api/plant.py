@@ -1,8 +1,12 @@
-from flask_restx import Namespace, Resource, fields, marshal_with
+from flask_restx import Namespace, Resource, fields, marshal, marshal_with
 from flask import request
 
-from ..data.models import Plant
+from ..data.models import GardenLocation, Plant
 from ..data.database import db
+from ..data.fields import GrowthForm, LifeCycle, UseCategory, enum_lookup
+from ..data.search import search_plants
+from ..services import suitability
+from .validation import ValidationError, Validator, validation_error_response
 
 plant_ns = Namespace('plants', description='Operations related to plants')
 
@@ -37,6 +41,50 @@ plant_output_model = plant_ns.model('PlantOutput', {
     **base_plant_fields
 })
 
+plant_validator = Validator(plant_input_model, {
+    'growth_form': GrowthForm,
+    'life_cycle': LifeCycle,
+    'primary_use': UseCategory,
+    'secondary_use': UseCategory
+})
+
+plant_bulk_update_model = plant_ns.model('PlantBulkUpdate', {
+    'ids': fields.List(fields.Integer, required=True, description='IDs of the plants to update'),
+    'values': fields.Nested(plant_input_model, required=True,
+                            description='Fields to set on every plant; fields left out are unchanged')
+})
+
+# Plants that one bulk update may select, to keep the statement's parameters bounded
+MAX_BULK_IDS = 10000
+
+# Columns the suitability matrix is built from
+SUITABILITY_COLUMNS = {'hardiness_zone_min', 'hardiness_zone_max', 'preferred_soil_ph_min', 'preferred_soil_ph_max'}
+
+def plant_column_values(values):
+    """
+    Validates the fields of a bulk update and converts them to column values.
+
+    The values are assigned to a transient `Plant`, so the model's checks and
+    enum conversions apply just as they do for single updates.
+
+    Returns:
+        dict: Value per `plants` column
+
+    Raises:
+        ValidationError: If a field does not match the input model
+        ValueError: If there are no fields, unknown fields, or a value is out of range
+    """
+    if type(values) is not dict or not values:
+        raise ValueError("'values' must be an object with the fields to update")
+    unknown = sorted(set(values) - set(base_plant_fields))
+    if unknown:
+        raise ValueError(f"Unknown field: '{unknown[0]}'")
+    plant_validator.validate(values, partial=True)
+    plant = Plant()
+    for field, value in values.items():
+        setattr(plant, field, value)
+    return {field: getattr(plant, field) for field in values}
+
 @plant_ns.route('/')
 class PlantList(Resource):
     @marshal_with(plant_output_model, envelope='data')
@@ -46,35 +94,99 @@ class PlantList(Resource):
         return plants
 
     @plant_ns.expect(plant_input_model)
-    @marshal_with(plant_output_model, envelope='data')
     def post(self):
         """Create a new plant"""
         data = request.json
-        new_plant = Plant(
-            garden_location_id=data['garden_location_id'],
-            name=data['name'],
-            scientific_name=data.get('scientific_name'),
-            variety=data.get('variety'),
-            growth_form=data['growth_form'],
-            life_cycle=data['life_cycle'],
-            primary_use=data['primary_use'],
-            secondary_use=data.get('secondary_use'),
-            expected_height_inches=data.get('expected_height_inches'),
-            expected_spread_inches=data.get('expected_spread_inches'),
-            hardiness_zone_min=data.get('hardiness_zone_min'),
-            hardiness_zone_max=data.get('hardiness_zone_max'),
-            preferred_soil_ph_min=data.get('preferred_soil_ph_min'),
-            preferred_soil_ph_max=data.get('preferred_soil_ph_max'),
-            planting_depth_inches=data.get('planting_depth_inches'),
-            spacing_inches=data.get('spacing_inches'),
-            description=data.get('description'),
-            care_instructions=data.get('care_instructions'),
-            notes=data.get('notes')
-        )
+        try:
+            plant_validator.validate(data)
+            new_plant = Plant(
+                garden_location_id=data['garden_location_id'],
+                name=data['name'],
+                scientific_name=data.get('scientific_name'),
+                variety=data.get('variety'),
+                growth_form=data['growth_form'],
+                life_cycle=data['life_cycle'],
+                primary_use=data['primary_use'],
+                secondary_use=data.get('secondary_use'),
+                expected_height_inches=data.get('expected_height_inches'),
+                expected_spread_inches=data.get('expected_spread_inches'),
+                hardiness_zone_min=data.get('hardiness_zone_min'),
+                hardiness_zone_max=data.get('hardiness_zone_max'),
+                preferred_soil_ph_min=data.get('preferred_soil_ph_min'),
+                preferred_soil_ph_max=data.get('preferred_soil_ph_max'),
+                planting_depth_inches=data.get('planting_depth_inches'),
+                spacing_inches=data.get('spacing_inches'),
+                description=data.get('description'),
+                care_instructions=data.get('care_instructions'),
+                notes=data.get('notes')
+            )
+        except ValidationError as e:
+            return validation_error_response(e)
+        except (TypeError, ValueError) as e:
+            return {"error": str(e)}, 400
         db.session.add(new_plant)
         db.session.commit()
-        
-        return new_plant, 201
+
+        return marshal(new_plant, plant_output_model, envelope='data'), 201
+
+    @plant_ns.expect(plant_bulk_update_model)
+    def patch(self):
+        """Set the same fields on many plants at once, e.g. to move them to another garden location"""
+        data = request.json
+        if type(data) is not dict:
+            return {"error": "Request body must be a JSON object"}, 400
+        ids = data.get('ids')
+        if type(ids) is not list or not ids or any(type(id) is not int for id in ids):
+            return {"error": "'ids' must be a non-empty list of plant IDs"}, 400
+        if len(ids) > MAX_BULK_IDS:
+            return {"error": f"At most {MAX_BULK_IDS} plants can be updated at once"}, 400
+        try:
+            values = plant_column_values(data.get('values'))
+        except ValidationError as e:
+            return validation_error_response(e)
+        except (TypeError, ValueError) as e:
+            return {"error": str(e)}, 400
+        if 'garden_location_id' in values and db.session.get(GardenLocation, values['garden_location_id']) is None:
+            return {"error": f"Garden location {values['garden_location_id']} does not exist"}, 400
+
+        table = Plant.__table__
+        result = db.session.execute(db.update(table).where(table.c.id.in_(ids)).values(values))
+        db.session.commit()
+        # Core updates bypass the session events that keep the suitability matrix current
+        if SUITABILITY_COLUMNS.intersection(values):
+            suitability.invalidate()
+        return {'data': {'updated': result.rowcount}}
+
+@plant_ns.route('/search')
+class PlantSearch(Resource):
+    @plant_ns.doc(params={
+        'q': 'Words to search for in names, description, care instructions and notes',
+        'growth_form': 'Only return plants with this growth form',
+        'life_cycle': 'Only return plants with this life cycle',
+        'primary_use': 'Only return plants with this primary use',
+        'hardiness_zone': 'Only return plants that grow in this hardiness zone',
+        'limit': 'Maximum number of results (default 50, max 500)'
+    })
+    def get(self):
+        """Search plants by name and care text, most relevant first"""
+        args = request.args
+        try:
+            filters = {}
+            for field, enum in (('growth_form', GrowthForm), ('life_cycle', LifeCycle), ('primary_use', UseCategory)):
+                if field in args:
+                    filters[field] = enum_lookup(enum).get(args[field])
+                    if filters[field] is None:
+                        raise ValueError(f"Invalid value for field: '{field}'")
+            if 'hardiness_zone' in args:
+                filters['hardiness_zone'] = int(args['hardiness_zone'])
+            limit = int(args.get('limit', 50))
+            if limit <= 0:
+                raise ValueError("Limit must be greater than 0")
+
+            plants = search_plants(args.get('q', ''), limit=limit, **filters)
+            return marshal(plants, plant_output_model, envelope='data')
+        except ValueError as e:
+            return {"error": str(e)}, 400
 
 @plant_ns.route('/<int:id>')
 class PlantResource(Resource):
@@ -85,33 +197,38 @@ class PlantResource(Resource):
         return plant
 
     @plant_ns.expect(plant_input_model)
-    @marshal_with(plant_output_model, envelope='data')
     def put(self, id):
         """Update a plant"""
         data = request.json
         plant = Plant.query.get_or_404(id)
-
-        plant.name = data['name']
-        plant.scientific_name = data.get('scientific_name')
-        plant.variety = data.get('variety')
-        plant.growth_form = data['growth_form']
-        plant.life_cycle = data['life_cycle']
-        plant.primary_use = data['primary_use']
-        plant.secondary_use = data.get('secondary_use')
-        plant.expected_height_inches = data.get('expected_height_inches')
-        plant.expected_spread_inches = data.get('expected_spread_inches')
-        plant.hardiness_zone_min = data.get('hardiness_zone_min')
-        plant.hardiness_zone_max = data.get('hardiness_zone_max')
-        plant.preferred_soil_ph_min = data.get('preferred_soil_ph_min')
-        plant.preferred_soil_ph_max = data.get('preferred_soil_ph_max')
-        plant.planting_depth_inches = data.get('planting_depth_inches')
-        plant.spacing_inches = data.get('spacing_inches')
-        plant.description = data.get('description')
-        plant.care_instructions = data.get('care_instructions')
-        plant.notes = data.get('notes')
+        try:
+            plant_validator.validate(data)
+            plant.name = data['name']
+            plant.scientific_name = data.get('scientific_name')
+            plant.variety = data.get('variety')
+            plant.growth_form = data['growth_form']
+            plant.life_cycle = data['life_cycle']
+            plant.primary_use = data['primary_use']
+            plant.secondary_use = data.get('secondary_use')
+            plant.expected_height_inches = data.get('expected_height_inches')
+            plant.expected_spread_inches = data.get('expected_spread_inches')
+            plant.hardiness_zone_min = data.get('hardiness_zone_min')
+            plant.hardiness_zone_max = data.get('hardiness_zone_max')
+            plant.preferred_soil_ph_min = data.get('preferred_soil_ph_min')
+            plant.preferred_soil_ph_max = data.get('preferred_soil_ph_max')
+            plant.planting_depth_inches = data.get('planting_depth_inches')
+            plant.spacing_inches = data.get('spacing_inches')
+            plant.description = data.get('description')
+            plant.care_instructions = data.get('care_instructions')
+            plant.notes = data.get('notes')
+        except ValidationError as e:
+            return validation_error_response(e)
+        except (TypeError, ValueError) as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
 
         db.session.commit()
-        return plant
+        return marshal(plant, plant_output_model, envelope='data')
 
     def delete(self, id):
         """Delete a plant"""
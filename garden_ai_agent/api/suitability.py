@@ -0,0 +1,28 @@
+from flask_restx import Resource, marshal
+from flask import current_app
+
+from ..data.models import Plant, GardenLocation
+from .garden_location import garden_location_ns, garden_location_output_model
+from .plant import plant_ns, plant_output_model
+
+# Routes that join plants and garden locations live here so neither namespace
+# module has to import the other.
+
+@garden_location_ns.route('/<int:id>/suitable_plants')
+class GardenLocationSuitablePlants(Resource):
+    def get(self, id):
+        """List plants whose hardiness zone and soil pH ranges fit a garden location"""
+        GardenLocation.query.get_or_404(id)
+        plant_ids = current_app.extensions['suitability'].suitable_plant_ids(id)
+        plants = Plant.query.filter(Plant.id.in_(plant_ids)).order_by(Plant.id).all() if plant_ids else []
+        return marshal(plants, plant_output_model, envelope='data')
+
+@plant_ns.route('/<int:id>/suitable_locations')
+class PlantSuitableLocations(Resource):
+    def get(self, id):
+        """List garden locations that fit a plant's hardiness zone and soil pH ranges"""
+        Plant.query.get_or_404(id)
+        location_ids = current_app.extensions['suitability'].suitable_location_ids(id)
+        locations = (GardenLocation.query.filter(GardenLocation.id.in_(location_ids))
+                     .order_by(GardenLocation.id).all() if location_ids else [])
+        return marshal(locations, garden_location_output_model, envelope='data')
@@ -1,6 +1,8 @@
 from flask import Flask
 from flask_restx import Api
-from flask_migrate import Migrate
+from datetime import timedelta
+import atexit
+import os
 import logging
 
 from .api.garden_location import garden_location_ns
@@ -8,7 +10,14 @@ from .api.irrigation_zone import irrigation_zone_ns
 from .api.plant import plant_ns
 from .api.observation import observation_ns
 from .api.measurement import measurement_ns
+from .api import suitability  # noqa: F401 - registers cross-namespace routes
 from .data.database import db
+from .data.segments import SegmentStore
+from .data.slow_query import init_slow_query_log
+from .services import SuitabilityMatcher, AnomalyDetector, RecentReadings
+from .openapi import init_spec_cache
+from .representations import init_representations
+from .cli import register_commands
 
 
 def initialize_api(app):
@@ -22,6 +31,8 @@ def initialize_api(app):
     api.add_namespace(plant_ns)
     api.add_namespace(observation_ns)
     api.add_namespace(measurement_ns)
+    init_representations(api, app.config['JSON_ENCODER'])
+    return api
 
 
 def create_app(test_config=None):
@@ -30,6 +41,49 @@ def create_app(test_config=None):
     # Default Configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///garden_data.sqlite3'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SUITABILITY_SOIL_PH_MAX_AGE_DAYS'] = 90
+    app.config['SUITABILITY_GENERATION_PATH'] = os.path.join(app.instance_path, 'suitability.generation')
+    app.config['ANOMALY_Z_THRESHOLD'] = 4.0
+    app.config['ANOMALY_MIN_SAMPLES'] = 30
+    app.config['ANOMALY_WINDOW'] = 200
+    app.config['ANOMALY_PERSIST_INTERVAL_SECONDS'] = 60
+    app.config['METRICS_ENABLED'] = True
+    app.config['SERVER_TIMING_ENABLED'] = False
+    app.config['PROFILING_HEADER_ENABLED'] = False
+    app.config['PROFILING_SAMPLE_RATE'] = 0.0
+    app.config['PROFILING_OUTPUT_DIR'] = 'profiles'
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 200
+    app.config['ASYNC_INGEST_MAX_DELAY_MS'] = 5
+    app.config['ASYNC_INGEST_MAX_BATCH'] = 1000
+    app.config['WRITE_BEHIND_ENABLED'] = False
+    app.config['WRITE_BEHIND_LOG_DIR'] = os.path.join(app.instance_path, 'ingest_log')
+    app.config['WRITE_BEHIND_MAX_BATCH'] = 1000
+    app.config['WRITE_BEHIND_MAX_DELAY_MS'] = 50
+    app.config['WRITE_BEHIND_FSYNC'] = True
+    app.config['EXPORT_BATCH_SIZE'] = 10000
+    app.config['OPENAPI_SPEC_FILE'] = None
+    app.config['RECENT_READINGS_ENABLED'] = False
+    app.config['RECENT_READINGS_WINDOW_HOURS'] = 48
+    app.config['RECENT_READINGS_CAPACITY'] = 4096
+    app.config['RECENT_READINGS_SHARED_PATH'] = None
+    app.config['RECENT_READINGS_MAX_STREAMS'] = 1024
+    app.config['SEGMENT_STORE_DIR'] = os.path.join(app.instance_path, 'segments')
+    app.config['JSON_ENCODER'] = 'auto'
+    app.config['COMPRESSION_ENABLED'] = True
+    app.config['COMPRESSION_MIN_BYTES'] = 1024
+    app.config['COMPRESSION_LEVEL'] = 6
+    app.config['COMPRESSION_BROTLI_QUALITY'] = 4
+    app.config['RATE_LIMIT_ENABLED'] = False
+    app.config['RATE_LIMIT_CLIENT_HEADER'] = 'X-Client-Id'
+    app.config['RATE_LIMIT_TRUSTED_PROXIES'] = []
+    app.config['RATE_LIMIT_READ_PER_SECOND'] = 20.0
+    app.config['RATE_LIMIT_READ_BURST'] = 100
+    app.config['RATE_LIMIT_WRITE_PER_SECOND'] = 10.0
+    app.config['RATE_LIMIT_WRITE_BURST'] = 50
+    app.config['RATE_LIMIT_STORE'] = None
+    app.config['LOAD_SHED_QUEUE_DEPTH'] = None
+    app.config['LOAD_SHED_WRITE_WAIT_MS'] = None
+    app.config['LOAD_SHED_RETRY_AFTER_SECONDS'] = 1
 
     # Override with test config if provided
     if test_config is not None:
@@ -37,13 +91,64 @@ def create_app(test_config=None):
 
     # Initialize extensions
     db.init_app(app)
-    Migrate(app, db)
+    register_commands(app)
+    app.extensions['suitability'] = SuitabilityMatcher(
+        soil_ph_max_age=timedelta(days=app.config['SUITABILITY_SOIL_PH_MAX_AGE_DAYS']),
+        generation_path=app.config['SUITABILITY_GENERATION_PATH']
+    )
+    app.extensions['anomaly_detector'] = AnomalyDetector(
+        z_threshold=app.config['ANOMALY_Z_THRESHOLD'],
+        min_samples=app.config['ANOMALY_MIN_SAMPLES'],
+        window=app.config['ANOMALY_WINDOW'],
+        persist_interval=app.config['ANOMALY_PERSIST_INTERVAL_SECONDS']
+    )
+    # Optional features are imported only when their setting turns them on
+    if app.config['RECENT_READINGS_ENABLED'] and app.config['RECENT_READINGS_SHARED_PATH']:
+        from .services.shared_readings import SharedRecentReadings
+        app.extensions['recent_readings'] = SharedRecentReadings(
+            app.config['RECENT_READINGS_SHARED_PATH'],
+            window=timedelta(hours=app.config['RECENT_READINGS_WINDOW_HOURS']),
+            capacity=app.config['RECENT_READINGS_CAPACITY'],
+            max_streams=app.config['RECENT_READINGS_MAX_STREAMS']
+        )
+    elif app.config['RECENT_READINGS_ENABLED']:
+        app.extensions['recent_readings'] = RecentReadings(
+            window=timedelta(hours=app.config['RECENT_READINGS_WINDOW_HOURS']),
+            capacity=app.config['RECENT_READINGS_CAPACITY']
+        )
+    app.extensions['segment_store'] = SegmentStore(app.config['SEGMENT_STORE_DIR'])
+    init_slow_query_log(app)
 
     # Logging
     logging.basicConfig()
     logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
     logging.getLogger('werkzeug').setLevel(logging.INFO)
 
-    initialize_api(app)
+    # Registered first so that it runs after the other after_request hooks
+    if app.config['COMPRESSION_ENABLED']:
+        from .compression import init_compression
+        init_compression(app)
+    api = initialize_api(app)
+    if app.config['METRICS_ENABLED']:
+        from .profiling import init_profiling
+        init_profiling(app, api)
+    if (app.config['RATE_LIMIT_ENABLED'] or app.config['LOAD_SHED_QUEUE_DEPTH'] is not None
+            or app.config['LOAD_SHED_WRITE_WAIT_MS'] is not None):
+        from .admission import init_admission
+        init_admission(app)
+    init_spec_cache(app, api)
+
+    if app.config['WRITE_BEHIND_ENABLED']:
+        from .services.write_behind import WriteBehindQueue
+        write_behind = WriteBehindQueue(
+            app,
+            app.config['WRITE_BEHIND_LOG_DIR'],
+            max_batch=app.config['WRITE_BEHIND_MAX_BATCH'],
+            max_delay=app.config['WRITE_BEHIND_MAX_DELAY_MS'] / 1000,
+            fsync=app.config['WRITE_BEHIND_FSYNC']
+        )
+        app.extensions['write_behind'] = write_behind
+        write_behind.start()
+        atexit.register(write_behind.stop)
     return app
 
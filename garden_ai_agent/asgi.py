@@ -0,0 +1,280 @@
+"""
+Async ingest service for sensor gateways.
+
+A small ASGI application serving `POST /measurements/` and
+`POST /measurements/batch` on an async SQLAlchemy engine, for gateways that
+hold many connections open. Requests are validated with the same code as the
+Flask API and queued; a single committer task drains the queue every few
+milliseconds and ingests everything it collected in one transaction (group
+commit), so one fsync is shared by many concurrent requests. Responses match
+the Flask endpoints.
+
+Run with an ASGI server, e.g.:
+    uvicorn --factory garden_ai_agent.asgi:create_ingest_app --port 8001
+
+Requires `aiosqlite` (SQLite) or `asyncpg` (PostgreSQL).
+"""
+import asyncio
+import json
+import logging
+from typing import List, Tuple
+
+from flask_restx import marshal
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from .api.measurement import measurement_from_input, measurement_output_model, measurement_validator
+from .api.validation import ValidationError, validation_error_response
+from .app import create_app
+from .data.database import db
+from .data.models import Measurement
+from .services.ingest import ingest_measurements
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class GroupCommitter:
+    """
+    Collects measurements from concurrent requests and ingests them together.
+
+    The first queued request starts a group; the group is committed once
+    `max_delay` seconds have passed or it holds `max_batch` measurements.
+    If a group fails, its requests are retried one at a time so that one bad
+    request cannot fail the others. Stored readings are added to `recent`, the
+    app's recent readings buffer, if one is given.
+    """
+
+    def __init__(self, session_factory, detector, max_delay: float = 0.005, max_batch: int = 1000, recent=None):
+        self.session_factory = session_factory
+        self.detector = detector
+        self.recent = recent
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = None
+        self.committed_groups = 0
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Commits everything already queued, then stops the committer."""
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        async with self.session_factory() as session:
+            await session.run_sync(self.detector.persist)
+
+    async def submit(self, measurements: List[Measurement]) -> List[Tuple[Measurement, bool]]:
+        """Queues measurements and waits until their group is committed."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((measurements, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self._queue.get()]
+            size = len(group[0][0])
+            deadline = loop.time() + self.max_delay
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                group.append(item)
+                size += len(item[0])
+            try:
+                await self._commit(group)
+            except Exception:
+                # Only this group fails; the committer keeps serving the others
+                logger.exception("Failed to commit a group of %d requests", len(group))
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(RuntimeError('Failed to store measurements'))
+            finally:
+                for _ in group:
+                    self._queue.task_done()
+
+    async def _commit(self, group) -> None:
+        measurements = [m for request_measurements, _ in group for m in request_measurements]
+        try:
+            results = await self._ingest(measurements)
+        except Exception:
+            if len(group) == 1:
+                # The future is already cancelled if the client disconnected
+                if not group[0][1].done():
+                    group[0][1].set_exception(RuntimeError('Failed to store measurements'))
+                logger.exception("Failed to ingest %d measurements", len(measurements))
+                return
+            # Retried with the same measurements, which keep their anomaly flags,
+            # so the detector does not count them twice
+            for item in group:
+                await self._commit([item])
+            return
+        self.committed_groups += 1
+        start = 0
+        for request_measurements, future in group:
+            if not future.done():
+                future.set_result(results[start:start + len(request_measurements)])
+            start += len(request_measurements)
+
+    async def _ingest(self, measurements: List[Measurement]) -> List[Tuple[Measurement, bool]]:
+        async with self.session_factory() as session:
+            return await session.run_sync(
+                lambda sync_session: ingest_measurements(measurements, self.detector, sync_session, self.recent)
+            )
+
+
+class IngestApp:
+    """ASGI application serving the measurement ingest endpoints."""
+
+    def __init__(self, database_url, detector, max_delay: float, max_batch: int, recent=None):
+        self.database_url = database_url
+        self.detector = detector
+        self.recent = recent
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.engine = None
+        self.committer = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        path = scope['path'].rstrip('/')
+        if path not in ('/measurements', '/measurements/batch'):
+            await self._respond(send, 404, {'error': 'Not found'})
+            return
+        if scope['method'] != 'POST':
+            await self._respond(send, 405, {'error': 'Method not allowed'})
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            await self._respond(send, 413, {'error': 'Request body too large'})
+            return
+        try:
+            data = json.loads(body)
+        except ValueError:
+            await self._respond(send, 400, {'error': 'Request body must be valid JSON'})
+            return
+
+        try:
+            if path == '/measurements':
+                status, body = await self._post_measurement(data)
+            else:
+                status, body = await self._post_batch(data)
+        except RuntimeError as e:
+            status, body = 500, {'error': str(e)}
+        await self._respond(send, status, body)
+
+    async def _post_measurement(self, data):
+        try:
+            measurement = measurement_from_input(data)
+        except ValidationError as e:
+            body, status = validation_error_response(e)
+            return status, body
+        except (TypeError, ValueError) as e:
+            return 400, {"error": str(e)}
+        [(stored, created)] = await self.committer.submit([measurement])
+        return 201 if created else 200, marshal(stored, measurement_output_model, envelope='data')
+
+    async def _post_batch(self, data):
+        if not isinstance(data, list):
+            return 400, {"error": "Request body must be a list of measurements"}
+        try:
+            measurement_validator.validate_many(data)
+        except ValidationError as e:
+            body, status = validation_error_response(e)
+            return status, body
+        measurements = []
+        for index, item in enumerate(data):
+            try:
+                measurements.append(measurement_from_input(item, validated=True))
+            except (TypeError, ValueError) as e:
+                return 400, {"error": f"Item {index}: {str(e)}"}
+        if not measurements:
+            return 200, {'data': {'created': [], 'duplicates': []}}
+        results = await self.committer.submit(measurements)
+        created = [measurement.id for measurement, is_new in results if is_new]
+        duplicates = [measurement.id for measurement, is_new in results if not is_new]
+        return 201 if created else 200, {'data': {'created': created, 'duplicates': duplicates}}
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.engine = create_async_engine(self.database_url)
+                session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
+                self.committer = GroupCommitter(session_factory, self.detector, self.max_delay, self.max_batch,
+                                                self.recent)
+                self.committer.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.committer.stop()
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        """Returns the request body, or None if it exceeds `MAX_BODY_BYTES`."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    @staticmethod
+    async def _respond(send, status: int, body) -> None:
+        payload = json.dumps(body).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(payload)).encode())]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+
+def async_database_url(url):
+    """Returns the database URL with the dialect's async driver."""
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()}")
+    return url.set(drivername=driver)
+
+
+def create_ingest_app(test_config=None) -> IngestApp:
+    """
+    Creates the async ingest service.
+
+    Configuration is read through `create_app`, so the service uses the same
+    database and anomaly detection settings as the Flask API.
+    """
+    app = create_app(test_config)
+    with app.app_context():
+        database_url = async_database_url(db.engine.url)
+    return IngestApp(
+        database_url,
+        app.extensions['anomaly_detector'],
+        max_delay=app.config['ASYNC_INGEST_MAX_DELAY_MS'] / 1000,
+        max_batch=app.config['ASYNC_INGEST_MAX_BATCH'],
+        recent=app.extensions.get('recent_readings')
+    )
@@ -0,0 +1,183 @@
+import csv
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .data.database import db
+from .data.fields import MeasurementType, enum_lookup
+from .data.models import MeasurementPartition
+from .data.partitions import archive_partitions, drop_partitions, freeze_partitions
+from .services.bulk_import import import_measurements
+from .services.export import EXPORT_FORMATS, export_measurements
+
+
+def _reset_recent_readings() -> None:
+    # Readings written or removed here bypass ingest, so the buffer must be warmed again
+    recent = current_app.extensions.get('recent_readings')
+    if recent is not None:
+        recent.reset()
+
+
+@click.command('export-measurements')
+@click.option('--format', 'output_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv',
+              show_default=True, help='Output file format')
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), required=True,
+              help='File to write')
+@click.option('--garden-location-id', type=int, help='Only export this garden location')
+@click.option('--measurement-type', type=click.Choice(list(MeasurementType.__members__), case_sensitive=False),
+              help='Only export this measurement type')
+@click.option('--start', type=click.DateTime(), help='Only export measurements taken at or after this time')
+@click.option('--end', type=click.DateTime(), help='Only export measurements taken before this time')
+@click.option('--batch-size', type=int, help='Rows per record batch (default EXPORT_BATCH_SIZE)')
+@with_appcontext
+def export_measurements_command(output_format, output, garden_location_id, measurement_type, start, end,
+                                batch_size):
+    """Export measurements to a CSV, Arrow IPC stream or Parquet file."""
+    filters = {
+        'garden_location_id': garden_location_id,
+        'measurement_type': enum_lookup(MeasurementType)[measurement_type] if measurement_type else None,
+        'start': start,
+        'end': end
+    }
+    started = time.perf_counter()
+    try:
+        chunks = export_measurements(output_format, filters, batch_size or current_app.config['EXPORT_BATCH_SIZE'])
+    except ImportError as e:
+        raise click.ClickException(str(e))
+    size = 0
+    with open(output, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+    click.echo(f"Wrote {size} bytes to {output} in {time.perf_counter() - started:.1f}s")
+
+
+@click.command('import-measurements')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'parquet']),
+              help='Input file format (default: from the file extension)')
+@click.option('--chunk-size', type=int, default=50000, show_default=True, help='Rows per chunk and transaction')
+@click.option('--rejects', type=click.Path(dir_okay=False, writable=True),
+              help='Write rejected rows (row number and reason) to this CSV file')
+@with_appcontext
+def import_measurements_command(path, file_format, chunk_size, rejects):
+    """
+    Bulk load historical measurements from a CSV or Parquet file.
+
+    The file needs garden_location_id, measurement_type, unit, value and timestamp
+    columns, and may have period_minutes, source and notes. Readings that already
+    exist are skipped.
+    """
+    def progress(report):
+        click.echo(f"{report.read} rows read, {report.rows_per_second:.0f} rows/s", err=True)
+
+    rejects_file = open(rejects, 'w', newline='') if rejects else None
+    try:
+        rejects_writer = None
+        if rejects_file is not None:
+            rejects_writer = csv.writer(rejects_file)
+            rejects_writer.writerow(['row', 'reason'])
+        report = import_measurements(path, file_format, chunk_size, rejects_writer, progress)
+    except (ValueError, ImportError) as e:
+        raise click.ClickException(str(e))
+    finally:
+        if rejects_file is not None:
+            rejects_file.close()
+        _reset_recent_readings()
+    click.echo(f"Read {report.read} rows in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s): "
+               f"{report.inserted} inserted, {report.duplicates} duplicates skipped, {report.rejected} rejected")
+
+
+@click.group('measurement-partitions')
+def measurement_partitions_group():
+    """Manage monthly measurement partitions."""
+
+
+@measurement_partitions_group.command('list')
+@with_appcontext
+def list_partitions_command():
+    """List archived measurement partitions."""
+    for partition in MeasurementPartition.query.order_by(MeasurementPartition.period_start):
+        click.echo(f"{partition.name}  {partition.period_start:%Y-%m-%d} - {partition.period_end:%Y-%m-%d}  "
+                   f"{partition.row_count} rows{'  (frozen)' if partition.frozen else ''}")
+
+
+@measurement_partitions_group.command('archive')
+@click.option('--before', type=click.DateTime(), required=True,
+              help='Archive every month that ends before the month containing this date')
+@with_appcontext
+def archive_partitions_command(before):
+    """Move old measurements out of the hot table into monthly partitions."""
+    moved = archive_partitions(before)
+    _reset_recent_readings()
+    for name, count in moved.items():
+        click.echo(f"Moved {count} rows to {name}")
+    click.echo(f"Archived {sum(moved.values())} rows into {len(moved)} partitions")
+
+
+@measurement_partitions_group.command('freeze')
+@click.option('--before', type=click.DateTime(), required=True,
+              help='Freeze every partition that ends on or before this date')
+@with_appcontext
+def freeze_partitions_command(before):
+    """Move old partitions out of the database into columnar segment files."""
+    frozen = freeze_partitions(before)
+    for name, count in frozen.items():
+        click.echo(f"Froze {count} rows of {name}")
+    click.echo(f"Froze {len(frozen)} partitions into {current_app.config['SEGMENT_STORE_DIR']}")
+
+
+@measurement_partitions_group.command('drop')
+@click.option('--before', type=click.DateTime(), required=True,
+              help='Drop every partition that ends on or before this date')
+@click.confirmation_option(prompt='Dropped partitions cannot be recovered. Continue?')
+@with_appcontext
+def drop_partitions_command(before):
+    """Drop measurement partitions that are out of retention."""
+    dropped = drop_partitions(before)
+    _reset_recent_readings()
+    click.echo(f"Dropped {len(dropped)} partitions{': ' + ', '.join(dropped) if dropped else ''}")
+
+
+@click.command('openapi-spec')
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), required=True,
+              help='File to write')
+@with_appcontext
+def openapi_spec_command(output):
+    """Write the API's Swagger spec to a JSON file for static hosting."""
+    size = current_app.extensions['openapi_spec'].write(output)
+    click.echo(f"Wrote {size} bytes to {output}")
+
+
+class LazyMigrateGroup(click.Group):
+    """
+    Stand-in for Flask-Migrate's `flask db` group.
+
+    Flask-Migrate imports Alembic, which is about half of the app's import
+    time, so it is only set up when `flask db` is invoked; parsing and running
+    the command is then handed to Flask-Migrate's own group.
+    """
+
+    def __init__(self, app):
+        super().__init__('db', help='Perform database migrations.')
+        self.app = app
+
+    def _migrate_group(self) -> click.Group:
+        if 'migrate' not in self.app.extensions:
+            from flask_migrate import Migrate
+            Migrate(self.app, db)
+        return self.app.cli.commands['db']
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        return self._migrate_group().make_context(info_name, args, parent=parent, **extra)
+
+
+def register_commands(app) -> None:
+    """Adds the garden commands, and a lazily loaded `flask db`, to the app's `flask` CLI."""
+    app.cli.add_command(LazyMigrateGroup(app))
+    app.cli.add_command(export_measurements_command)
+    app.cli.add_command(import_measurements_command)
+    app.cli.add_command(measurement_partitions_group)
+    app.cli.add_command(openapi_spec_command)
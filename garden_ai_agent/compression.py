@@ -0,0 +1,100 @@
+"""
+Response compression negotiated with `Accept-Encoding`.
+
+Responses with a compressible content type are compressed with brotli (if
+the optional `brotli` package is installed) or gzip, whichever the client
+prefers. Buffered responses are compressed whole if they are at least
+`COMPRESSION_MIN_BYTES`; streamed responses, such as exports, are compressed
+chunk by chunk and flushed after each chunk, so clients still receive them
+incrementally.
+"""
+import zlib
+from importlib.util import find_spec
+from typing import Iterable, Iterator
+
+from flask import request
+
+from .representations import COLUMNAR_JSON, MSGPACK
+
+COMPRESSIBLE_TYPES = {
+    'application/json', COLUMNAR_JSON, MSGPACK, 'text/csv', 'text/plain', 'application/vnd.apache.arrow.stream'
+}
+
+
+class GzipStream:
+    def __init__(self, level: int):
+        # wbits 31 writes a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self, quality: int):
+        import brotli
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _available_encodings() -> list:
+    return ['br', 'gzip'] if find_spec('brotli') else ['gzip']
+
+
+def _compress_chunks(chunks: Iterable[bytes], stream) -> Iterator[bytes]:
+    for chunk in chunks:
+        if chunk:
+            yield stream.compress(chunk)
+    yield stream.finish()
+
+
+def init_compression(app) -> None:
+    """
+    Compresses responses for clients that accept it, if `COMPRESSION_ENABLED` is set.
+
+    Brotli uses `COMPRESSION_BROTLI_QUALITY` and gzip `COMPRESSION_LEVEL`.
+    Responses that already have a `Content-Encoding`, are partial, or are
+    marked `Cache-Control: no-transform` are left alone.
+    """
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+    encodings = _available_encodings()
+    min_bytes = app.config['COMPRESSION_MIN_BYTES']
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers or response.cache_control.no_transform):
+            return response
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+        if not response.is_streamed and (response.calculate_content_length() or 0) < min_bytes:
+            return response
+
+        if encoding == 'br':
+            stream = BrotliStream(app.config['COMPRESSION_BROTLI_QUALITY'])
+        else:
+            stream = GzipStream(app.config['COMPRESSION_LEVEL'])
+        if response.is_streamed:
+            response.response = _compress_chunks(response.iter_encoded(), stream)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(stream.compress(response.get_data()) + stream.finish())
+        response.headers['Content-Encoding'] = encoding
+        # Each encoding is a different representation, so it needs its own ETag
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak)
+        return response
@@ -1,4 +1,15 @@
 # Application configuration
 PORT = 8000
 HOST = 'localhost'
-BASE_URL = f'http://{HOST}:{PORT}' 
\ No newline at end of file
+BASE_URL = f'http://{HOST}:{PORT}'
+
+# Production server (serve.py)
+BIND = f'0.0.0.0:{PORT}'
+WORKERS = 4
+THREADS = 2
+KEEPALIVE_SECONDS = 5
+TIMEOUT_SECONDS = 30
+GRACEFUL_TIMEOUT_SECONDS = 30
+MAX_REQUESTS = 10000
+MAX_REQUESTS_JITTER = 1000
+DEBUG = False
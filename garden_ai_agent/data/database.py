@@ -1,3 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import insert
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+
+def dialect_insert(table, session=None):
+    """
+    Returns an INSERT construct for the dialect of the session's database.
+
+    The SQLite and PostgreSQL constructs support `on_conflict_do_nothing()` and
+    `on_conflict_do_update()`; other databases get a generic INSERT.
+
+    Args:
+        table: Table to insert into
+        session: Session the statement will run on (defaults to `db.session`)
+    """
+    dialect = (session or db.session).get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(table)
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        return postgresql_insert(table)
+    return insert(table)
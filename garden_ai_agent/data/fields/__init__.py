@@ -9,6 +9,7 @@ from .ObservationType import ObservationType
 from .GrowthStage import GrowthStage
 from .MeasurementType import MeasurementType
 from .MeasurementUnit import MeasurementUnit
+from .lookup import EnumLookup, enum_lookup
 
 __all__ = [
     'Day',
@@ -21,5 +22,7 @@ __all__ = [
     'ObservationType',
     'GrowthStage',
     'MeasurementType',
-    'MeasurementUnit'
+    'MeasurementUnit',
+    'EnumLookup',
+    'enum_lookup'
 ]
@@ -0,0 +1,59 @@
+from enum import Enum
+from typing import Dict, Optional, Type
+
+
+class EnumLookup:
+    """
+    Precomputed conversions from user input to the members of an enum.
+
+    Accepts members themselves, member names in any case and member values
+    (e.g. '°C' for `MeasurementUnit.CELSIUS`). The table is built once, so a
+    conversion is one or two dict lookups instead of `value.upper()`, an
+    `Enum[...]` lookup and exception handling.
+    """
+
+    def __init__(self, enum: Type[Enum]):
+        self.enum = enum
+        table = {}
+        for member in enum:
+            table[member] = member
+            table[member.value] = member
+            if isinstance(member.value, str):
+                table.setdefault(member.value.upper(), member)
+        # Names take precedence over values that happen to be spelled the same;
+        # lower-case names are common enough in requests to get their own entry
+        for name, member in enum.__members__.items():
+            table[name.lower()] = member
+            table[name] = member
+        self._table = table
+
+    def get(self, value) -> Optional[Enum]:
+        """Returns the member for `value`, or None if it does not name one."""
+        member = self._table.get(value)
+        if member is None and type(value) is str:
+            member = self._table.get(value.strip().upper())
+        return member
+
+    def __getitem__(self, value) -> Enum:
+        """
+        Raises:
+            KeyError: If `value` does not name a member
+        """
+        member = self.get(value)
+        if member is None:
+            raise KeyError(value)
+        return member
+
+    def __contains__(self, value) -> bool:
+        return self.get(value) is not None
+
+
+_lookups: Dict[Type[Enum], EnumLookup] = {}
+
+
+def enum_lookup(enum: Type[Enum]) -> EnumLookup:
+    """Returns the shared lookup for an enum, building it on first use."""
+    lookup = _lookups.get(enum)
+    if lookup is None:
+        lookup = _lookups[enum] = EnumLookup(enum)
+    return lookup
@@ -2,7 +2,11 @@ from typing import Optional, Tuple
 from sqlalchemy.orm import validates
 
 from ..database import db
-from ..fields import SunExposure, WindExposure, Drainage
+from ..fields import SunExposure, WindExposure, Drainage, enum_lookup
+
+_sun_exposures = enum_lookup(SunExposure)
+_wind_exposures = enum_lookup(WindExposure)
+_drainages = enum_lookup(Drainage)
 
 class GardenLocation(db.Model):
     """
@@ -23,6 +27,7 @@ class GardenLocation(db.Model):
     longitude = db.Column(db.Float, nullable=False)
     latitude = db.Column(db.Float, nullable=False)
     elevation = db.Column(db.Float, nullable=True)  # in feet above sea level
+    hardiness_zone = db.Column(db.Integer, nullable=True)  # USDA plant hardiness zone
     _sun_exposure = db.Column("sun_exposure", db.Enum(SunExposure), nullable=False)
     _wind_exposure = db.Column("wind_exposure", db.Enum(WindExposure), nullable=False)
     _drainage = db.Column("drainage", db.Enum(Drainage), nullable=False)
@@ -121,9 +126,33 @@ class GardenLocation(db.Model):
             raise ValueError("Elevation cannot be below sea level")
         return float(value)
 
+    @validates('hardiness_zone')
+    def validate_hardiness_zone(self, key, value: Optional[int]) -> Optional[int]:
+        """
+        Validates the hardiness zone if provided.
+        
+        Args:
+            key: Field name (unused)
+            value: Hardiness zone to validate
+            
+        Returns:
+            Optional[int]: Validated hardiness zone or None
+            
+        Raises:
+            TypeError: If hardiness zone is provided but not an integer
+            ValueError: If hardiness zone is outside 1-13
+        """
+        if value is None:
+            return None
+        if not isinstance(value, int):
+            raise TypeError("Hardiness zone must be an integer")
+        if not 1 <= value <= 13:
+            raise ValueError("Hardiness zone must be between 1 and 13")
+        return value
+
     @property
     def sun_exposure(self) -> SunExposure:
-        return SunExposure(self._sun_exposure)
+        return self._sun_exposure
 
     @sun_exposure.setter
     def sun_exposure(self, value: SunExposure | str) -> None:
@@ -137,16 +166,14 @@ class GardenLocation(db.Model):
             ValueError: If string value doesn't match any SunExposure enum
             TypeError: If value is neither string nor SunExposure enum
         """
-        if isinstance(value, str):
-            try:
-                value = SunExposure[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid sun exposure value: {value}")
-        self._sun_exposure = value
+        member = _sun_exposures.get(value)
+        if member is None:
+            raise ValueError(f"Invalid sun exposure value: {value}")
+        self._sun_exposure = member
 
     @property
     def wind_exposure(self) -> WindExposure:
-        return WindExposure(self._wind_exposure)
+        return self._wind_exposure
 
     @wind_exposure.setter
     def wind_exposure(self, value: WindExposure | str) -> None:
@@ -160,16 +187,14 @@ class GardenLocation(db.Model):
             ValueError: If string value doesn't match any WindExposure enum
             TypeError: If value is neither string nor WindExposure enum
         """
-        if isinstance(value, str):
-            try:
-                value = WindExposure[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid wind exposure value: {value}")
-        self._wind_exposure = value
+        member = _wind_exposures.get(value)
+        if member is None:
+            raise ValueError(f"Invalid wind exposure value: {value}")
+        self._wind_exposure = member
 
     @property
     def drainage(self) -> Drainage:
-        return Drainage(self._drainage)
+        return self._drainage
 
     @drainage.setter
     def drainage(self, value: Drainage | str) -> None:
@@ -183,12 +208,10 @@ class GardenLocation(db.Model):
             ValueError: If string value doesn't match any Drainage enum
             TypeError: If value is neither string nor Drainage enum
         """
-        if isinstance(value, str):
-            try:
-                value = Drainage[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid drainage value: {value}")
-        self._drainage = value
+        member = _drainages.get(value)
+        if member is None:
+            raise ValueError(f"Invalid drainage value: {value}")
+        self._drainage = member
 
     def __repr__(self) -> str:
         return (f"<GardenLocation(name={self.name}, "
@@ -211,6 +234,7 @@ class GardenLocation(db.Model):
             'longitude': self.longitude,
             'latitude': self.latitude,
             'elevation': self.elevation,
+            'hardiness_zone': self.hardiness_zone,
             'sun_exposure': self.sun_exposure.name,
             'wind_exposure': self.wind_exposure.name,
             'drainage': self.drainage.name,
@@ -3,7 +3,19 @@ from typing import List, Set
 from datetime import time
 
 from ..database import db
-from ..fields import Day
+from ..fields import Day, enum_lookup
+
+_days = enum_lookup(Day)
+
+_DAY_SHORT_NAMES = {
+    'SUN': Day.SUNDAY, 'S': Day.SUNDAY, '0': Day.SUNDAY,
+    'MON': Day.MONDAY, 'M': Day.MONDAY, '1': Day.MONDAY,
+    'TUE': Day.TUESDAY, 'T': Day.TUESDAY, '2': Day.TUESDAY,
+    'WED': Day.WEDNESDAY, 'W': Day.WEDNESDAY, '3': Day.WEDNESDAY,
+    'THU': Day.THURSDAY, 'TH': Day.THURSDAY, '4': Day.THURSDAY,
+    'FRI': Day.FRIDAY, 'F': Day.FRIDAY, '5': Day.FRIDAY,
+    'SAT': Day.SATURDAY, 'SA': Day.SATURDAY, '6': Day.SATURDAY,
+}
 
 class IrrigationZone(db.Model):
     """
@@ -93,29 +105,13 @@ class IrrigationZone(db.Model):
         days_set = set()
         
         def parse_day(day) -> Day:
-            if isinstance(day, Day):
-                return day
-            if isinstance(day, int) and 0 <= day <= 6:
-                return Day(day)
-            if isinstance(day, str):
-                day = day.strip().upper()
-                # Handle full names
-                try:
-                    return Day[day]
-                except KeyError:
-                    # Handle short names
-                    short_names = {
-                        'SUN': Day.SUNDAY, 'S': Day.SUNDAY, '0': Day.SUNDAY,
-                        'MON': Day.MONDAY, 'M': Day.MONDAY, '1': Day.MONDAY,
-                        'TUE': Day.TUESDAY, 'T': Day.TUESDAY, '2': Day.TUESDAY,
-                        'WED': Day.WEDNESDAY, 'W': Day.WEDNESDAY, '3': Day.WEDNESDAY,
-                        'THU': Day.THURSDAY, 'TH': Day.THURSDAY, '4': Day.THURSDAY,
-                        'FRI': Day.FRIDAY, 'F': Day.FRIDAY, '5': Day.FRIDAY,
-                        'SAT': Day.SATURDAY, 'SA': Day.SATURDAY, '6': Day.SATURDAY,
-                    }
-                    if day in short_names:
-                        return short_names[day]
+            # Members, values 0-6 and full names in any case
+            member = _days.get(day)
+            if member is None and isinstance(day, str):
+                member = _DAY_SHORT_NAMES.get(day.strip().upper())
+            if member is None:
                 raise ValueError(f"Invalid day format: {day}")
+            return member
 
         for day in days:
             try:
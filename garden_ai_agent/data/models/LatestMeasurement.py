@@ -0,0 +1,139 @@
+from sqlalchemy import func
+
+from ..database import db
+from ..fields import MeasurementType, MeasurementUnit
+from .Measurement import Measurement
+
+class LatestMeasurement(db.Model):
+    """
+    Most recent measurement for each garden location and measurement type.
+
+    This is a denormalized cache of the `measurements` table keyed by
+    (garden_location_id, measurement_type). It is kept up to date by the
+    measurement API on every insert, update and delete so that "current value"
+    queries read one row per location instead of scanning all measurements.
+    """
+    __tablename__ = 'latest_measurements'
+
+    garden_location_id = db.Column(
+        db.Integer,
+        db.ForeignKey('garden_locations.id', name='fk_latest_measurements_garden_location'),
+        primary_key=True
+    )
+    measurement_type = db.Column(db.Enum(MeasurementType), primary_key=True)
+    measurement_id = db.Column(
+        db.Integer,
+        db.ForeignKey('measurements.id', name='fk_latest_measurements_measurement', ondelete='CASCADE'),
+        nullable=False
+    )
+    unit = db.Column(db.Enum(MeasurementUnit), nullable=False)
+    value = db.Column(db.Float, nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def record(cls, measurement: Measurement, session=None) -> None:
+        """
+        Records a newly inserted measurement if it is newer than the cached one.
+
+        The measurement must already have been flushed so that it has an ID.
+
+        Args:
+            measurement: Measurement that was just added to the session
+            session: Session to record in (defaults to `db.session`)
+        """
+        if measurement.flagged:
+            return
+        session = session or db.session
+        key = (measurement.garden_location_id, measurement.measurement_type)
+        latest = session.get(cls, key)
+        if latest is None:
+            latest = cls(garden_location_id=key[0], measurement_type=key[1])
+            session.add(latest)
+        elif latest.timestamp > measurement.timestamp:
+            return
+        latest._copy_from(measurement)
+
+    @classmethod
+    def refresh(cls, garden_location_id: int, measurement_type: MeasurementType) -> None:
+        """
+        Recomputes the cached row for a single key from the measurements table.
+
+        Used after updates and deletes, where the cached row may no longer be
+        the most recent measurement.
+
+        Args:
+            garden_location_id: ID of the garden location
+            measurement_type: Type of measurement to recompute
+        """
+        newest = (Measurement.query
+                  .filter(Measurement.garden_location_id == garden_location_id,
+                          Measurement._measurement_type == measurement_type,
+                          Measurement.flagged.is_(False))
+                  .order_by(Measurement.timestamp.desc(), Measurement.id.desc())
+                  .first())
+        latest = db.session.get(cls, (garden_location_id, measurement_type))
+        if newest is None:
+            if latest is not None:
+                db.session.delete(latest)
+            return
+        if latest is None:
+            latest = cls(garden_location_id=garden_location_id, measurement_type=measurement_type)
+            db.session.add(latest)
+        latest._copy_from(newest)
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        Rebuilds the whole cache from the measurements table.
+
+        Returns:
+            int: Number of cached rows written
+        """
+        newest = (db.session.query(
+                      Measurement.garden_location_id,
+                      Measurement._measurement_type.label('measurement_type'),
+                      func.max(Measurement.timestamp).label('timestamp'))
+                  .filter(Measurement.flagged.is_(False))
+                  .group_by(Measurement.garden_location_id, Measurement._measurement_type)
+                  .subquery())
+        rows = (Measurement.query
+                .join(newest, (Measurement.garden_location_id == newest.c.garden_location_id)
+                      & (Measurement._measurement_type == newest.c.measurement_type)
+                      & (Measurement.timestamp == newest.c.timestamp))
+                .filter(Measurement.flagged.is_(False))
+                .order_by(Measurement.id)
+                .all())
+
+        cls.query.delete()
+        latest_by_key = {}
+        for measurement in rows:
+            key = (measurement.garden_location_id, measurement.measurement_type)
+            latest = latest_by_key.get(key)
+            if latest is None:
+                latest = cls(garden_location_id=key[0], measurement_type=key[1])
+                latest_by_key[key] = latest
+            latest._copy_from(measurement)
+        db.session.add_all(latest_by_key.values())
+        return len(latest_by_key)
+
+    def _copy_from(self, measurement: Measurement) -> None:
+        self.measurement_id = measurement.id
+        self.unit = measurement.unit
+        self.value = measurement.value
+        self.timestamp = measurement.timestamp
+
+    def __repr__(self) -> str:
+        return (f"<LatestMeasurement(location_id={self.garden_location_id}, "
+                f"type={self.measurement_type.name}, value={self.value}, "
+                f"timestamp={self.timestamp})>")
+
+    def json(self):
+        """Returns a dictionary representation suitable for JSON serialization."""
+        return {
+            'garden_location_id': self.garden_location_id,
+            'measurement_type': self.measurement_type.name,
+            'measurement_id': self.measurement_id,
+            'unit': self.unit.name,
+            'value': self.value,
+            'timestamp': self.timestamp.isoformat()
+        }
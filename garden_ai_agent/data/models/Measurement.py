@@ -3,7 +3,10 @@ from typing import Optional
 from sqlalchemy.orm import validates
 
 from ..database import db
-from ..fields import MeasurementType, MeasurementUnit
+from ..fields import MeasurementType, MeasurementUnit, enum_lookup
+
+_measurement_types = enum_lookup(MeasurementType)
+_measurement_units = enum_lookup(MeasurementUnit)
 
 class Measurement(db.Model):
     """
@@ -14,6 +17,12 @@ class Measurement(db.Model):
     and data source.
     """
     __tablename__ = 'measurements'
+    __table_args__ = (
+        # A source reports each reading once; retried submissions are duplicates.
+        # Leading with location and type also serves time-range scans per stream.
+        db.UniqueConstraint('garden_location_id', 'measurement_type', 'timestamp', 'source',
+                            name='uq_measurements_reading'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     garden_location_id = db.Column(
@@ -28,6 +37,7 @@ class Measurement(db.Model):
     period_minutes = db.Column(db.Integer, nullable=True)  # For measurements over time (e.g., rainfall over 24h)
     source = db.Column(db.String(50), nullable=True)  # e.g., 'SENSOR', 'MANUAL', 'WEATHER_API'
     notes = db.Column(db.Text, nullable=True)
+    flagged = db.Column(db.Boolean, nullable=False, default=False, index=True)  # Set by anomaly detection
     
     # Relationship to garden location
     garden_location = db.relationship(
@@ -91,31 +101,27 @@ class Measurement(db.Model):
 
     @property
     def measurement_type(self) -> MeasurementType:
-        return MeasurementType(self._measurement_type)
+        return self._measurement_type
 
     @measurement_type.setter
     def measurement_type(self, value: MeasurementType | str) -> None:
         """Sets the measurement type, converting strings to enum if needed."""
-        if isinstance(value, str):
-            try:
-                value = MeasurementType[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid measurement type: {value}")
-        self._measurement_type = value
+        member = _measurement_types.get(value)
+        if member is None:
+            raise ValueError(f"Invalid measurement type: {value}")
+        self._measurement_type = member
 
     @property
     def unit(self) -> MeasurementUnit:
-        return MeasurementUnit(self._unit)
+        return self._unit
 
     @unit.setter
     def unit(self, value: MeasurementUnit | str) -> None:
         """Sets the measurement unit, converting strings to enum if needed."""
-        if isinstance(value, str):
-            try:
-                value = MeasurementUnit[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid measurement unit: {value}")
-        self._unit = value
+        member = _measurement_units.get(value)
+        if member is None:
+            raise ValueError(f"Invalid measurement unit: {value}")
+        self._unit = member
 
     def __repr__(self) -> str:
         return (f"<Measurement(type={self.measurement_type.name}, "
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from ..database import db
+
+class MeasurementPartition(db.Model):
+    """
+    Registry of monthly measurement partitions.
+
+    Measurements older than the current month can be moved out of the
+    `measurements` table into one table per month (see `data/partitions.py`).
+    Each partition covers [period_start, period_end) and is dropped as a whole
+    when it falls out of retention. A frozen partition's table has been
+    replaced by blocks in the segment files (see `data/segments.py`).
+    """
+    __tablename__ = 'measurement_partitions'
+
+    name = db.Column(db.String(64), primary_key=True)
+    period_start = db.Column(db.DateTime, nullable=False, unique=True)
+    period_end = db.Column(db.DateTime, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    frozen = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<MeasurementPartition(name={self.name}, rows={self.row_count})>"
+
+    def json(self):
+        """Returns a dictionary representation suitable for JSON serialization."""
+        return {
+            'name': self.name,
+            'period_start': self.period_start.isoformat(),
+            'period_end': self.period_end.isoformat(),
+            'row_count': self.row_count,
+            'frozen': self.frozen,
+            'created_at': self.created_at.isoformat()
+        }
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from ..database import db
+
+class MeasurementSource(db.Model):
+    """
+    Registry of the sensors, gateways and services that submit measurements.
+
+    A source is registered the first time a measurement arrives with its name
+    (matching the uppercased `Measurement.source`), and its last-seen time is
+    refreshed on every ingest.
+    """
+    __tablename__ = 'measurement_sources'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)
+    first_seen_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<MeasurementSource(name={self.name}, last_seen_at={self.last_seen_at})>"
+
+    def json(self):
+        """Returns a dictionary representation suitable for JSON serialization."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'first_seen_at': self.first_seen_at.isoformat(),
+            'last_seen_at': self.last_seen_at.isoformat()
+        }
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from ..database import db
+from ..fields import MeasurementType, MeasurementUnit
+
+class MeasurementStatistics(db.Model):
+    """
+    Persisted running statistics for one stream of measurements.
+
+    A stream is the sequence of readings for a garden location, measurement type
+    and unit. The anomaly detector keeps these statistics in memory and writes
+    them here periodically so they survive restarts.
+    """
+    __tablename__ = 'measurement_statistics'
+
+    garden_location_id = db.Column(
+        db.Integer,
+        db.ForeignKey('garden_locations.id', name='fk_measurement_statistics_garden_location'),
+        primary_key=True
+    )
+    measurement_type = db.Column(db.Enum(MeasurementType), primary_key=True)
+    unit = db.Column(db.Enum(MeasurementUnit), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)  # Readings accepted into the statistics
+    mean = db.Column(db.Float, nullable=False, default=0.0)
+    variance = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return (f"<MeasurementStatistics(location_id={self.garden_location_id}, "
+                f"type={self.measurement_type.name}, unit={self.unit.name}, "
+                f"count={self.count}, mean={self.mean}, variance={self.variance})>")
@@ -1,5 +1,11 @@
+from typing import Optional
+from sqlalchemy.orm import validates
+
 from ..database import db
-from ..fields import ObservationType, GrowthStage
+from ..fields import ObservationType, GrowthStage, enum_lookup
+
+_observation_types = enum_lookup(ObservationType)
+_growth_stages = enum_lookup(GrowthStage)
 
 class Observation(db.Model):
     """
@@ -28,6 +34,24 @@ class Observation(db.Model):
     image_data = db.Column(db.BLOB, nullable=True)  # Base64 encoded image data
     recorded_by = db.Column(db.String(100), nullable=True)  # User who made the observation
 
+    @validates('observation_type')
+    def validate_observation_type(self, key, value: ObservationType | str) -> ObservationType:
+        """Converts strings to ObservationType, by name in any case."""
+        member = _observation_types.get(value)
+        if member is None:
+            raise ValueError(f"Invalid observation type: {value}")
+        return member
+
+    @validates('stage_value')
+    def validate_stage_value(self, key, value: GrowthStage | str | None) -> Optional[GrowthStage]:
+        """Converts strings to GrowthStage, by name in any case; empty values clear the stage."""
+        if value is None or value == '':
+            return None
+        member = _growth_stages.get(value)
+        if member is None:
+            raise ValueError(f"Invalid growth stage: {value}")
+        return member
+
     def __repr__(self):
         return f"<Observation(plant_id={self.plant_id}, type={self.observation_type}, timestamp={self.timestamp})>"
 
@@ -2,7 +2,11 @@ from typing import Optional
 from sqlalchemy.orm import validates
 
 from ..database import db
-from ..fields import GrowthForm, LifeCycle, UseCategory
+from ..fields import GrowthForm, LifeCycle, UseCategory, enum_lookup
+
+_growth_forms = enum_lookup(GrowthForm)
+_life_cycles = enum_lookup(LifeCycle)
+_use_categories = enum_lookup(UseCategory)
 
 class Plant(db.Model):
     """
@@ -88,7 +92,7 @@ class Plant(db.Model):
 
     @property
     def growth_form(self) -> GrowthForm:
-        return GrowthForm(self._growth_form)
+        return self._growth_form
 
     @growth_form.setter
     def growth_form(self, value: GrowthForm | str) -> None:
@@ -102,16 +106,14 @@ class Plant(db.Model):
             ValueError: If string value doesn't match any GrowthForm enum
             TypeError: If value is neither string nor GrowthForm enum
         """
-        if isinstance(value, str):
-            try:
-                value = GrowthForm[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid growth form value: {value}")
-        self._growth_form = value
+        member = _growth_forms.get(value)
+        if member is None:
+            raise ValueError(f"Invalid growth form value: {value}")
+        self._growth_form = member
 
     @property
     def life_cycle(self) -> LifeCycle:
-        return LifeCycle(self._life_cycle)
+        return self._life_cycle
 
     @life_cycle.setter
     def life_cycle(self, value: LifeCycle | str) -> None:
@@ -125,16 +127,14 @@ class Plant(db.Model):
             ValueError: If string value doesn't match any LifeCycle enum
             TypeError: If value is neither string nor LifeCycle enum
         """
-        if isinstance(value, str):
-            try:
-                value = LifeCycle[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid life cycle value: {value}")
-        self._life_cycle = value
+        member = _life_cycles.get(value)
+        if member is None:
+            raise ValueError(f"Invalid life cycle value: {value}")
+        self._life_cycle = member
 
     @property
     def primary_use(self) -> UseCategory:
-        return UseCategory(self._primary_use)
+        return self._primary_use
 
     @primary_use.setter
     def primary_use(self, value: UseCategory | str) -> None:
@@ -148,16 +148,14 @@ class Plant(db.Model):
             ValueError: If string value doesn't match any UseCategory enum
             TypeError: If value is neither string nor UseCategory enum
         """
-        if isinstance(value, str):
-            try:
-                value = UseCategory[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid primary use value: {value}")
-        self._primary_use = value
+        member = _use_categories.get(value)
+        if member is None:
+            raise ValueError(f"Invalid primary use value: {value}")
+        self._primary_use = member
 
     @property
     def secondary_use(self) -> Optional[UseCategory]:
-        return UseCategory(self._secondary_use) if self._secondary_use else None
+        return self._secondary_use
 
     @secondary_use.setter
     def secondary_use(self, value: Optional[UseCategory | str]) -> None:
@@ -173,13 +171,11 @@ class Plant(db.Model):
         """
         if value is None:
             self._secondary_use = None
-        elif isinstance(value, str):
-            try:
-                self._secondary_use = UseCategory[value.upper()]
-            except KeyError:
-                raise ValueError(f"Invalid secondary use value: {value}")
-        else:
-            self._secondary_use = value
+            return
+        member = _use_categories.get(value)
+        if member is None:
+            raise ValueError(f"Invalid secondary use value: {value}")
+        self._secondary_use = member
 
     @validates('hardiness_zone_min', 'hardiness_zone_max')
     def validate_hardiness_zone(self, key, value: Optional[int]) -> Optional[int]:
@@ -3,11 +3,19 @@ from .IrrigationZone import IrrigationZone
 from .Plant import Plant
 from .Observation import Observation
 from .Measurement import Measurement
+from .LatestMeasurement import LatestMeasurement
+from .MeasurementStatistics import MeasurementStatistics
+from .MeasurementSource import MeasurementSource
+from .MeasurementPartition import MeasurementPartition
 
 __all__ = [
     'GardenLocation',
     'IrrigationZone',
     'Plant',
     'Observation',
-    'Measurement'
+    'Measurement',
+    'LatestMeasurement',
+    'MeasurementStatistics',
+    'MeasurementSource',
+    'MeasurementPartition'
 ]
@@ -0,0 +1,311 @@
+"""
+Monthly time partitions for measurements.
+
+New readings are written to the `measurements` table (the hot partition).
+`archive_partitions` moves whole months out of it into one table per month,
+`measurements_YYYY_MM`, registered in `measurement_partitions`; readings still
+referenced by the latest-value cache stay in the hot table. Reads go through
+`measurement_selects`, which only touches the partitions whose month overlaps
+the requested time range, and `drop_partitions` removes old months with a
+single DROP TABLE each instead of deleting rows.
+
+`freeze_partitions` moves months that are rarely read out of SQLite into the
+columnar segment files of `data/segments.py`. `measurement_rows` and
+`measurement_summary` read every tier: frozen months, partitions and the hot
+table.
+
+Archived readings keep their IDs but are read-only: the single-measurement
+endpoints only see the hot table. Duplicate detection at ingest also looks in
+the partitions, but not in frozen months, so a reading of a frozen month that
+is sent again is stored again in the hot table.
+"""
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import Column, Index, MetaData, Table, UniqueConstraint, delete, func, select
+
+from .database import db, dialect_insert
+from .models import LatestMeasurement, Measurement, MeasurementPartition
+from .segments import SEGMENT_COLUMNS, segment_store, to_micros
+
+# Partition tables are created on demand, never by `db.create_all()`
+partition_metadata = MetaData()
+
+_tables: Dict[str, Table] = {}
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def next_month(moment: datetime) -> datetime:
+    return datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
+
+
+def partition_name(period_start: datetime) -> str:
+    return f'measurements_{period_start.year:04d}_{period_start.month:02d}'
+
+
+def partition_table(name: str) -> Table:
+    """Returns the table for a partition, with the same columns as `measurements`."""
+    table = _tables.get(name)
+    if table is None:
+        columns = [Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable)
+                   for c in Measurement.__table__.columns]
+        table = Table(
+            name, partition_metadata, *columns,
+            UniqueConstraint('garden_location_id', 'measurement_type', 'timestamp', 'source',
+                             name=f'uq_{name}_reading'),
+            Index(f'ix_{name}_timestamp', 'timestamp')
+        )
+        _tables[name] = table
+    return table
+
+
+def filter_table(statement, table: Table, garden_location_id: Optional[int] = None, measurement_type=None,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 flagged: Optional[bool] = None):
+    """
+    Applies the measurement list filters to a statement over a measurements table.
+
+    Args:
+        statement: Select, query or delete over `table`
+        table: The `measurements` table or a partition table
+        garden_location_id: Only measurements for this garden location
+        measurement_type: Only measurements of this type
+        start: Only measurements taken at or after this time
+        end: Only measurements taken before this time
+        flagged: Only measurements that were (True) or were not (False) flagged
+
+    Returns:
+        The filtered statement
+    """
+    if garden_location_id is not None:
+        statement = statement.filter(table.c.garden_location_id == garden_location_id)
+    if measurement_type is not None:
+        statement = statement.filter(table.c.measurement_type == measurement_type)
+    if start is not None:
+        statement = statement.filter(table.c.timestamp >= start)
+    if end is not None:
+        statement = statement.filter(table.c.timestamp < end)
+    if flagged is not None:
+        statement = statement.filter(table.c.flagged.is_(flagged))
+    return statement
+
+
+def measurement_selects(columns: List[str], **filters) -> list:
+    """
+    Routes a filtered measurement read to the partitions it can match.
+
+    Args:
+        columns: Names of the columns to select
+        **filters: Keyword arguments for `filter_table`
+
+    Returns:
+        list: One select per partition overlapping the filters' time range, in
+        chronological order and each ordered by ID, followed by the hot table;
+        frozen partitions are read with `frozen_rows`
+    """
+    partitions = _overlapping_partitions(filters, frozen=False)
+    tables = [partition_table(partition.name) for partition in partitions] + [Measurement.__table__]
+    return [filter_table(select(*[table.c[name] for name in columns]), table, **filters).order_by(table.c.id)
+            for table in tables]
+
+
+def frozen_rows(columns: List[str], **filters) -> Iterator[tuple]:
+    """
+    Reads filtered measurements from the segment files of frozen partitions.
+
+    Args:
+        columns: Names of the columns to select
+        **filters: Keyword arguments for `filter_table`
+
+    Returns:
+        Iterator[tuple]: Named tuples of `columns`, month by month, and in
+        timestamp order within each garden location and type
+    """
+    tags = [to_micros(partition.period_start) for partition in _overlapping_partitions(filters, frozen=True)]
+    if not tags:
+        return iter(())
+    return segment_store().rows(columns, tags, **filters)
+
+
+def measurement_rows(columns: List[str], **filters) -> Iterator[tuple]:
+    """
+    Reads filtered measurements from frozen partitions, partitions and the hot table, oldest tier first.
+
+    Args:
+        columns: Names of the columns to select
+        **filters: Keyword arguments for `filter_table`
+
+    Returns:
+        Iterator[tuple]: Rows of `columns`
+    """
+    yield from frozen_rows(columns, **filters)
+    for statement in measurement_selects(columns, **filters):
+        yield from db.session.execute(statement)
+
+
+def measurement_summary(**filters) -> List[dict]:
+    """
+    Aggregates filtered measurements across every tier.
+
+    Frozen months are aggregated from the segment files' columns, the rest
+    with one GROUP BY query per table.
+
+    Args:
+        **filters: Keyword arguments for `filter_table`
+
+    Returns:
+        List[dict]: Count, min, max and mean value per garden location,
+        measurement type and unit
+    """
+    totals = {}
+    frozen = _overlapping_partitions(filters, frozen=True)
+    if frozen:
+        totals = segment_store().aggregate([to_micros(partition.period_start) for partition in frozen], **filters)
+    tables = [partition_table(partition.name) for partition in _overlapping_partitions(filters, frozen=False)]
+    for table in tables + [Measurement.__table__]:
+        key_columns = (table.c.garden_location_id, table.c.measurement_type, table.c.unit)
+        statement = filter_table(
+            select(*key_columns, func.count(), func.min(table.c.value), func.max(table.c.value),
+                   func.sum(table.c.value)),
+            table, **filters
+        ).group_by(*key_columns)
+        for location_id, measurement_type, unit, count, low, high, total in db.session.execute(statement):
+            current = totals.get((location_id, measurement_type, unit))
+            if current is None:
+                totals[(location_id, measurement_type, unit)] = [count, low, high, total]
+            else:
+                totals[(location_id, measurement_type, unit)] = [
+                    current[0] + count, min(current[1], low), max(current[2], high), current[3] + total
+                ]
+    return [{
+        'garden_location_id': location_id,
+        'measurement_type': measurement_type,
+        'unit': unit,
+        'count': count,
+        'min': low,
+        'max': high,
+        'mean': total / count
+    } for (location_id, measurement_type, unit), (count, low, high, total) in sorted(
+        totals.items(), key=lambda item: (item[0][0], item[0][1].value, item[0][2].name))]
+
+
+def _overlapping_partitions(filters: dict, frozen: bool) -> List[MeasurementPartition]:
+    partitions = MeasurementPartition.query.filter(MeasurementPartition.frozen.is_(frozen)) \
+        .order_by(MeasurementPartition.period_start)
+    if filters.get('start') is not None:
+        partitions = partitions.filter(MeasurementPartition.period_end > filters['start'])
+    if filters.get('end') is not None:
+        partitions = partitions.filter(MeasurementPartition.period_start < filters['end'])
+    return partitions.all()
+
+
+def archive_partitions(before: datetime) -> Dict[str, int]:
+    """
+    Moves measurements taken before the start of `before`'s month into monthly partitions.
+
+    Each month is copied and deleted in its own transaction; readings already
+    in the partition are not copied again. Readings that are
+    the cached latest value of their stream stay in the hot table, and so do
+    readings of frozen months, whose segment files are written only once;
+    reads still find them in the hot table.
+
+    Returns:
+        Dict[str, int]: Rows moved per partition
+    """
+    hot = Measurement.__table__
+    cutoff = month_start(before)
+    oldest = db.session.scalar(select(func.min(hot.c.timestamp)).where(hot.c.timestamp < cutoff))
+    moved = {}
+    period_start = month_start(oldest) if oldest is not None else cutoff
+    while period_start < cutoff:
+        period_end = next_month(period_start)
+        name = partition_name(period_start)
+        partition = db.session.get(MeasurementPartition, name)
+        if partition is not None and partition.frozen:
+            period_start = period_end
+            continue
+        table = partition_table(name)
+        table.create(db.session.connection(), checkfirst=True)
+
+        in_period = (hot.c.timestamp >= period_start) & (hot.c.timestamp < period_end) & \
+            hot.c.id.not_in(select(LatestMeasurement.measurement_id))
+        # A reading can already be in the partition if it was sent again after
+        # an earlier archive; the partition keeps its copy and the hot one goes
+        statement = dialect_insert(table).from_select([c.name for c in hot.columns],
+                                                      select(*hot.columns).where(in_period))
+        if hasattr(statement, 'on_conflict_do_nothing'):
+            statement = statement.on_conflict_do_nothing()
+        copied = db.session.execute(statement).rowcount
+        db.session.execute(delete(hot).where(in_period))
+
+        if partition is None:
+            partition = MeasurementPartition(name=name, period_start=period_start, period_end=period_end)
+            db.session.add(partition)
+        partition.row_count = db.session.scalar(select(func.count()).select_from(table))
+        db.session.commit()
+        if copied:
+            moved[name] = copied
+        period_start = period_end
+    return moved
+
+
+def freeze_partitions(before: datetime) -> Dict[str, int]:
+    """
+    Moves every partition that ends on or before `before` into the segment files.
+
+    Each partition's readings are written as one segment file per garden
+    location and type, then its table is dropped and it is marked frozen, in its
+    own transaction. Files already written for the month are kept, so a freeze
+    interrupted before its commit can be re-run without duplicating readings.
+
+    Returns:
+        Dict[str, int]: Rows moved per partition
+    """
+    store = segment_store()
+    frozen = {}
+    partitions = MeasurementPartition.query \
+        .filter(MeasurementPartition.period_end <= before, MeasurementPartition.frozen.is_(False)) \
+        .order_by(MeasurementPartition.period_start).all()
+    for partition in partitions:
+        table = partition_table(partition.name)
+        statement = select(*[table.c[name] for name in SEGMENT_COLUMNS]).order_by(
+            table.c.garden_location_id, table.c.measurement_type, table.c.timestamp, table.c.id)
+        tag = to_micros(partition.period_start)
+        count = 0
+        for key, rows in groupby(db.session.execute(statement),
+                                 key=lambda row: (row.garden_location_id, row.measurement_type)):
+            rows = list(rows)
+            store.write(key, tag, rows)
+            count += len(rows)
+        table.drop(db.session.connection(), checkfirst=True)
+        partition.frozen = True
+        partition.row_count = count
+        db.session.commit()
+        frozen[partition.name] = count
+    return frozen
+
+
+def drop_partitions(before: datetime) -> List[str]:
+    """
+    Drops every partition that ends on or before `before`, frozen or not.
+
+    Returns:
+        List[str]: Names of the dropped partitions
+    """
+    dropped = []
+    frozen_tags = []
+    for partition in MeasurementPartition.query.filter(MeasurementPartition.period_end <= before):
+        if partition.frozen:
+            frozen_tags.append(to_micros(partition.period_start))
+        else:
+            partition_table(partition.name).drop(db.session.connection(), checkfirst=True)
+        db.session.delete(partition)
+        dropped.append(partition.name)
+    if frozen_tags:
+        segment_store().drop(frozen_tags)
+    db.session.commit()
+    return dropped
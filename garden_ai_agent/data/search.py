@@ -0,0 +1,131 @@
+import re
+from typing import List, Optional
+
+from sqlalchemy import DDL, event, or_, and_, func, literal_column, table, column, text
+
+from .database import db
+from .models import Plant
+from .fields import GrowthForm, LifeCycle, UseCategory
+
+# Columns indexed for full-text search and their bm25 weights (higher ranks better)
+PLANT_SEARCH_COLUMNS = {
+    'name': 10.0,
+    'scientific_name': 8.0,
+    'variety': 6.0,
+    'description': 2.0,
+    'care_instructions': 1.0,
+    'notes': 1.0
+}
+
+_columns = ', '.join(PLANT_SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{name}' for name in PLANT_SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{name}' for name in PLANT_SEARCH_COLUMNS)
+
+# External-content FTS5 table over `plants`, kept in sync by triggers
+PLANT_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS plants_fts USING fts5({_columns}, "
+    f"content='plants', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS plants_fts_ai AFTER INSERT ON plants BEGIN "
+    f"INSERT INTO plants_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS plants_fts_ad AFTER DELETE ON plants BEGIN "
+    f"INSERT INTO plants_fts(plants_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS plants_fts_au AFTER UPDATE ON plants BEGIN "
+    f"INSERT INTO plants_fts(plants_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO plants_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+]
+
+MAX_SEARCH_RESULTS = 500
+
+_plants_fts = table('plants_fts', column('rowid'))
+_token_pattern = re.compile(r'\w+', re.UNICODE)
+
+
+def _sqlite_has_fts5(ddl, target, bind, **kw) -> bool:
+    if bind.dialect.name != 'sqlite':
+        return False
+    options = {row[0] for row in bind.exec_driver_sql('PRAGMA compile_options')}
+    return 'ENABLE_FTS5' in options
+
+
+for _statement in PLANT_FTS_DDL:
+    event.listen(Plant.__table__, 'after_create', DDL(_statement).execute_if(callable_=_sqlite_has_fts5))
+event.listen(Plant.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS plants_fts').execute_if(dialect='sqlite'))
+
+
+def _has_fts_index() -> bool:
+    """Checks (and caches per connection) whether the plants_fts table exists."""
+    connection = db.session.connection()
+    if connection.info.get('plants_fts'):
+        return True
+    if connection.dialect.name != 'sqlite':
+        return False
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'plants_fts'")
+    ).first() is not None
+    if exists:
+        connection.info['plants_fts'] = True
+    return exists
+
+
+def search_plants(
+    q: str,
+    growth_form: Optional[GrowthForm] = None,
+    life_cycle: Optional[LifeCycle] = None,
+    primary_use: Optional[UseCategory] = None,
+    hardiness_zone: Optional[int] = None,
+    limit: int = 50
+) -> List[Plant]:
+    """
+    Searches plants by name and care text, most relevant first.
+
+    Uses the SQLite FTS5 index ranked with bm25 when it is available, and falls
+    back to case-insensitive substring matching ordered by name otherwise.
+    Every word in the query must match (prefix matches are allowed).
+
+    Args:
+        q: Free-text query
+        growth_form: Only return plants with this growth form
+        life_cycle: Only return plants with this life cycle
+        primary_use: Only return plants with this primary use
+        hardiness_zone: Only return plants whose hardiness range includes this zone
+        limit: Maximum number of plants to return
+
+    Returns:
+        List[Plant]: Matching plants
+
+    Raises:
+        ValueError: If the query contains no searchable words
+    """
+    tokens = _token_pattern.findall(q or '')
+    if not tokens:
+        raise ValueError("Search query must contain at least one word")
+
+    query = Plant.query
+    if growth_form is not None:
+        query = query.filter(Plant._growth_form == growth_form)
+    if life_cycle is not None:
+        query = query.filter(Plant._life_cycle == life_cycle)
+    if primary_use is not None:
+        query = query.filter(Plant._primary_use == primary_use)
+    if hardiness_zone is not None:
+        query = query.filter(
+            or_(Plant.hardiness_zone_min.is_(None), Plant.hardiness_zone_min <= hardiness_zone),
+            or_(Plant.hardiness_zone_max.is_(None), Plant.hardiness_zone_max >= hardiness_zone)
+        )
+
+    if _has_fts_index():
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        fts = literal_column('plants_fts')
+        query = (query
+                 .join(_plants_fts, _plants_fts.c.rowid == Plant.id)
+                 .filter(fts.op('MATCH')(match))
+                 .order_by(func.bm25(fts, *PLANT_SEARCH_COLUMNS.values())))
+    else:
+        searchable = [getattr(Plant, name) for name in PLANT_SEARCH_COLUMNS]
+        query = (query
+                 .filter(and_(*(or_(*(col.icontains(token, autoescape=True) for col in searchable))
+                                for token in tokens)))
+                 .order_by(Plant.name, Plant.id))
+
+    return query.limit(min(limit, MAX_SEARCH_RESULTS)).all()
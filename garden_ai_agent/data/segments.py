@@ -0,0 +1,362 @@
+"""
+Columnar segment files for frozen measurement history.
+
+Once a monthly partition is frozen (see `freeze_partitions`), its readings
+live in one segment file per month, garden location and measurement type,
+`<directory>/<YYYY-MM>/<garden_location_id>/<MEASUREMENT_TYPE>.seg`, instead
+of in SQLite. Each file holds one block, tagged with the month it holds, so
+dropping a month removes its directory without touching the other months.
+Files are memory-mapped read-only, so a range read binary-searches the
+timestamps and slices the columns it needs without loading the rest.
+
+Block layout (native byte order, 8-byte aligned):
+
+    header      magic, tag, count, first and last timestamp, text bytes
+    ids         int64[count]
+    timestamps  int64[count], microseconds since the epoch, ascending
+    values      float64[count]
+    periods     int64[count]
+    units       int8[count], index into `UNITS`
+    flags       int8[count], see the FLAG_* bits
+    source      int64[count + 1], offsets into the text
+    notes       int64[count + 1], offsets into the text
+    text        UTF-8 source and notes strings
+"""
+import mmap
+import os
+import shutil
+import struct
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flask import current_app
+
+from .fields import MeasurementType, MeasurementUnit
+
+MAGIC = b'GRDNSEG1'
+HEADER = struct.Struct('=8s5q')
+HEADER_BYTES = 64
+
+FLAG_FLAGGED = 1
+FLAG_NO_PERIOD = 2
+FLAG_NO_SOURCE = 4
+FLAG_NO_NOTES = 8
+
+UNITS = tuple(MeasurementUnit)
+UNIT_CODES = {unit: code for code, unit in enumerate(UNITS)}
+
+SEGMENT_COLUMNS = ('id', 'garden_location_id', 'measurement_type', 'unit', 'value', 'timestamp',
+                   'period_minutes', 'source', 'notes', 'flagged')
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+StreamKey = Tuple[int, MeasurementType]
+
+
+def to_micros(moment: datetime) -> int:
+    return (moment - EPOCH) // MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    return EPOCH + micros * MICROSECOND
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+class Block:
+    """One month of one stream, as views over the mapped file."""
+
+    def __init__(self, view: memoryview, offset: int):
+        magic, self.tag, count, self.first, self.last, text_bytes = HEADER.unpack_from(view, offset)
+        if magic != MAGIC:
+            raise ValueError(f"Corrupt segment block at offset {offset}")
+        self.count = count
+        start = offset + HEADER_BYTES
+        if offset + self.size(count, text_bytes) > len(view):
+            raise ValueError(f"Truncated segment block at offset {offset}")
+        self.ids = view[start:start + 8 * count].cast('q')
+        self.timestamps = view[start + 8 * count:start + 16 * count].cast('q')
+        self.values = view[start + 16 * count:start + 24 * count].cast('d')
+        self.periods = view[start + 24 * count:start + 32 * count].cast('q')
+        self.units = view[start + 32 * count:start + 33 * count].cast('b')
+        self.flags = view[start + 33 * count:start + 34 * count].cast('b')
+        strings = _align(start + 34 * count)
+        self.sources = view[strings:strings + 8 * (count + 1)].cast('q')
+        self.notes = view[strings + 8 * (count + 1):strings + 16 * (count + 1)].cast('q')
+        text = strings + 16 * (count + 1)
+        self.text = view[text:text + text_bytes]
+        self.end = _align(text + text_bytes)
+
+    @staticmethod
+    def size(count: int, text_bytes: int) -> int:
+        return _align(_align(HEADER_BYTES + 34 * count) + 16 * (count + 1) + text_bytes)
+
+    def range(self, start: Optional[int], end: Optional[int]) -> Tuple[int, int]:
+        """Returns the indexes of the readings in [start, end)."""
+        low = bisect_left(self.timestamps, start) if start is not None else 0
+        high = bisect_left(self.timestamps, end) if end is not None else self.count
+        return low, high
+
+    def string(self, offsets: memoryview, i: int, missing: bool) -> Optional[str]:
+        if missing:
+            return None
+        return str(self.text[offsets[i]:offsets[i + 1]], 'utf-8')
+
+    @staticmethod
+    def encode(tag: int, rows: Sequence) -> bytes:
+        """
+        Builds a block from rows with the `SEGMENT_COLUMNS` attributes, sorted by timestamp.
+        """
+        ids, timestamps, values, periods = array('q'), array('q'), array('d'), array('q')
+        units, flags, sources = array('b'), array('b'), array('q', [0])
+        source_text = bytearray()
+        for row in rows:
+            ids.append(row.id)
+            timestamps.append(to_micros(row.timestamp))
+            values.append(row.value)
+            periods.append(row.period_minutes or 0)
+            units.append(UNIT_CODES[row.unit])
+            flags.append((FLAG_FLAGGED if row.flagged else 0)
+                         | (FLAG_NO_PERIOD if row.period_minutes is None else 0)
+                         | (FLAG_NO_SOURCE if row.source is None else 0)
+                         | (FLAG_NO_NOTES if row.notes is None else 0))
+            source_text += (row.source or '').encode()
+            sources.append(len(source_text))
+        # Notes follow all sources in the text
+        notes, text = array('q', [len(source_text)]), bytearray()
+        for row in rows:
+            text += (row.notes or '').encode()
+            notes.append(len(source_text) + len(text))
+        count = len(ids)
+        header = HEADER.pack(MAGIC, tag, count, timestamps[0], timestamps[-1], len(source_text) + len(text))
+        columns = b''.join(column.tobytes() for column in (ids, timestamps, values, periods, units, flags))
+        body = header.ljust(HEADER_BYTES, b'\0') + columns
+        body = body.ljust(_align(len(body)), b'\0') + sources.tobytes() + notes.tobytes() + source_text + text
+        return body.ljust(_align(len(body)), b'\0')
+
+
+class SegmentFile:
+    """The blocks of one segment file, remapped when the file changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.blocks: List[Block] = []
+        self._identity = None
+
+    def refresh(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.blocks, self._identity = [], None
+            return
+        identity = (stat.st_ino, stat.st_size)
+        if identity == self._identity:
+            return
+        blocks = []
+        if stat.st_size:
+            with open(self.path, 'rb') as f:
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            offset = 0
+            while offset + HEADER_BYTES <= len(view):
+                try:
+                    block = Block(view, offset)
+                except ValueError:
+                    break
+                blocks.append(block)
+                offset = block.end
+        # Views into an old mapping stay valid until no reader holds them
+        self.blocks, self._identity = blocks, identity
+
+
+class SegmentStore:
+    """
+    Reads and writes segment files under `directory`.
+
+    Args:
+        directory: Root directory of the segment files
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._files: Dict[str, SegmentFile] = {}
+
+    def month_directory(self, tag: int) -> str:
+        return os.path.join(self.directory, f'{from_micros(tag):%Y-%m}')
+
+    def path(self, key: StreamKey, tag: int) -> str:
+        return os.path.join(self.month_directory(tag), str(key[0]), f'{key[1].name}.seg')
+
+    def write(self, key: StreamKey, tag: int, rows: Sequence) -> bool:
+        """
+        Writes a month of a stream's rows, sorted by timestamp, as its segment file.
+
+        The file is written under a temporary name and renamed into place, so it
+        is either complete or absent. Writing a month the store already holds
+        does nothing, so an interrupted freeze can be re-run.
+
+        Returns:
+            bool: Whether the block was written
+        """
+        path = self.path(key, tag)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(Block.encode(tag, rows))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        return True
+
+    def drop(self, tags: Iterable[int]) -> int:
+        """
+        Removes the months with the given tags.
+
+        Each month is one directory, which is deleted; other months' files are
+        not read or rewritten.
+
+        Returns:
+            int: Number of segment files removed
+        """
+        removed = 0
+        for tag in set(tags):
+            directory = self.month_directory(tag)
+            if not os.path.isdir(directory):
+                continue
+            for parent, _, names in os.walk(directory):
+                for name in names:
+                    self._files.pop(os.path.join(parent, name), None)
+                    removed += 1
+            shutil.rmtree(directory)
+        return removed
+
+    def rows(self, columns: Sequence[str], tags: Iterable[int], garden_location_id: Optional[int] = None,
+             measurement_type=None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             flagged: Optional[bool] = None) -> Iterator[tuple]:
+        """
+        Reads filtered readings, month by month and stream by stream.
+
+        Args:
+            columns: Names of the columns to return, from `SEGMENT_COLUMNS`
+            tags: Months to read
+            **filters: As for `filter_table`
+
+        Returns:
+            Iterator[tuple]: Named tuples of `columns`, in timestamp order within each stream
+        """
+        row_type = _row_type(tuple(columns))
+        getters = [_GETTERS[name] for name in columns]
+        start, end = _micros(start), _micros(end)
+        for tag in sorted(tags):
+            for key, block in self._blocks(tag, garden_location_id, measurement_type):
+                low, high = block.range(start, end)
+                for i in range(low, high):
+                    if flagged is not None and bool(block.flags[i] & FLAG_FLAGGED) != flagged:
+                        continue
+                    yield row_type(*[get(key, block, i) for get in getters])
+
+    def aggregate(self, tags: Iterable[int], garden_location_id: Optional[int] = None, measurement_type=None,
+                  start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  flagged: Optional[bool] = None) -> Dict[tuple, list]:
+        """
+        Aggregates filtered readings without building rows.
+
+        Returns:
+            Dict[tuple, list]: [count, min, max, sum] per (garden location, type, unit)
+        """
+        totals = {}
+        start, end = _micros(start), _micros(end)
+        for tag in tags:
+            for key, block in self._blocks(tag, garden_location_id, measurement_type):
+                low, high = block.range(start, end)
+                if low == high:
+                    continue
+                units = block.units[low:high]
+                if flagged is None and units.tobytes().count(units[0]) == high - low:
+                    # Common case: one unit and no per-reading filter, aggregate the slice directly
+                    values = block.values[low:high]
+                    _add(totals, (*key, UNITS[units[0]]), high - low, min(values), max(values), sum(values))
+                    continue
+                for i in range(low, high):
+                    if flagged is not None and bool(block.flags[i] & FLAG_FLAGGED) != flagged:
+                        continue
+                    value = block.values[i]
+                    _add(totals, (*key, UNITS[block.units[i]]), 1, value, value, value)
+        return totals
+
+    def _file(self, path: str) -> SegmentFile:
+        segment = self._files.get(path)
+        if segment is None:
+            segment = self._files[path] = SegmentFile(path)
+        return segment
+
+    def _keys(self, tag: int, garden_location_id: Optional[int] = None, measurement_type=None) -> List[StreamKey]:
+        directory = self.month_directory(tag)
+        if garden_location_id is not None:
+            location_ids = [garden_location_id]
+        elif os.path.isdir(directory):
+            location_ids = sorted(int(name) for name in os.listdir(directory) if name.isdigit())
+        else:
+            location_ids = []
+        types = [measurement_type] if measurement_type is not None else list(MeasurementType)
+        return [(location_id, stream_type) for location_id in location_ids for stream_type in types
+                if os.path.exists(self.path((location_id, stream_type), tag))]
+
+    def _blocks(self, tag: int, garden_location_id: Optional[int], measurement_type) -> Iterator[tuple]:
+        for key in self._keys(tag, garden_location_id, measurement_type):
+            segment = self._file(self.path(key, tag))
+            segment.refresh()
+            for block in segment.blocks:
+                if block.tag == tag:
+                    yield key, block
+
+
+def _add(totals: dict, key: tuple, count: int, low: float, high: float, total: float) -> None:
+    current = totals.get(key)
+    if current is None:
+        totals[key] = [count, low, high, total]
+    else:
+        current[0] += count
+        current[1] = min(current[1], low)
+        current[2] = max(current[2], high)
+        current[3] += total
+
+
+def _micros(moment: Optional[datetime]) -> Optional[int]:
+    return to_micros(moment) if moment is not None else None
+
+
+_row_types: Dict[tuple, type] = {}
+
+
+def _row_type(columns: tuple) -> type:
+    row_type = _row_types.get(columns)
+    if row_type is None:
+        row_type = _row_types[columns] = namedtuple('SegmentRow', columns)
+    return row_type
+
+
+_GETTERS = {
+    'id': lambda key, block, i: block.ids[i],
+    'garden_location_id': lambda key, block, i: key[0],
+    'measurement_type': lambda key, block, i: key[1],
+    'unit': lambda key, block, i: UNITS[block.units[i]],
+    'value': lambda key, block, i: block.values[i],
+    'timestamp': lambda key, block, i: from_micros(block.timestamps[i]),
+    'period_minutes': lambda key, block, i: None if block.flags[i] & FLAG_NO_PERIOD else block.periods[i],
+    'source': lambda key, block, i: block.string(block.sources, i, block.flags[i] & FLAG_NO_SOURCE),
+    'notes': lambda key, block, i: block.string(block.notes, i, block.flags[i] & FLAG_NO_NOTES),
+    'flagged': lambda key, block, i: bool(block.flags[i] & FLAG_FLAGGED),
+}
+
+
+def segment_store() -> SegmentStore:
+    """Returns the current app's segment store."""
+    return current_app.extensions['segment_store']
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from .database import db
+
+# Child of the `sqlalchemy.engine` logger, so it follows the level configured in
+# `create_app`; slow queries are logged at WARNING and show up without enabling
+# full statement logging
+logger = logging.getLogger('sqlalchemy.engine.slow_query')
+
+# Statements whose plan can be explained; inserts have nothing to look up
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+# Plans are cached per statement text; the number of distinct statements is
+# bounded by the code, but keep the cache bounded anyway
+PLAN_CACHE_SIZE = 256
+
+MAX_PARAMETERS_LENGTH = 500
+
+
+class SlowQueryLog:
+    """
+    Logs statements that take longer than a threshold, together with their
+    parameters, the endpoint that issued them and the query plan.
+
+    Args:
+        threshold: Statements slower than this many seconds are logged
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_start = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._slow_query_start
+        if duration < self.threshold:
+            return
+        if executemany and parameters:
+            parameters = parameters[0]
+        if has_request_context():
+            endpoint = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        else:
+            endpoint = '<no request>'
+        params = repr(parameters)
+        if len(params) > MAX_PARAMETERS_LENGTH:
+            params = params[:MAX_PARAMETERS_LENGTH] + '...'
+        logger.warning("Slow query (%.1f ms) from %s:\n%s\nParameters: %s\nQuery plan:\n%s",
+                       duration * 1000, endpoint, statement, params,
+                       self.explain(conn, statement, parameters))
+
+    def explain(self, conn, statement: str, parameters) -> str:
+        """
+        Returns the database's plan for a statement, or a note if it has none.
+
+        The plan is read on a separate raw DBAPI cursor so it neither emits
+        engine events nor disturbs the cursor being timed.
+        """
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return '  (not explained)'
+        with self._lock:
+            plan = self._plans.get(statement)
+            if plan is not None:
+                self._plans.move_to_end(statement)
+                return plan
+
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif dialect in ('postgresql', 'mysql', 'mariadb'):
+            prefix = 'EXPLAIN '
+        else:
+            return f'  (EXPLAIN not supported for {dialect})'
+
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        except Exception as e:
+            return f'  (EXPLAIN failed: {e})'
+        finally:
+            cursor.close()
+
+        if dialect == 'sqlite':
+            # Rows are (id, parent, notused, detail); indent children under parents
+            depth = {0: 0}
+            lines = []
+            for node_id, parent, _, detail in rows:
+                depth[node_id] = depth.get(parent, 0) + 1
+                lines.append('  ' * depth[node_id] + detail)
+        else:
+            lines = ['  ' + ' '.join(str(column) for column in row) for row in rows]
+        plan = '\n'.join(lines)
+
+        with self._lock:
+            self._plans[statement] = plan
+            if len(self._plans) > PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return plan
+
+
+def init_slow_query_log(app) -> None:
+    """
+    Attaches the slow-query log to the app's engines.
+
+    Statements slower than `SLOW_QUERY_THRESHOLD_MS` are logged; set it to
+    None to disable the log, or to 0 to log every statement.
+    """
+    threshold_ms = app.config['SLOW_QUERY_THRESHOLD_MS']
+    if threshold_ms is None:
+        return
+
+    slow_query_log = SlowQueryLog(threshold_ms / 1000)
+    app.extensions['slow_query_log'] = slow_query_log
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', slow_query_log.before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', slow_query_log.after_cursor_execute)
@@ -0,0 +1,28 @@
+"""
+Timestamps are stored as naive UTC datetimes.
+
+Input may carry a UTC offset (e.g. '2024-06-01T14:00:00+02:00'); it is
+converted to UTC and the offset dropped before it is stored, compared or used
+in a reading key, so that the same instant always has the same value.
+"""
+from datetime import datetime, timezone
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """Returns `moment` in UTC without tzinfo; naive values are assumed to be UTC already."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_timestamp(value) -> datetime:
+    """
+    Parses an ISO 8601 string, or takes a datetime, as a naive UTC datetime.
+
+    Raises:
+        ValueError: If `value` is not an ISO 8601 timestamp
+        TypeError: If `value` is neither a string nor a datetime
+    """
+    if isinstance(value, datetime):
+        return naive_utc(value)
+    return naive_utc(datetime.fromisoformat(value))
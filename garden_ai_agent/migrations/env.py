@@ -1,4 +1,5 @@
 import logging
+import re
 from logging.config import fileConfig
 
 from flask import current_app
@@ -51,6 +52,17 @@ def get_metadata():
     return target_db.metadata
 
 
+# Tables that exist in the database but not in the models: the full-text
+# search index and its shadow tables, managed by their own migration, and
+# monthly measurement partitions, created by `archive_partitions`
+UNMANAGED_TABLES = re.compile(r'plants_fts(_\w+)?|measurements_\d{4}_\d{2}')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    table = name if type_ == 'table' else getattr(getattr(object, 'table', None), 'name', None)
+    return not (reflected and table is not None and UNMANAGED_TABLES.fullmatch(table))
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +77,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +106,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
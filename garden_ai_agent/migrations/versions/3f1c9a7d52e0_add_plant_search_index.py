@@ -0,0 +1,48 @@
+"""Add plants_fts full-text search index
+
+Revision ID: 3f1c9a7d52e0
+Revises: 8e8378d047d2
+Create Date: 2026-10-19 05:02:47.731560
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d52e0'
+down_revision = '8e8378d047d2'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'name, scientific_name, variety, description, care_instructions, notes'
+NEW_VALUES = 'new.name, new.scientific_name, new.variety, new.description, new.care_instructions, new.notes'
+OLD_VALUES = 'old.name, old.scientific_name, old.variety, old.description, old.care_instructions, old.notes'
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases use the LIKE-based search fallback
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(f"CREATE VIRTUAL TABLE plants_fts USING fts5({COLUMNS}, "
+               "content='plants', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+    op.execute(f"CREATE TRIGGER plants_fts_ai AFTER INSERT ON plants BEGIN "
+               f"INSERT INTO plants_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES}); END")
+    op.execute(f"CREATE TRIGGER plants_fts_ad AFTER DELETE ON plants BEGIN "
+               f"INSERT INTO plants_fts(plants_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES}); END")
+    op.execute(f"CREATE TRIGGER plants_fts_au AFTER UPDATE ON plants BEGIN "
+               f"INSERT INTO plants_fts(plants_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES}); "
+               f"INSERT INTO plants_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES}); END")
+
+    # Index the plants that already exist
+    op.execute("INSERT INTO plants_fts(plants_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS plants_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS plants_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS plants_fts_ai")
+    op.execute("DROP TABLE IF EXISTS plants_fts")
@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import json
+import threading
+from typing import Optional
+
+from flask import Response, current_app, request
+
+# Spec endpoint registered by flask-restx
+SPEC_ENDPOINT = 'specs'
+
+
+class SpecCache:
+    """
+    The API's Swagger spec, serialized once and served from memory.
+
+    The spec is built from the registered namespaces on first use; after that
+    every fetch returns the same JSON body, or its gzip-compressed copy, with a
+    strong ETag so clients that already have it get a 304.
+    """
+
+    def __init__(self, api):
+        self.api = api
+        self._lock = threading.Lock()
+        self.body: Optional[bytes] = None
+        self.gzipped: Optional[bytes] = None
+        self.etag: Optional[str] = None
+
+    def load(self) -> None:
+        """Builds and serializes the spec, if not done yet. Needs an app context."""
+        if self.body is not None:
+            return
+        with self._lock:
+            if self.body is not None:
+                return
+            with current_app.test_request_context():
+                schema = self.api.__schema__
+            if 'error' in schema:
+                raise RuntimeError(schema['error'])
+            body = json.dumps(schema, separators=(',', ':')).encode()
+            self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+            self.etag = hashlib.sha256(body).hexdigest()[:32]
+            self.body = body
+
+    def write(self, path: str) -> int:
+        """
+        Writes the spec as JSON, e.g. for static hosting.
+
+        Returns:
+            int: Number of bytes written
+        """
+        self.load()
+        with open(path, 'wb') as f:
+            f.write(self.body)
+        return len(self.body)
+
+    def response(self) -> Response:
+        self.load()
+        if 'gzip' in request.accept_encodings:
+            response = Response(self.gzipped, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+            # Each encoding is a different representation, so it needs its own ETag
+            response.set_etag(f'{self.etag}-gzip')
+        else:
+            response = Response(self.body, mimetype='application/json')
+            response.set_etag(self.etag)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+def init_spec_cache(app, api) -> SpecCache:
+    """
+    Serves `/swagger.json` from a `SpecCache` instead of re-encoding it per request.
+
+    When `OPENAPI_SPEC_FILE` is set, the spec is also built at startup and
+    written to that file.
+    """
+    spec = SpecCache(api)
+    app.extensions['openapi_spec'] = spec
+    app.view_functions[SPEC_ENDPOINT] = spec.response
+
+    if app.config['OPENAPI_SPEC_FILE']:
+        with app.app_context():
+            spec.write(app.config['OPENAPI_SPEC_FILE'])
+    return spec
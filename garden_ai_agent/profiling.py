@@ -0,0 +1,252 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .data.database import db
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ('sql', 'app', 'encode')
+
+PROFILE_HEADER = 'X-Profile'
+
+
+class RequestProfile:
+    """Timings and counters collected while handling a single request."""
+    __slots__ = ('started', 'sql_count', 'sql_seconds', 'encode_seconds', 'rows', 'profiler')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.encode_seconds = 0.0
+        self.rows = 0
+        self.profiler = None
+
+
+class RequestMetrics:
+    """
+    Thread-safe per-endpoint request metrics rendered in Prometheus text format.
+
+    Each request is recorded under its URL rule (e.g. `/measurements/<int:id>`)
+    and method, so the number of series is bounded by the number of routes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._duration_buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self._duration_sum = defaultdict(float)
+        self._duration_count = defaultdict(int)
+        self._phase_seconds = defaultdict(float)
+        self._sql_statements = defaultdict(int)
+        self._rows_hydrated = defaultdict(int)
+        self._response_bytes = defaultdict(int)
+
+    def observe(self, endpoint: str, method: str, status: int, duration: float,
+                phases: dict, profile: RequestProfile, response_bytes: int) -> None:
+        key = (endpoint, method)
+        with self._lock:
+            self._requests[(endpoint, method, status)] += 1
+            buckets = self._duration_buckets[key]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+            self._duration_sum[key] += duration
+            self._duration_count[key] += 1
+            for phase, seconds in phases.items():
+                self._phase_seconds[key + (phase,)] += seconds
+            self._sql_statements[key] += profile.sql_count
+            self._rows_hydrated[key] += profile.rows
+            self._response_bytes[key] += response_bytes
+
+    def render(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        def labels(endpoint, method, **extra):
+            pairs = [('endpoint', endpoint), ('method', method), *extra.items()]
+            return ','.join(f'{name}="{value}"' for name, value in pairs)
+
+        lines = []
+        with self._lock:
+            lines += ['# HELP garden_http_requests_total Requests handled.',
+                      '# TYPE garden_http_requests_total counter']
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'garden_http_requests_total{{{labels(endpoint, method, status=status)}}} {count}')
+
+            lines += ['# HELP garden_http_request_duration_seconds Request handling time.',
+                      '# TYPE garden_http_request_duration_seconds histogram']
+            for key in sorted(self._duration_count):
+                for bound, count in zip(DURATION_BUCKETS, self._duration_buckets[key]):
+                    lines.append(f'garden_http_request_duration_seconds_bucket{{{labels(*key, le=bound)}}} {count}')
+                lines.append(f'garden_http_request_duration_seconds_bucket{{{labels(*key, le="+Inf")}}} '
+                             f'{self._duration_count[key]}')
+                lines.append(f'garden_http_request_duration_seconds_sum{{{labels(*key)}}} {self._duration_sum[key]}')
+                lines.append(f'garden_http_request_duration_seconds_count{{{labels(*key)}}} '
+                             f'{self._duration_count[key]}')
+
+            lines += ['# HELP garden_http_phase_seconds_total Request time by phase: '
+                      'sql (statement execution), app (handler, ORM hydration, marshalling), encode (serialization).',
+                      '# TYPE garden_http_phase_seconds_total counter']
+            for (endpoint, method, phase), seconds in sorted(self._phase_seconds.items()):
+                lines.append(f'garden_http_phase_seconds_total{{{labels(endpoint, method, phase=phase)}}} {seconds}')
+
+            for name, help_text, values in (
+                ('garden_sql_statements_total', 'SQL statements executed.', self._sql_statements),
+                ('garden_orm_rows_hydrated_total', 'ORM instances loaded from query results.', self._rows_hydrated),
+                ('garden_http_response_bytes_total', 'Response body bytes sent.', self._response_bytes),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for key, value in sorted(values.items()):
+                    lines.append(f'{name}{{{labels(*key)}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _current_profile():
+    if has_request_context():
+        return g.get('request_profile')
+    return None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._garden_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    if profile is not None:
+        profile.sql_count += 1
+        profile.sql_seconds += time.perf_counter() - context._garden_query_start
+
+
+@event.listens_for(db.Model, 'load', propagate=True)
+def _on_load(target, context):
+    profile = _current_profile()
+    if profile is not None:
+        profile.rows += 1
+
+
+def _start_profiler(app):
+    requested = app.config['PROFILING_HEADER_ENABLED'] and request.headers.get(PROFILE_HEADER)
+    sampled = random.random() < app.config['PROFILING_SAMPLE_RATE']
+    if not (requested or sampled):
+        return None
+    if requested == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed; falling back to cProfile")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another request on this interpreter is already being profiled
+        return None
+    return profiler
+
+
+def _save_profile(app, profiler, endpoint: str) -> str:
+    output_dir = app.config['PROFILING_OUTPUT_DIR']
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{endpoint.strip('/').replace('/', '_') or 'root'}"
+    name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name)
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        path = os.path.join(output_dir, f'{name}-{uuid.uuid4().hex[:8]}.prof')
+        profiler.dump_stats(path)
+    else:
+        profiler.stop()
+        path = os.path.join(output_dir, f'{name}-{uuid.uuid4().hex[:8]}.html')
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    logger.info("Saved request profile to %s", path)
+    return path
+
+
+def init_profiling(app, api) -> None:
+    """
+    Instruments request handling for the app.
+
+    Every request records its duration split into SQL execution, application
+    code (handler, ORM hydration and marshalling) and response encoding, along
+    with SQL statement count, ORM rows hydrated and response size. Metrics are
+    served in Prometheus format at `/metrics`. When `SERVER_TIMING_ENABLED` is
+    set, the same breakdown is returned in a `Server-Timing` header.
+
+    Requests are profiled with cProfile when sampled (`PROFILING_SAMPLE_RATE`)
+    or, if `PROFILING_HEADER_ENABLED` is set, when they carry an `X-Profile`
+    header (`X-Profile: pyinstrument` uses pyinstrument if installed). Profiles
+    are written to `PROFILING_OUTPUT_DIR`.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    metrics = RequestMetrics()
+    app.extensions['request_metrics'] = metrics
+
+    # Time response serialization separately from the handler
+    for mediatype, represent in list(api.representations.items()):
+        def timed(data, *args, _represent=represent, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _represent(data, *args, **kwargs)
+            finally:
+                profile = _current_profile()
+                if profile is not None:
+                    profile.encode_seconds += time.perf_counter() - started
+        api.representations[mediatype] = timed
+
+    @app.before_request
+    def start_request_profile():
+        g.request_profile = profile = RequestProfile()
+        profile.profiler = _start_profiler(app)
+
+    @app.after_request
+    def record_request_profile(response):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return response
+        duration = time.perf_counter() - profile.started
+        endpoint = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+        if profile.profiler is not None:
+            response.headers['X-Profile-Output'] = os.path.basename(_save_profile(app, profile.profiler, endpoint))
+
+        phases = {
+            'sql': profile.sql_seconds,
+            'encode': profile.encode_seconds,
+            'app': max(duration - profile.sql_seconds - profile.encode_seconds, 0.0)
+        }
+        response_bytes = 0 if response.is_streamed else (response.calculate_content_length() or 0)
+        metrics.observe(endpoint, request.method, response.status_code, duration, phases, profile, response_bytes)
+
+        if app.config['SERVER_TIMING_ENABLED']:
+            timings = [f'{phase};dur={phases[phase] * 1000:.3f}' for phase in PHASES]
+            timings.append(f'total;dur={duration * 1000:.3f}')
+            timings.append(f'sql-count;desc="{profile.sql_count} statements"')
+            timings.append(f'rows;desc="{profile.rows} rows hydrated"')
+            response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def metrics_view():
+        return Response(current_app.extensions['request_metrics'].render(),
+                        mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,140 @@
+"""
+Response encodings, selected with the `Accept` header.
+
+JSON responses are encoded with orjson when it is installed, and with the
+stdlib `json` module otherwise; `JSON_ENCODER` picks one explicitly. Both
+encode `datetime`, `date` and `time` values as ISO 8601 strings, enums as
+their values and `Decimal` as numbers.
+
+List responses are `{"data": [{...}, ...]}`, repeating every field name for
+every item. Clients that read large lists can ask for:
+
+- `application/vnd.garden.columnar+json`: the same JSON with lists of objects
+  turned into one array per field, `{"data": {"id": [...], "value": [...]}}`
+- `application/msgpack`: the usual response shape in MessagePack, if the
+  optional `msgpack` package is installed
+
+Responses that are not lists of objects are encoded unchanged.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from importlib.util import find_spec
+from typing import Any, Callable
+
+from flask import current_app, make_response
+
+COLUMNAR_JSON = 'application/vnd.garden.columnar+json'
+MSGPACK = 'application/msgpack'
+
+
+def _encode_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_encoder() -> Callable[[Any, bool], bytes]:
+    def dumps(data, indent: bool = False) -> bytes:
+        if indent:
+            text = json.dumps(data, default=_encode_default, indent=4)
+        else:
+            text = json.dumps(data, default=_encode_default, separators=(',', ':'))
+        return (text + '\n').encode()
+    return dumps
+
+
+def _orjson_encoder() -> Callable[[Any, bool], bytes]:
+    import orjson
+
+    # orjson handles datetime, date, time and enums itself and calls the default for the rest
+    option = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+    indented = option | orjson.OPT_INDENT_2
+
+    def dumps(data, indent: bool = False) -> bytes:
+        return orjson.dumps(data, default=_encode_default, option=indented if indent else option)
+    return dumps
+
+
+JSON_ENCODERS = {
+    'orjson': _orjson_encoder,
+    'json': _stdlib_encoder
+}
+
+
+def json_encoder(name: str = 'auto') -> Callable[[Any, bool], bytes]:
+    """
+    Returns a function that encodes data as JSON bytes, ending in a newline.
+
+    Args:
+        name: 'orjson', 'json', or 'auto' for orjson if it is installed and `json` otherwise
+
+    Returns:
+        Callable: `dumps(data, indent=False)`
+
+    Raises:
+        ValueError: If `name` is not a known encoder
+        ImportError: If the named encoder's package is not installed
+    """
+    if name == 'auto':
+        name = 'orjson' if find_spec('orjson') else 'json'
+    if name not in JSON_ENCODERS:
+        raise ValueError(f"Unknown JSON encoder: '{name}'")
+    return JSON_ENCODERS[name]()
+
+
+def columnar(data):
+    """
+    Returns `data` with a list of objects under `data` turned into one list per field.
+
+    Fields are taken from the first object, as all items of a marshalled list
+    have the same fields.
+    """
+    if not isinstance(data, dict):
+        return data
+    items = data.get('data')
+    if not isinstance(items, list) or not items or not isinstance(items[0], dict):
+        return data
+    return {**data, 'data': {field: [item[field] for item in items] for field in items[0]}}
+
+
+def _response(body: bytes, code, headers=None):
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    # The encoding was chosen from the Accept header, so caches must key on it
+    response.vary.add('Accept')
+    return response
+
+
+def output_msgpack(data, code, headers=None):
+    import msgpack
+
+    return _response(msgpack.packb(data, use_bin_type=True, default=_encode_default), code, headers)
+
+
+def init_representations(api, encoder: str = 'auto') -> None:
+    """
+    Registers the JSON encoder and the compact encodings with the API.
+
+    Args:
+        api: The API to register the representations with
+        encoder: Name of the JSON encoder, see `json_encoder`
+    """
+    dumps = json_encoder(encoder)
+
+    def output_json(data, code, headers=None):
+        # Indented in debug mode, like flask-restx's own JSON representation
+        return _response(dumps(data, current_app.debug), code, headers)
+
+    def output_columnar_json(data, code, headers=None):
+        return _response(dumps(columnar(data), current_app.debug), code, headers)
+
+    api.representations['application/json'] = output_json
+    api.representations[COLUMNAR_JSON] = output_columnar_json
+    if find_spec('msgpack'):
+        api.representations[MSGPACK] = output_msgpack
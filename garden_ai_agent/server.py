@@ -0,0 +1,97 @@
+"""
+Production server for the Garden API.
+
+Runs the app under gunicorn with a pool of pre-forked workers configured from
+`config.py`. Each worker builds its own app (and database engine) after the
+fork. Send SIGHUP to the master to reload workers gracefully, or SIGTERM to
+stop after in-flight requests finish.
+
+Usage:
+    python serve.py [--bind HOST:PORT] [--workers N] [--threads N]
+"""
+import argparse
+import os
+
+from . import config
+from .app import create_app
+from .services import SharedRecentReadings
+
+DEBUG_ENV_VARS = ('FLASK_DEBUG', 'GARDEN_DEBUG')
+
+
+def check_production_app(app) -> None:
+    """
+    Refuses to serve an app configured for debugging.
+
+    Raises:
+        RuntimeError: If debug mode is enabled in the app or the environment
+    """
+    enabled = [name for name in DEBUG_ENV_VARS if os.environ.get(name, '').lower() in ('1', 'true', 'yes')]
+    if app.debug or config.DEBUG:
+        enabled.append('app debug mode')
+    if enabled:
+        raise RuntimeError(f"Refusing to start the production server with debugging enabled ({', '.join(enabled)})")
+
+
+def server_options(bind: str = config.BIND, workers: int = config.WORKERS, threads: int = config.THREADS) -> dict:
+    """Returns gunicorn settings built from `config.py` and the given overrides."""
+    return {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'keepalive': config.KEEPALIVE_SECONDS,
+        'timeout': config.TIMEOUT_SECONDS,
+        'graceful_timeout': config.GRACEFUL_TIMEOUT_SECONDS,
+        'max_requests': config.MAX_REQUESTS,
+        'max_requests_jitter': config.MAX_REQUESTS_JITTER,
+        # Build the app in each worker so no database connections cross the fork
+        'preload_app': False,
+        'accesslog': '-',
+        'errorlog': '-'
+    }
+
+
+def serve(options: dict, app_config: dict = None) -> None:
+    """
+    Runs the app under gunicorn until the master process is stopped.
+
+    Args:
+        options: gunicorn settings, see `server_options`
+        app_config: Configuration overrides passed to `create_app`
+    """
+    from gunicorn.app.base import BaseApplication
+
+    # Fail in the master before any worker starts. Only the workers serve
+    # requests, so the master's app must not start a write-behind flusher
+    # (or its exit hook) that every forked worker would inherit
+    master_app = create_app({**(app_config or {}), 'WRITE_BEHIND_ENABLED': False})
+    check_production_app(master_app)
+    # A shared recent readings file left by a previous run may have missed ingests since
+    recent = master_app.extensions.get('recent_readings')
+    if isinstance(recent, SharedRecentReadings):
+        recent.reset()
+
+    class GardenApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            app = create_app(app_config)
+            check_production_app(app)
+            return app
+
+    GardenApplication().run()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Run the Garden API production server.')
+    parser.add_argument('--bind', default=config.BIND, help=f'Address to listen on (default {config.BIND})')
+    parser.add_argument('--workers', type=int, default=config.WORKERS)
+    parser.add_argument('--threads', type=int, default=config.THREADS, help='Threads per worker')
+    parser.add_argument('--database-uri', help='Overrides SQLALCHEMY_DATABASE_URI')
+    args = parser.parse_args(argv)
+
+    app_config = {'SQLALCHEMY_DATABASE_URI': args.database_uri} if args.database_uri else None
+    serve(server_options(args.bind, args.workers, args.threads), app_config)
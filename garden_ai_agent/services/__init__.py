@@ -0,0 +1,17 @@
+from .suitability import SuitabilityMatcher
+from .anomaly import AnomalyDetector
+from .recent import RecentReadings
+
+__all__ = ['SuitabilityMatcher', 'AnomalyDetector', 'WriteBehindQueue', 'RecentReadings', 'SharedRecentReadings']
+
+
+def __getattr__(name):
+    # The write-behind queue and shared buffer are only needed when enabled, so
+    # they are imported on first use rather than with the package
+    if name == 'WriteBehindQueue':
+        from .write_behind import WriteBehindQueue
+        return WriteBehindQueue
+    if name == 'SharedRecentReadings':
+        from .shared_readings import SharedRecentReadings
+        return SharedRecentReadings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
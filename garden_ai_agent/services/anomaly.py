@@ -0,0 +1,198 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+from ..data.database import db
+from ..data.models import Measurement, MeasurementStatistics
+from ..data.fields import MeasurementType, MeasurementUnit
+
+logger = logging.getLogger(__name__)
+
+# Physically plausible ranges per unit; readings outside are always flagged
+PLAUSIBLE_RANGES = {
+    MeasurementUnit.CELSIUS: (-60.0, 65.0),
+    MeasurementUnit.FAHRENHEIT: (-76.0, 149.0),
+    MeasurementUnit.PERCENT: (0.0, 100.0),
+    MeasurementUnit.MILLIMETERS: (0.0, 1000.0),
+    MeasurementUnit.INCHES: (0.0, 40.0),
+    MeasurementUnit.WATTS_PER_SQM: (0.0, 1500.0),
+    MeasurementUnit.METERS_PER_SEC: (0.0, 115.0),
+    MeasurementUnit.KILOMETERS_PER_HOUR: (0.0, 410.0),
+    MeasurementUnit.MILES_PER_HOUR: (0.0, 255.0),
+    MeasurementUnit.PH: (0.0, 14.0),
+    MeasurementUnit.MICROSIEMENS: (0.0, 200000.0),
+    MeasurementUnit.PPM: (0.0, 100000.0),
+}
+
+StreamKey = Tuple[int, MeasurementType, MeasurementUnit]
+
+
+class RunningStats:
+    """Exponentially weighted mean and variance of one measurement stream."""
+    __slots__ = ('count', 'mean', 'variance', 'outlier_run')
+
+    def __init__(self, count: int = 0, mean: float = 0.0, variance: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.variance = variance
+        self.outlier_run = 0
+
+    def update(self, value: float, alpha: float) -> None:
+        """
+        Adds a reading to the statistics.
+
+        Uses a weight of 1/count until the stream has seen 1/alpha readings, which
+        makes the early estimates equal to Welford's cumulative mean and variance,
+        then switches to a fixed weight so the statistics follow slow drift.
+        """
+        self.count += 1
+        weight = max(alpha, 1.0 / self.count)
+        diff = value - self.mean
+        increment = weight * diff
+        self.mean += increment
+        self.variance = (1.0 - weight) * (self.variance + diff * increment)
+        self.outlier_run = 0
+
+    def merge(self, other: 'RunningStats', max_weight: float = math.inf) -> 'RunningStats':
+        """
+        Returns these statistics combined with `other`'s, as if one stream had seen both.
+
+        Uses the parallel form of Welford's algorithm. `max_weight` caps the weight
+        of these statistics, so exponentially weighted statistics count for no more
+        than the readings in their window.
+        """
+        if other.count == 0:
+            return RunningStats(self.count, self.mean, self.variance)
+        if self.count == 0:
+            return RunningStats(other.count, other.mean, other.variance)
+        weight = min(self.count, max_weight)
+        total = weight + other.count
+        diff = other.mean - self.mean
+        mean = self.mean + diff * other.count / total
+        variance = (weight * self.variance + other.count * other.variance
+                    + diff * diff * weight * other.count / total) / total
+        return RunningStats(self.count + other.count, mean, variance)
+
+
+class AnomalyDetector:
+    """
+    Flags outlying measurements at ingest time in O(1) per reading.
+
+    A reading is an outlier if it lies outside the plausible range for its unit,
+    or if its stream has at least `min_samples` readings and the reading is more
+    than `z_threshold` standard deviations from the stream's running mean.
+    Outliers are not added to the statistics, so a burst of spikes cannot drag
+    the mean towards itself; after `reset_after` consecutive outliers the stream
+    is assumed to have shifted level and its statistics start over.
+
+    Statistics are loaded from `measurement_statistics` the first time a stream
+    is seen. At most every `persist_interval` seconds, the readings accepted
+    since the last write are merged into the stored statistics, so that workers
+    sharing the database add to each other's statistics rather than overwrite
+    them, and the merged statistics replace the in-memory ones.
+    """
+
+    def __init__(self, z_threshold: float = 4.0, min_samples: int = 30, window: int = 200,
+                 reset_after: int = 10, persist_interval: float = 60.0):
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.alpha = 2.0 / (window + 1)
+        self.reset_after = reset_after
+        self.persist_interval = persist_interval
+        self._lock = threading.Lock()
+        self._streams: Dict[StreamKey, RunningStats] = {}
+        # Readings accepted since the last write, and streams restarted since then
+        self._pending: Dict[StreamKey, RunningStats] = {}
+        self._restarted: Set[StreamKey] = set()
+        self._last_persist = time.monotonic()
+
+    def check(self, measurement: Measurement, session=None) -> bool:
+        """
+        Checks a new measurement and updates its stream's statistics.
+
+        Args:
+            measurement: Measurement about to be inserted
+            session: Session used to load stored statistics (defaults to `db.session`)
+
+        Returns:
+            bool: True if the measurement is an outlier
+        """
+        key = (measurement.garden_location_id, measurement.measurement_type, measurement.unit)
+        value = measurement.value
+        low, high = PLAUSIBLE_RANGES.get(key[2], (-math.inf, math.inf))
+
+        stats = self._streams.get(key)
+        if stats is None:
+            loaded = self._load(key, session or db.session)
+            with self._lock:
+                stats = self._streams.setdefault(key, loaded)
+
+        with self._lock:
+            if not low <= value <= high:
+                return True
+            if stats.count >= self.min_samples and self._z_score(stats, value) > self.z_threshold:
+                stats.outlier_run += 1
+                if stats.outlier_run < self.reset_after:
+                    return True
+                logger.info("Resetting statistics for %s after %d consecutive outliers", key, stats.outlier_run)
+                stats.count = 0
+                stats.mean = 0.0
+                stats.variance = 0.0
+                self._pending[key] = RunningStats()
+                self._restarted.add(key)
+            stats.update(value, self.alpha)
+            self._pending.setdefault(key, RunningStats()).update(value, 0.0)
+            return False
+
+    def maybe_persist(self, session=None) -> None:
+        """Writes changed statistics to the database if the persist interval has elapsed."""
+        if time.monotonic() - self._last_persist >= self.persist_interval:
+            self.persist(session)
+
+    def persist(self, session=None) -> None:
+        """Merges the statistics changed since the last write into the database and commits (defaults to `db.session`)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            restarted, self._restarted = self._restarted, set()
+            self._last_persist = time.monotonic()
+        if not pending:
+            return
+
+        session = session or db.session
+        now = datetime.utcnow()
+        merged = {}
+        for key, stats in pending.items():
+            row = session.get(MeasurementStatistics, key, populate_existing=True, with_for_update=True)
+            if row is None:
+                row = MeasurementStatistics(garden_location_id=key[0], measurement_type=key[1], unit=key[2])
+                session.add(row)
+            elif key not in restarted:
+                # Readings other workers stored since this stream was loaded are kept
+                stats = RunningStats(row.count, row.mean, row.variance).merge(stats, 1.0 / self.alpha)
+            row.count, row.mean, row.variance, row.updated_at = stats.count, stats.mean, stats.variance, now
+            merged[key] = stats
+        session.commit()
+
+        with self._lock:
+            for key, stats in merged.items():
+                live = self._streams.get(key)
+                if live is None or key in self._restarted:
+                    continue
+                newer = self._pending.get(key)
+                if newer is not None:
+                    stats = stats.merge(newer, 1.0 / self.alpha)
+                live.count, live.mean, live.variance = stats.count, stats.mean, stats.variance
+
+    def _z_score(self, stats: RunningStats, value: float) -> float:
+        # Floor the deviation so perfectly steady streams don't flag tiny changes
+        std = max(math.sqrt(stats.variance), 0.01 * abs(stats.mean), 1e-6)
+        return abs(value - stats.mean) / std
+
+    def _load(self, key: StreamKey, session) -> RunningStats:
+        row: Optional[MeasurementStatistics] = session.get(MeasurementStatistics, key)
+        if row is None:
+            return RunningStats()
+        return RunningStats(row.count, row.mean, row.variance)
@@ -0,0 +1,270 @@
+import csv
+import math
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..data.database import db, dialect_insert
+from ..data.fields import MeasurementType, MeasurementUnit, enum_lookup
+from ..data.models import GardenLocation, LatestMeasurement, Measurement, MeasurementPartition, MeasurementSource
+from ..data.partitions import month_start, partition_name
+from ..data.timestamps import parse_timestamp
+from .ingest import find_archived
+
+REQUIRED_COLUMNS = ('garden_location_id', 'measurement_type', 'unit', 'value', 'timestamp')
+
+# Per-row errors found while reading, e.g. rows with the wrong number of fields
+ROW_ERRORS = '_row_errors'
+
+Columns = Dict[str, list]
+
+
+class ImportReport:
+    """Counts and timing for a bulk import."""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def _read_csv(path: str, chunk_size: int) -> Iterator[Columns]:
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("Empty file: expected a header row")
+        width = len(header)
+        while True:
+            rows = [row for _, row in zip(range(chunk_size), reader)]
+            if not rows:
+                return
+            errors = [None if len(row) == width else f"Expected {width} fields, found {len(row)}" for row in rows]
+            # Short and long rows are rejected, but padded so the other rows' columns line up
+            rows = [row[:width] + [''] * (width - len(row)) for row in rows]
+            columns = {name: list(values) for name, values in zip(header, zip(*rows))}
+            columns[ROW_ERRORS] = errors
+            yield columns
+
+
+def _read_parquet(path: str, chunk_size: int) -> Iterator[Columns]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Importing Parquet files requires pyarrow") from None
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pydict()
+
+
+def read_columns(path: str, file_format: str, chunk_size: int) -> Iterator[Columns]:
+    """
+    Reads a CSV or Parquet file as chunks of columns.
+
+    Raises:
+        ValueError: If the format is unknown, the file is empty or a required column is missing
+        ImportError: If reading the format requires pyarrow and it is not installed
+    """
+    if file_format == 'csv':
+        chunks = _read_csv(path, chunk_size)
+    elif file_format == 'parquet':
+        chunks = _read_parquet(path, chunk_size)
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+    for columns in chunks:
+        missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        yield columns
+
+
+def _blank(value) -> bool:
+    return value is None or value == ''
+
+
+def _parse_column(values: list, parse, errors: List[Optional[str]], field: str, required: bool) -> list:
+    """Parses one column, recording the first error for each row."""
+    parsed = []
+    for i, value in enumerate(values):
+        if _blank(value):
+            if required and errors[i] is None:
+                errors[i] = f"Missing required field: '{field}'"
+            parsed.append(None)
+            continue
+        try:
+            parsed.append(parse(value))
+        except (TypeError, ValueError, KeyError):
+            if errors[i] is None:
+                errors[i] = f"Invalid value for field: '{field}'"
+            parsed.append(None)
+    return parsed
+
+
+def _parse_int(value) -> int:
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    return int(value)
+
+
+def _parse_value(value) -> float:
+    value = float(value)
+    if math.isnan(value) or math.isinf(value):
+        raise ValueError(value)
+    return value
+
+
+def _parse_period(value) -> int:
+    value = _parse_int(value)
+    if value <= 0:
+        raise ValueError(value)
+    return value
+
+
+def _parse_source(value) -> str:
+    value = str(value).strip().upper()
+    if len(value) > 50:
+        raise ValueError(value)
+    return value
+
+
+def validate_columns(columns: Columns, location_ids: set,
+                     frozen_partitions: set = frozenset()) -> Tuple[List[dict], List[Tuple[int, str]]]:
+    """
+    Validates a chunk of columns one column at a time.
+
+    Applies the same rules as the measurement API: known type and unit (units may
+    also be given as symbols, e.g. '°C'), numeric value, ISO 8601 timestamp
+    (stored as naive UTC), positive integer period, source of at most 50
+    characters, and an existing garden location. Rows with an error from
+    reading, under `ROW_ERRORS`, are rejected with it, and so are readings of
+    months in `frozen_partitions`, whose segments cannot be added to.
+
+    Returns:
+        Tuple[List[dict], List[Tuple[int, str]]]: Row values ready for insert,
+        and (index within chunk, reason) for each rejected row
+    """
+    size = len(columns['garden_location_id'])
+    errors: List[Optional[str]] = list(columns.get(ROW_ERRORS) or [None] * size)
+    location = _parse_column(columns['garden_location_id'], _parse_int, errors, 'garden_location_id', True)
+    # Member names in any case, and unit symbols such as '°C'
+    types = _parse_column(columns['measurement_type'], enum_lookup(MeasurementType).__getitem__,
+                          errors, 'measurement_type', True)
+    units = _parse_column(columns['unit'], enum_lookup(MeasurementUnit).__getitem__, errors, 'unit', True)
+    values = _parse_column(columns['value'], _parse_value, errors, 'value', True)
+    timestamps = _parse_column(columns['timestamp'], parse_timestamp, errors, 'timestamp', True)
+    empty = [None] * size
+    periods = _parse_column(columns.get('period_minutes', empty), _parse_period, errors, 'period_minutes', False)
+    sources = _parse_column(columns.get('source', empty), _parse_source, errors, 'source', False)
+    notes = _parse_column(columns.get('notes', empty), str, errors, 'notes', False)
+
+    for i, location_id in enumerate(location):
+        if errors[i] is None and location_id not in location_ids:
+            errors[i] = f"Garden location {location_id} does not exist"
+        elif errors[i] is None and partition_name(month_start(timestamps[i])) in frozen_partitions:
+            errors[i] = f"Month {timestamps[i]:%Y-%m} is frozen"
+
+    rows = [{
+        'garden_location_id': location[i],
+        'measurement_type': types[i],
+        'unit': units[i],
+        'value': values[i],
+        'timestamp': timestamps[i],
+        'period_minutes': periods[i],
+        'source': sources[i],
+        'notes': notes[i],
+        'flagged': False
+    } for i in range(size) if errors[i] is None]
+    rejected = [(i, error) for i, error in enumerate(errors) if error is not None]
+    return rows, rejected
+
+
+def _row_key(row: dict) -> tuple:
+    return (row['garden_location_id'], row['measurement_type'], row['timestamp'], row['source'])
+
+
+def import_measurements(path: str, file_format: Optional[str] = None, chunk_size: int = 50000,
+                        rejects=None, progress=None) -> ImportReport:
+    """
+    Bulk loads historical measurements from a CSV or Parquet file.
+
+    The file is read and validated in chunks; each chunk's valid rows are
+    inserted with a single Core INSERT (skipping readings that already exist,
+    in the hot table or in an archived month's partition) and committed, so memory is bounded by the chunk size and a failure loses
+    at most one chunk. Readings are not checked for anomalies. The latest-value
+    cache is rebuilt and sources are registered at the end.
+
+    Args:
+        path: File to import
+        file_format: 'csv' or 'parquet'; inferred from the file extension if omitted
+        chunk_size: Rows per chunk and transaction
+        rejects: Optional csv.writer receiving (row number, reason) for rejected rows
+        progress: Optional callable receiving the report after each chunk
+
+    Returns:
+        ImportReport: Counts of rows read, inserted, skipped as duplicates and rejected
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip('.').lower()
+    report = ImportReport()
+    location_ids = set(db.session.scalars(select(GardenLocation.id)))
+    frozen_partitions = set(db.session.scalars(
+        select(MeasurementPartition.name).where(MeasurementPartition.frozen.is_(True))))
+    sources = {}
+    table = Measurement.__table__
+
+    for columns in read_columns(path, file_format, chunk_size):
+        rows, rejected = validate_columns(columns, location_ids, frozen_partitions)
+        if rejects is not None:
+            for index, reason in rejected:
+                # Row numbers count the header line as row 1, matching spreadsheets
+                rejects.writerow([report.read + index + 2, reason])
+        archived = find_archived([_row_key(row) for row in rows], db.session)
+        if archived:
+            new_rows = [row for row in rows if _row_key(row) not in archived]
+            report.duplicates += len(rows) - len(new_rows)
+            rows = new_rows
+        if rows:
+            statement = dialect_insert(table)
+            if hasattr(statement, 'on_conflict_do_nothing'):
+                statement = statement.on_conflict_do_nothing()
+            result = db.session.execute(statement, rows)
+            inserted = result.rowcount if result.rowcount >= 0 else len(rows)
+            db.session.commit()
+            report.inserted += inserted
+            report.duplicates += len(rows) - inserted
+            for row in rows:
+                if row['source'] is not None:
+                    first, last = sources.get(row['source'], (row['timestamp'], row['timestamp']))
+                    sources[row['source']] = (min(first, row['timestamp']), max(last, row['timestamp']))
+        report.read += len(columns['garden_location_id'])
+        report.rejected += len(rejected)
+        if progress is not None:
+            progress(report)
+
+    _register_sources(sources)
+    LatestMeasurement.rebuild()
+    db.session.commit()
+    return report
+
+
+def _register_sources(sources: Dict[str, Tuple[datetime, datetime]]) -> None:
+    known = {source.name: source for source in
+             db.session.scalars(select(MeasurementSource).where(MeasurementSource.name.in_(list(sources))))}
+    for name, (first, last) in sources.items():
+        source = known.get(name)
+        if source is None:
+            db.session.add(MeasurementSource(name=name, first_seen_at=first, last_seen_at=last))
+        else:
+            source.first_seen_at = min(source.first_seen_at, first)
+            source.last_seen_at = max(source.last_seen_at, last)
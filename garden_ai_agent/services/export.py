@@ -0,0 +1,148 @@
+import csv
+import io
+from itertools import islice
+from typing import Iterator
+
+from ..data.database import db
+from ..data.partitions import frozen_rows, measurement_selects
+
+# Output format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+EXPORT_COLUMNS = ['id', 'garden_location_id', 'measurement_type', 'unit', 'value', 'timestamp',
+                  'period_minutes', 'source', 'notes', 'flagged']
+
+# Enum columns are exported by member name, dictionary-encoded in Arrow formats
+ENUM_COLUMNS = ('measurement_type', 'unit')
+
+
+def _arrow_schema(pa):
+    return pa.schema([
+        ('id', pa.int64()),
+        ('garden_location_id', pa.int64()),
+        ('measurement_type', pa.dictionary(pa.int32(), pa.string())),
+        ('unit', pa.dictionary(pa.int32(), pa.string())),
+        ('value', pa.float64()),
+        ('timestamp', pa.timestamp('us')),
+        ('period_minutes', pa.int64()),
+        ('source', pa.string()),
+        ('notes', pa.string()),
+        ('flagged', pa.bool_()),
+    ])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _batches(filters: dict, batch_size: int):
+    frozen = frozen_rows(EXPORT_COLUMNS, **filters)
+    for batch in iter(lambda: list(islice(frozen, batch_size)), []):
+        yield batch
+    for statement in measurement_selects(EXPORT_COLUMNS, **filters):
+        statement = statement.execution_options(stream_results=True, yield_per=batch_size)
+        for partition in db.session.execute(statement).partitions():
+            yield partition
+
+
+def _csv_rows(filters: dict, batch_size: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in _batches(filters, batch_size):
+        for row in rows:
+            writer.writerow([
+                row.id, row.garden_location_id, row.measurement_type.name, row.unit.name, row.value,
+                row.timestamp.isoformat(), row.period_minutes, row.source, row.notes, int(row.flagged)
+            ])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _arrow_batches(pa, schema, filters: dict, batch_size: int):
+    for rows in _batches(filters, batch_size):
+        arrays = []
+        for field, values in zip(schema, zip(*rows)):
+            if field.name in ENUM_COLUMNS:
+                arrays.append(pa.array([value.name for value in values], pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_measurements(output_format: str, filters: dict, batch_size: int = 10000) -> Iterator[bytes]:
+    """
+    Streams measurements in a file format, one record batch at a time.
+
+    Rows are read from each matching time partition with a streaming cursor in
+    batches of `batch_size`, so memory use does not grow with the number of
+    measurements exported. Arrow output is
+    the Arrow IPC stream format; Parquet output writes one row group per batch.
+
+    Args:
+        output_format: One of `EXPORT_FORMATS`
+        filters: Keyword arguments for `filter_table`
+        batch_size: Rows per batch
+
+    Returns:
+        Iterator[bytes]: Chunks of the exported file
+
+    Raises:
+        ValueError: If the format is unknown
+        ImportError: If the format requires pyarrow and it is not installed
+    """
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError("Invalid value for field: 'format'")
+    if output_format == 'csv':
+        return _csv_rows(filters, batch_size)
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(f"Exporting {output_format} requires pyarrow") from None
+
+    schema = _arrow_schema(pa)
+
+    def generate():
+        sink = _ChunkSink()
+        if output_format == 'arrow':
+            writer = pa.ipc.new_stream(sink, schema)
+            write = writer.write_batch
+        else:
+            writer = pq.ParquetWriter(sink, schema)
+            write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))  # noqa: E731
+        for batch in _arrow_batches(pa, schema, filters, batch_size):
+            write(batch)
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+    return generate()
@@ -0,0 +1,193 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+
+from ..data.database import db, dialect_insert
+from ..data.models import Measurement, LatestMeasurement, MeasurementPartition, MeasurementSource
+from ..data.partitions import month_start, partition_name, partition_table
+from .anomaly import AnomalyDetector
+from .recent import RecentReadings
+
+# Column values are bound with at most this many readings per statement so that
+# lookups stay under SQLite's host parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+ReadingKey = Tuple
+
+
+def _reading_key(measurement: Measurement) -> ReadingKey:
+    return (measurement.garden_location_id, measurement.measurement_type,
+            measurement.timestamp, measurement.source)
+
+
+def _row_values(measurement: Measurement) -> dict:
+    return {
+        'garden_location_id': measurement.garden_location_id,
+        'measurement_type': measurement.measurement_type,
+        'unit': measurement.unit,
+        'value': measurement.value,
+        'timestamp': measurement.timestamp,
+        'period_minutes': measurement.period_minutes,
+        'source': measurement.source,
+        'notes': measurement.notes,
+        'flagged': bool(measurement.flagged)
+    }
+
+
+def _find_existing(keys: List[ReadingKey], session) -> Dict[ReadingKey, Measurement]:
+    key_columns = tuple_(Measurement.garden_location_id, Measurement._measurement_type,
+                         Measurement.timestamp, Measurement.source)
+    existing = {}
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+        for measurement in session.scalars(select(Measurement).where(key_columns.in_(chunk))):
+            existing[_reading_key(measurement)] = measurement
+
+    existing.update(find_archived([key for key in keys if key not in existing], session))
+    return existing
+
+
+def find_archived(keys: List[ReadingKey], session) -> Dict[ReadingKey, Measurement]:
+    """
+    Looks up readings of archived months in their partitions; frozen months are not checked.
+
+    Returns:
+        Dict[ReadingKey, Measurement]: Detached copies of the stored readings, by key
+    """
+    existing = {}
+    by_partition: Dict[str, List[ReadingKey]] = {}
+    for key in keys:
+        by_partition.setdefault(partition_name(month_start(key[2])), []).append(key)
+    if not by_partition:
+        return existing
+    archived = session.scalars(select(MeasurementPartition.name).where(
+        MeasurementPartition.name.in_(list(by_partition)), MeasurementPartition.frozen.is_(False)))
+    for name in archived:
+        table = partition_table(name)
+        key_columns = tuple_(table.c.garden_location_id, table.c.measurement_type, table.c.timestamp, table.c.source)
+        partition_keys = by_partition[name]
+        for start in range(0, len(partition_keys), LOOKUP_CHUNK_SIZE):
+            chunk = partition_keys[start:start + LOOKUP_CHUNK_SIZE]
+            for row in session.execute(select(table).where(key_columns.in_(chunk))):
+                # Detached copy, so that callers can return it like a stored measurement
+                measurement = Measurement(**row._mapping)
+                existing[_reading_key(measurement)] = measurement
+    return existing
+
+
+def _register_sources(names, seen_at: datetime, session) -> None:
+    if not names:
+        return
+    table = MeasurementSource.__table__
+    rows = [{'name': name, 'first_seen_at': seen_at, 'last_seen_at': seen_at} for name in sorted(names)]
+    statement = dialect_insert(table, session)
+    if hasattr(statement, 'on_conflict_do_update'):
+        session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.name], set_={'last_seen_at': seen_at}
+        ), rows)
+        return
+    known = {source.name: source
+             for source in session.scalars(select(MeasurementSource).where(MeasurementSource.name.in_(names)))}
+    for row in rows:
+        if row['name'] in known:
+            known[row['name']].last_seen_at = seen_at
+        else:
+            session.add(MeasurementSource(**row))
+
+
+def ingest_measurements(measurements: List[Measurement], detector: AnomalyDetector, session=None,
+                        recent: Optional[RecentReadings] = None) -> List[Tuple[Measurement, bool]]:
+    """
+    Inserts validated measurements, skipping readings that already exist.
+
+    A reading is a duplicate when a measurement with the same garden location,
+    type, timestamp and source already exists, in the hot table or an archived
+    (not frozen) partition, or appears earlier in the batch;
+    readings without a source are never treated as duplicates. New readings are
+    checked by the anomaly detector, unless they already have a `flagged`
+    value from an earlier attempt, and inserted with a single
+    INSERT ... ON CONFLICT DO NOTHING statement, so a retry racing the original
+    request is also skipped. The latest-value cache and source registry are
+    updated and the transaction is committed; the new readings are then added
+    to the recent readings buffer, if one is given.
+
+    Args:
+        measurements: Transient measurements built from request data
+        detector: Anomaly detector for the current app
+        session: Session to ingest with (defaults to `db.session`); the async
+            ingest service passes the sync session of an `AsyncSession`
+        recent: Recent readings buffer of the current app, if enabled
+
+    Returns:
+        List[Tuple[Measurement, bool]]: For each input, the stored measurement
+        and whether it was created by this call (False for duplicates)
+    """
+    session = session or db.session
+    now = datetime.utcnow()
+    for measurement in measurements:
+        if measurement.timestamp is None:
+            measurement.timestamp = now
+
+    # Collapse duplicates within the batch, then against stored readings
+    first_by_key: Dict[ReadingKey, Measurement] = {}
+    for measurement in measurements:
+        if measurement.source is not None:
+            first_by_key.setdefault(_reading_key(measurement), measurement)
+    existing = _find_existing(list(first_by_key), session) if first_by_key else {}
+
+    new = [m for m in measurements
+           if m.source is None or (first_by_key[_reading_key(m)] is m and _reading_key(m) not in existing)]
+    for measurement in new:
+        # Readings retried after a failed transaction were already added to the statistics
+        if measurement.flagged is None:
+            measurement.flagged = detector.check(measurement, session)
+
+    table = Measurement.__table__
+    keyed = [m for m in new if m.source is not None]
+    unkeyed = [m for m in new if m.source is None]
+    raced = []
+    if keyed:
+        statement = dialect_insert(table, session)
+        if hasattr(statement, 'on_conflict_do_nothing'):
+            statement = statement.on_conflict_do_nothing()
+        inserted = session.execute(
+            statement.returning(table.c.id, table.c.garden_location_id, table.c.measurement_type,
+                                table.c.timestamp, table.c.source),
+            [_row_values(m) for m in keyed]
+        )
+        ids = {tuple(row[1:]): row[0] for row in inserted}
+        for measurement in keyed:
+            measurement.id = ids.get(_reading_key(measurement))
+            if measurement.id is None:
+                raced.append(measurement)
+    if unkeyed:
+        inserted = session.execute(
+            dialect_insert(table, session).returning(table.c.id, sort_by_parameter_order=True),
+            [_row_values(m) for m in unkeyed]
+        )
+        for measurement, row in zip(unkeyed, inserted):
+            measurement.id = row[0]
+    if raced:
+        # Another request inserted these readings between the lookup and the insert
+        existing.update(_find_existing([_reading_key(m) for m in raced], session))
+
+    created = [m for m in new if m.id is not None]
+    for measurement in created:
+        LatestMeasurement.record(measurement, session)
+    _register_sources({m.source for m in measurements if m.source is not None}, now, session)
+    session.commit()
+    detector.maybe_persist(session)
+    if recent is not None:
+        recent.record(created)
+
+    results = []
+    created_ids = {id(m) for m in created}
+    for measurement in measurements:
+        if id(measurement) in created_ids:
+            results.append((measurement, True))
+            continue
+        key = _reading_key(measurement)
+        original = first_by_key[key]
+        results.append((original if id(original) in created_ids else existing[key], False))
+    return results
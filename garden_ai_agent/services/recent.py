@@ -0,0 +1,284 @@
+import threading
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from ..data.database import db
+from ..data.fields import MeasurementType, MeasurementUnit
+from ..data.models import Measurement, MeasurementPartition
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Units are stored per reading as their index in this tuple
+UNITS = tuple(MeasurementUnit)
+UNIT_CODES = {unit: code for code, unit in enumerate(UNITS)}
+
+# Extra time before the window that a warm-up loads
+WARM_MARGIN = timedelta(minutes=5)
+
+StreamKey = Tuple[int, MeasurementType]
+
+# (id, timestamp, value, unit, flagged)
+Reading = Tuple[int, datetime, float, MeasurementUnit, bool]
+
+
+def to_micros(moment: datetime) -> int:
+    return (moment - EPOCH) // MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    return EPOCH + micros * MICROSECOND
+
+
+class RingBuffer:
+    """
+    The most recent readings of one stream, in preallocated typed arrays.
+
+    A reading costs 26 bytes (ID, timestamp in microseconds and value as 8-byte
+    integers and floats, unit code and flag as bytes). Readings are kept in
+    arrival order; once `capacity` is reached each new reading overwrites the
+    oldest arrival. `covered_from` is the time after which the buffer is known
+    to hold every reading of the stream: it starts at the warm-up cutoff and
+    moves forward past any reading that is overwritten. `loaded_id` is the
+    highest ID loaded from the database, so readings recorded by ingest after
+    they were already loaded are not added twice.
+    """
+    __slots__ = ('capacity', 'ids', 'timestamps', 'values', 'units', 'flags', 'next', 'size', 'covered_from',
+                 'loaded_id')
+
+    def __init__(self, capacity: int, covered_from: int, loaded_id: int = 0):
+        self.capacity = capacity
+        self.ids = array('q', bytes(8 * capacity))
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.units = array('b', bytes(capacity))
+        self.flags = array('b', bytes(capacity))
+        self.next = 0
+        self.size = 0
+        self.covered_from = covered_from
+        self.loaded_id = loaded_id
+
+    def append(self, reading_id: int, timestamp: int, value: float, unit: int, flagged: bool) -> None:
+        i = self.next
+        if self.size == self.capacity:
+            self.covered_from = max(self.covered_from, self.timestamps[i])
+        else:
+            self.size += 1
+        self.ids[i] = reading_id
+        self.timestamps[i] = timestamp
+        self.values[i] = value
+        self.units[i] = unit
+        self.flags[i] = flagged
+        self.next = (i + 1) % self.capacity
+
+    def select(self, since: int, flagged: Optional[bool]) -> List[int]:
+        """Returns the slots of readings taken at or after `since`, oldest first."""
+        timestamps, flags = self.timestamps, self.flags
+        slots = [i for i in range(self.size) if timestamps[i] >= since
+                 and (flagged is None or bool(flags[i]) == flagged)]
+        slots.sort(key=timestamps.__getitem__)
+        return slots
+
+    def readings(self, since: int, flagged: Optional[bool]) -> List[Reading]:
+        """Returns the readings taken at or after `since`, oldest first."""
+        return [(self.ids[i], from_micros(self.timestamps[i]), self.values[i], UNITS[self.units[i]],
+                 bool(self.flags[i])) for i in self.select(since, flagged)]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.ids, self.timestamps, self.values, self.units, self.flags))
+
+
+class RecentReadings:
+    """
+    In-memory time series of recent measurements per garden location and type.
+
+    The buffer is warmed from the database on first use with every reading
+    taken within `window`, and afterwards appended to by measurement ingest, so
+    recent-window reads are answered without a query. A read is only served
+    from memory if the buffer holds every reading in the requested range;
+    otherwise (a range older than the warm-up, or a stream whose buffer has
+    overwritten readings in the range) `query` returns None and the caller
+    reads the database. Streams changed by an update or delete are reloaded on
+    their next read.
+
+    Readings written around ingest, by a bulk import or by moving or dropping
+    partitions, are not seen; call `reset` afterwards.
+
+    The buffer only sees readings ingested by its own process. Enable it only
+    where one process serves reads and ingest, or where all ingest goes
+    through the process that serves reads.
+
+    Args:
+        window: How far back the buffer is warmed
+        capacity: Readings kept per stream
+    """
+
+    def __init__(self, window: timedelta, capacity: int = 4096):
+        self.window = window
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._streams: Dict[StreamKey, RingBuffer] = {}
+        self._stale = set()
+        self._warmed_from: Optional[int] = None
+        self._warmed_id = 0
+
+    def record(self, measurements: List[Measurement]) -> None:
+        """
+        Adds newly stored measurements (with IDs) to their streams.
+
+        Before the buffer is warmed nothing is recorded, as the warm-up reads
+        the measurements from the database.
+        """
+        with self._lock:
+            if self._warmed_from is None:
+                return
+            for measurement in measurements:
+                key = (measurement.garden_location_id, measurement.measurement_type)
+                timestamp = to_micros(measurement.timestamp)
+                stream = self._streams.get(key)
+                if stream is None:
+                    if timestamp <= self._warmed_from or measurement.id <= self._warmed_id:
+                        continue
+                    stream = self._streams[key] = RingBuffer(self.capacity, self._warmed_from)
+                if timestamp > stream.covered_from and measurement.id > stream.loaded_id:
+                    stream.append(measurement.id, timestamp, measurement.value, UNIT_CODES[measurement.unit],
+                                  bool(measurement.flagged))
+
+    def invalidate(self, garden_location_id: int, measurement_type: MeasurementType) -> None:
+        """Marks a stream for reloading after one of its readings was changed or deleted."""
+        with self._lock:
+            self._stale.add((garden_location_id, measurement_type))
+
+    def reset(self) -> None:
+        """Drops every stream, so that the buffer is warmed from the database again on next use."""
+        with self._lock:
+            self._streams = {}
+            self._stale = set()
+            self._warmed_from = None
+            self._warmed_id = 0
+
+    def query(self, garden_location_id: int, measurement_type: MeasurementType, since: datetime,
+              flagged: Optional[bool] = None) -> Optional[List[Reading]]:
+        """
+        Returns a stream's readings taken at or after `since`, oldest first.
+
+        Args:
+            garden_location_id: Garden location of the stream
+            measurement_type: Measurement type of the stream
+            since: Only readings taken at or after this time
+            flagged: Only readings that were (True) or were not (False) flagged
+
+        Returns:
+            Optional[List[Reading]]: The readings, or None if the buffer does
+            not cover the range and the database must be read instead
+        """
+        self._ensure_warm()
+        key = (garden_location_id, measurement_type)
+        if key in self._stale:
+            self._reload(key)
+        since_micros = to_micros(since)
+        with self._lock:
+            stream = self._streams.get(key)
+            covered_from = stream.covered_from if stream is not None else self._warmed_from
+            if since_micros <= covered_from:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if stream is None:
+                return []
+            return stream.readings(since_micros, flagged)
+
+    def latest(self, garden_location_id: Optional[int] = None,
+               measurement_type: Optional[MeasurementType] = None) -> Optional[List[dict]]:
+        """
+        Returns the latest-value table, if the buffer holds it.
+
+        The in-process buffer does not, so callers read `LatestMeasurement`;
+        see `SharedRecentReadings.latest`.
+        """
+        return None
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the readings' arrays."""
+        with self._lock:
+            return sum(stream.nbytes for stream in self._streams.values())
+
+    def _ensure_warm(self) -> None:
+        if self._warmed_from is not None:
+            return
+        with self._lock:
+            if self._warmed_from is not None:
+                return
+            cutoff = warm_cutoff(self.window)
+            streams = {}
+            for row in db.session.execute(recent_rows(cutoff)):
+                key = (row.garden_location_id, row.measurement_type)
+                stream = streams.get(key)
+                if stream is None:
+                    stream = streams[key] = RingBuffer(self.capacity, to_micros(cutoff))
+                append_row(stream, row)
+            self._streams = streams
+            self._warmed_id = max((stream.loaded_id for stream in streams.values()), default=0)
+            self._warmed_from = to_micros(cutoff)
+
+    def _reload(self, key: StreamKey) -> None:
+        # Holds the lock while reading so that no ingest is recorded in the stream being replaced
+        with self._lock:
+            stream = RingBuffer(self.capacity, self._warmed_from)
+            load_stream(stream, key)
+            self._stale.discard(key)
+            self._streams[key] = stream
+
+
+def warm_cutoff(window: timedelta) -> datetime:
+    """
+    Returns the time a buffer warmed now covers readings after.
+
+    That is a little more than `window` ago, so that a read of the whole
+    window right after warming is covered, but not before the end of the
+    newest archived month: only the hot table is loaded, so older reads must
+    go to the database.
+    """
+    cutoff = datetime.utcnow() - window - WARM_MARGIN
+    archived_until = db.session.scalar(select(func.max(MeasurementPartition.period_end)))
+    return max(cutoff, archived_until) if archived_until is not None else cutoff
+
+
+def recent_rows(cutoff: datetime):
+    """Returns a select of the readings taken after `cutoff`, oldest first."""
+    table = Measurement.__table__
+    return select(table.c.id, table.c.garden_location_id, table.c.measurement_type, table.c.unit,
+                  table.c.value, table.c.timestamp, table.c.flagged) \
+        .where(table.c.timestamp > cutoff).order_by(table.c.timestamp, table.c.id)
+
+
+def append_row(stream: RingBuffer, row) -> None:
+    """Appends a row of `recent_rows` to a stream loaded from the database."""
+    stream.append(row.id, to_micros(row.timestamp), row.value, UNIT_CODES[row.unit], row.flagged)
+    stream.loaded_id = max(stream.loaded_id, row.id)
+
+
+def load_stream(stream: RingBuffer, key: StreamKey) -> None:
+    """
+    Fills an empty stream with its readings taken after its `covered_from`.
+
+    Only the newest `capacity` readings are loaded; if there are more,
+    `covered_from` moves forward to the oldest one loaded.
+    """
+    table = Measurement.__table__
+    statement = recent_rows(from_micros(stream.covered_from)) \
+        .where(table.c.garden_location_id == key[0], table.c.measurement_type == key[1]) \
+        .order_by(None).order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(stream.capacity)
+    rows = db.session.execute(statement).all()
+    for row in reversed(rows):
+        append_row(stream, row)
+    if len(rows) == stream.capacity:
+        # Older readings did not fit; ones at the same time as the oldest may be among them
+        stream.covered_from = to_micros(rows[-1].timestamp)
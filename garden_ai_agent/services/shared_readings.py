@@ -0,0 +1,398 @@
+"""
+Recent readings and latest values shared by all worker processes.
+
+`SharedRecentReadings` keeps the same ring buffers as `RecentReadings`, plus
+the latest-value table, in one memory-mapped file, so every gunicorn worker
+reads the same pages instead of building and warming its own copy.
+
+Layout of the file (native byte order):
+
+    header     HEADER_FIELDS int64s
+    meta       META_FIELDS int64s per stream slot
+    latest     one float64 per stream slot, the latest value
+    data       per stream slot: IDs and timestamps (int64), values (float64),
+               unit codes and flags (int8), `capacity` of each
+
+Writes (ingest, invalidation, warm-up and reloads) hold an exclusive `flock`
+on the file, so there is a single writer at a time across processes. Reads
+take no lock: each slot has a sequence number that writers make odd while
+they change the slot, and a reader retries if the number was odd or changed
+while it copied the readings out.
+"""
+import fcntl
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from ..data.database import db
+from ..data.fields import MeasurementType
+from ..data.models import LatestMeasurement, Measurement
+from .recent import (
+    UNIT_CODES, UNITS, Reading, RingBuffer, StreamKey, append_row, from_micros, load_stream, recent_rows, to_micros,
+    warm_cutoff
+)
+
+MAGIC = int.from_bytes(b'GRDNRR01', 'little')
+
+TYPES = tuple(MeasurementType)
+TYPE_CODES = {measurement_type: code for code, measurement_type in enumerate(TYPES)}
+
+# Header fields
+HEADER_FIELDS = 16
+H_MAGIC, H_READY, H_GENERATION, H_CAPACITY, H_MAX_STREAMS, H_STREAM_COUNT, H_WARMED_FROM, H_WARMED_ID, \
+    H_OVERFLOW = range(9)
+
+# Stream slot fields
+META_FIELDS = 16
+M_SEQ, M_LOCATION, M_TYPE, M_NEXT, M_SIZE, M_COVERED_FROM, M_LOADED_ID, M_STALE, M_LATEST_ID, \
+    M_LATEST_TIMESTAMP, M_LATEST_UNIT = range(11)
+
+# Attempts at a consistent read of a slot before falling back to the database
+READ_RETRIES = 100
+
+
+def _meta_field(index: int) -> property:
+    return property(lambda self: self.meta[index], lambda self, value: self.meta.__setitem__(index, value))
+
+
+class SharedStream(RingBuffer):
+    """A `RingBuffer` over a stream slot of the shared file."""
+    __slots__ = ('meta',)
+
+    next = _meta_field(M_NEXT)
+    size = _meta_field(M_SIZE)
+    covered_from = _meta_field(M_COVERED_FROM)
+    loaded_id = _meta_field(M_LOADED_ID)
+
+    def __init__(self, capacity: int, meta: memoryview, data: memoryview):
+        self.capacity = capacity
+        self.meta = meta
+        words = 8 * capacity
+        self.ids = data[:words].cast('q')
+        self.timestamps = data[words:2 * words].cast('q')
+        self.values = data[2 * words:3 * words].cast('d')
+        self.units = data[3 * words:3 * words + capacity].cast('b')
+        self.flags = data[3 * words + capacity:3 * words + 2 * capacity].cast('b')
+
+    def clear(self, covered_from: int) -> None:
+        self.next = 0
+        self.size = 0
+        self.covered_from = covered_from
+        self.loaded_id = 0
+
+
+class SharedRecentReadings:
+    """
+    Recent readings and latest values per stream, shared across processes.
+
+    Works like `RecentReadings`, and additionally serves the latest-value
+    table. The file is warmed from the database by the first process to use
+    it; all processes that ingest or serve reads must open the same path with
+    the same `capacity` and `max_streams`. Streams beyond `max_streams` are
+    not tracked: reads of them, and of the latest-value table, then go to the
+    database.
+
+    The file is sized for `max_streams` full buffers but is sparse: pages are
+    only backed by memory once written. Put it on a tmpfs such as /dev/shm.
+
+    Args:
+        path: File to map
+        window: How far back the buffer is warmed
+        capacity: Readings kept per stream
+        max_streams: Streams the file has slots for
+    """
+
+    def __init__(self, path: str, window: timedelta, capacity: int = 4096, max_streams: int = 1024):
+        self.path = path
+        self.window = window
+        self.capacity = capacity
+        self.max_streams = max_streams
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+
+        meta_offset = 8 * HEADER_FIELDS
+        latest_offset = meta_offset + 8 * META_FIELDS * max_streams
+        self._data_offset = latest_offset + 8 * max_streams
+        # Rounded up so that every slot's arrays stay 8-byte aligned
+        self._slot_bytes = (26 * capacity + 7) // 8 * 8
+        size = self._data_offset + self._slot_bytes * max_streams
+        with self._write_lock():
+            if os.fstat(self._file.fileno()).st_size != size:
+                self._file.truncate(0)
+                self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        view = memoryview(self._map)
+        self._header = view[:meta_offset].cast('q')
+        self._meta = view[meta_offset:latest_offset].cast('q')
+        self._latest_values = view[latest_offset:self._data_offset].cast('d')
+        self._view = view
+
+        self._generation = None
+        self._slots: Dict[StreamKey, int] = {}
+        self._streams: List[SharedStream] = []
+
+    def record(self, measurements: List[Measurement]) -> None:
+        """
+        Adds newly stored measurements (with IDs) to their streams and the latest values.
+
+        While the file is not warm nothing is recorded, as the next warm-up
+        reads the measurements from the database. This needs no database
+        session, so ingest services outside the Flask app can record too.
+        """
+        with self._write_lock():
+            if not self._is_warm():
+                return
+            warmed_id = self._header[H_WARMED_ID]
+            for measurement in measurements:
+                if measurement.id <= warmed_id:
+                    continue
+                slot = self._slot((measurement.garden_location_id, measurement.measurement_type), create=True)
+                if slot is None:
+                    continue
+                stream = self._streams[slot]
+                timestamp = to_micros(measurement.timestamp)
+                with self._changing(stream):
+                    if timestamp > stream.covered_from and measurement.id > stream.loaded_id:
+                        stream.append(measurement.id, timestamp, measurement.value, UNIT_CODES[measurement.unit],
+                                      bool(measurement.flagged))
+                    meta = stream.meta
+                    if not measurement.flagged and (meta[M_LATEST_ID] == 0
+                                                    or meta[M_LATEST_TIMESTAMP] <= timestamp):
+                        self._set_latest(slot, measurement.id, timestamp, measurement.value, measurement.unit)
+
+    def invalidate(self, garden_location_id: int, measurement_type: MeasurementType) -> None:
+        """Marks a stream for reloading after one of its readings was changed or deleted."""
+        self._ensure_warm()
+        with self._write_lock():
+            slot = self._slot((garden_location_id, measurement_type), create=True)
+            if slot is not None:
+                self._streams[slot].meta[M_STALE] = 1
+
+    def query(self, garden_location_id: int, measurement_type: MeasurementType, since: datetime,
+              flagged: Optional[bool] = None) -> Optional[List[Reading]]:
+        """
+        Returns a stream's readings taken at or after `since`, oldest first.
+
+        Returns:
+            Optional[List[Reading]]: The readings, or None if the file does
+            not cover the range and the database must be read instead
+        """
+        self._ensure_warm()
+        since_micros = to_micros(since)
+        slot = self._slot((garden_location_id, measurement_type))
+        if slot is None:
+            covered = not self._header[H_OVERFLOW] and since_micros > self._header[H_WARMED_FROM]
+            readings = [] if covered else None
+        else:
+            readings = self._read(slot, lambda stream: stream.readings(since_micros, flagged)
+                                  if since_micros > stream.covered_from else None)
+        if readings is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return readings
+
+    def latest(self, garden_location_id: Optional[int] = None,
+               measurement_type: Optional[MeasurementType] = None) -> Optional[List[dict]]:
+        """
+        Returns the latest-value table, like `LatestMeasurement`.
+
+        Args:
+            garden_location_id: Only this garden location
+            measurement_type: Only this measurement type
+
+        Returns:
+            Optional[List[dict]]: Latest reading per stream, ordered by garden
+            location, or None if the database must be read instead
+        """
+        self._ensure_warm()
+        if self._header[H_OVERFLOW]:
+            return None
+        self._refresh_index()
+        latest = []
+        for (location_id, stream_type), slot in list(self._slots.items()):
+            if garden_location_id is not None and location_id != garden_location_id:
+                continue
+            if measurement_type is not None and stream_type is not measurement_type:
+                continue
+            row = self._read(slot, lambda stream: self._latest_row(slot, stream.meta))
+            if row is None:
+                return None
+            if row:
+                latest.append(row)
+        latest.sort(key=lambda row: (row['garden_location_id'], TYPE_CODES[row['measurement_type']]))
+        return latest
+
+    def reset(self) -> None:
+        """
+        Marks the file for warming from the database, e.g. when the server
+        starts, or after readings were imported, archived or dropped.
+        """
+        with self._write_lock():
+            self._header[H_READY] = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the mapped file, shared by all processes."""
+        return len(self._map)
+
+    @contextmanager
+    def _write_lock(self):
+        # flock excludes other processes; the thread lock other threads of this one
+        with self._lock:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _changing(self, stream: SharedStream):
+        meta = stream.meta
+        if meta[M_SEQ] & 1:
+            # A writer died while changing the slot
+            meta[M_SEQ] += 1
+            meta[M_STALE] = 1
+        meta[M_SEQ] += 1
+        try:
+            yield
+        finally:
+            meta[M_SEQ] += 1
+
+    def _read(self, slot: int, read):
+        """Calls `read` with the slot's stream until it sees no concurrent write."""
+        stream = self._streams[slot]
+        meta = stream.meta
+        for _ in range(READ_RETRIES):
+            if meta[M_STALE]:
+                self._reload(slot)
+            seq = meta[M_SEQ]
+            if seq & 1:
+                continue
+            try:
+                result = read(stream)
+            except (IndexError, OverflowError, KeyError):
+                # Torn read of a slot being written
+                continue
+            if meta[M_SEQ] == seq and self._header[H_GENERATION] == self._generation:
+                return result
+        return None
+
+    def _latest_row(self, slot: int, meta: memoryview) -> dict:
+        if meta[M_LATEST_ID] == 0:
+            return {}
+        return {
+            'garden_location_id': meta[M_LOCATION],
+            'measurement_type': TYPES[meta[M_TYPE]],
+            'measurement_id': meta[M_LATEST_ID],
+            'unit': UNITS[meta[M_LATEST_UNIT]],
+            'value': self._latest_values[slot],
+            'timestamp': from_micros(meta[M_LATEST_TIMESTAMP])
+        }
+
+    def _set_latest(self, slot: int, measurement_id: int, timestamp: int, value: float, unit) -> None:
+        meta = self._streams[slot].meta
+        meta[M_LATEST_ID] = measurement_id
+        meta[M_LATEST_TIMESTAMP] = timestamp
+        meta[M_LATEST_UNIT] = UNIT_CODES[unit]
+        self._latest_values[slot] = value
+
+    def _refresh_index(self) -> None:
+        """Picks up slots added by other processes since the last call."""
+        header = self._header
+        if header[H_GENERATION] != self._generation:
+            self._generation = header[H_GENERATION]
+            self._slots = {}
+            self._streams = []
+        for slot in range(len(self._streams), header[H_STREAM_COUNT]):
+            meta = self._meta[slot * META_FIELDS:(slot + 1) * META_FIELDS]
+            data = self._view[self._data_offset + slot * self._slot_bytes:
+                              self._data_offset + (slot + 1) * self._slot_bytes]
+            self._streams.append(SharedStream(self.capacity, meta, data))
+            self._slots[(meta[M_LOCATION], TYPES[meta[M_TYPE]])] = slot
+
+    def _slot(self, key: StreamKey, create: bool = False) -> Optional[int]:
+        """Returns a stream's slot; slots can only be created under the write lock."""
+        self._refresh_index()
+        slot = self._slots.get(key)
+        if slot is not None or not create:
+            return slot
+        header = self._header
+        slot = header[H_STREAM_COUNT]
+        if slot == self.max_streams:
+            header[H_OVERFLOW] = 1
+            return None
+        # Unused slots were zeroed by the warm-up
+        meta = self._meta[slot * META_FIELDS:(slot + 1) * META_FIELDS]
+        meta[M_LOCATION] = key[0]
+        meta[M_TYPE] = TYPE_CODES[key[1]]
+        meta[M_COVERED_FROM] = header[H_WARMED_FROM]
+        # The key is written before the count so readers never see an empty slot
+        header[H_STREAM_COUNT] = slot + 1
+        self._refresh_index()
+        return slot
+
+    def _is_warm(self) -> bool:
+        header = self._header
+        return bool(header[H_READY] and header[H_MAGIC] == MAGIC and header[H_CAPACITY] == self.capacity
+                    and header[H_MAX_STREAMS] == self.max_streams)
+
+    def _ensure_warm(self) -> None:
+        header = self._header
+        if header[H_READY] and header[H_GENERATION] == self._generation:
+            return
+        with self._write_lock():
+            if not self._is_warm():
+                self._warm()
+            self._refresh_index()
+
+    def _warm(self) -> None:
+        header = self._header
+        generation = header[H_GENERATION] + 1
+        header[H_READY] = 0
+        self._view[:self._data_offset] = bytes(self._data_offset)
+        cutoff = warm_cutoff(self.window)
+        header[H_MAGIC] = MAGIC
+        header[H_CAPACITY] = self.capacity
+        header[H_MAX_STREAMS] = self.max_streams
+        header[H_WARMED_FROM] = to_micros(cutoff)
+        header[H_GENERATION] = generation
+        self._refresh_index()
+
+        warmed_id = 0
+        for latest in LatestMeasurement.query:
+            slot = self._slot((latest.garden_location_id, latest.measurement_type), create=True)
+            if slot is not None:
+                self._set_latest(slot, latest.measurement_id, to_micros(latest.timestamp), latest.value,
+                                 latest.unit)
+                warmed_id = max(warmed_id, latest.measurement_id)
+        for row in db.session.execute(recent_rows(cutoff)):
+            slot = self._slot((row.garden_location_id, row.measurement_type), create=True)
+            if slot is not None:
+                append_row(self._streams[slot], row)
+                warmed_id = max(warmed_id, row.id)
+        header[H_WARMED_ID] = warmed_id
+        header[H_READY] = 1
+
+    def _reload(self, slot: int) -> None:
+        with self._write_lock():
+            stream = self._streams[slot]
+            meta = stream.meta
+            if not meta[M_STALE]:
+                return
+            key = (meta[M_LOCATION], TYPES[meta[M_TYPE]])
+            with self._changing(stream):
+                stream.clear(self._header[H_WARMED_FROM])
+                load_stream(stream, key)
+                latest = db.session.get(LatestMeasurement, key)
+                if latest is None:
+                    meta[M_LATEST_ID] = 0
+                else:
+                    self._set_latest(slot, latest.measurement_id, to_micros(latest.timestamp), latest.value,
+                                     latest.unit)
+                meta[M_STALE] = 0
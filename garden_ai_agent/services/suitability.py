@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..data.database import db
+from ..data.models import Plant, GardenLocation, Measurement, LatestMeasurement
+from ..data.fields import MeasurementType
+
+# Bumped whenever committed data that affects suitability changes
+_generation = 0
+
+# Files touched on every invalidation, so that other processes see it too
+_generation_paths: Set[str] = set()
+
+
+def invalidate() -> None:
+    """Marks every compatibility matrix, in this and other processes, as stale so it is rebuilt on next use."""
+    global _generation
+    _generation += 1
+    for path in _generation_paths:
+        with open(path, 'a'):
+            os.utime(path)
+
+
+def _shared_generation(path: Optional[str]) -> int:
+    if path is None:
+        return 0
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _affects_suitability(obj) -> bool:
+    if isinstance(obj, (Plant, GardenLocation)):
+        return True
+    if isinstance(obj, (Measurement, LatestMeasurement)):
+        return obj.measurement_type == MeasurementType.SOIL_PH
+    return False
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_changes(session, flush_context):
+    if any(_affects_suitability(obj) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info['suitability_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('suitability_changed', False):
+        invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('suitability_changed', None)
+
+
+def _bitmask(flags) -> int:
+    """Packs an iterable of booleans into an int where bit i is set if flags[i] is true."""
+    bits = ''.join('1' if flag else '0' for flag in flags)
+    return int(bits[::-1], 2) if bits else 0
+
+
+def _bit_indexes(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class SuitabilityMatcher:
+    """
+    Precomputed plant x garden location compatibility matrix.
+
+    A plant fits a location when the location's hardiness zone lies within the
+    plant's hardiness range and the location's most recent soil pH reading lies
+    within the plant's preferred pH range. Unknown values on either side do not
+    exclude a match.
+
+    The matrix is stored as one bitset per location (bit i set when the i-th
+    plant fits). Per-zone plant bitsets are computed once per build, so a
+    location's row costs one AND with a pH bitset. The matrix is rebuilt lazily
+    after committed changes to plants, locations or soil pH measurements, or
+    once it is older than `max_age` so that soil pH readings age out.
+
+    Changes committed by other processes are only seen through
+    `generation_path`, a file whose modification time every commit that
+    invalidates the matrix updates; without it, other workers' matrices stay
+    stale for up to `max_age`.
+    """
+
+    def __init__(self, soil_ph_max_age: timedelta = timedelta(days=90), max_age: float = 3600.0,
+                 generation_path: Optional[str] = None):
+        self.soil_ph_max_age = soil_ph_max_age
+        self.max_age = max_age
+        self.generation_path = generation_path
+        if generation_path is not None:
+            os.makedirs(os.path.dirname(generation_path) or '.', exist_ok=True)
+            _generation_paths.add(generation_path)
+        self._lock = threading.Lock()
+        self._built_generation = None
+        self._built_at = 0.0
+        self._plant_ids: List[int] = []
+        self._plant_index: Dict[int, int] = {}
+        self._rows: Dict[int, int] = {}
+
+    def suitable_plant_ids(self, garden_location_id: int) -> List[int]:
+        """
+        Gets the IDs of plants that fit a garden location.
+
+        Args:
+            garden_location_id: ID of the garden location
+
+        Returns:
+            List[int]: Plant IDs in ascending order
+        """
+        self._ensure_current()
+        row = self._rows.get(garden_location_id, 0)
+        return [self._plant_ids[i] for i in _bit_indexes(row)]
+
+    def suitable_location_ids(self, plant_id: int) -> List[int]:
+        """
+        Gets the IDs of garden locations that a plant fits.
+
+        Args:
+            plant_id: ID of the plant
+
+        Returns:
+            List[int]: Garden location IDs in ascending order
+        """
+        self._ensure_current()
+        index = self._plant_index.get(plant_id)
+        if index is None:
+            return []
+        return [location_id for location_id, row in self._rows.items() if row >> index & 1]
+
+    def _ensure_current(self) -> None:
+        with self._lock:
+            generation = (_generation, _shared_generation(self.generation_path))
+            if self._built_generation == generation and time.monotonic() - self._built_at < self.max_age:
+                return
+            self._build()
+            self._built_generation = generation
+            self._built_at = time.monotonic()
+
+    def _build(self) -> None:
+        plants = (db.session.query(Plant.id, Plant.hardiness_zone_min, Plant.hardiness_zone_max,
+                                   Plant.preferred_soil_ph_min, Plant.preferred_soil_ph_max)
+                  .order_by(Plant.id)
+                  .all())
+        plant_ids = [plant[0] for plant in plants]
+        zone_min = [plant[1] for plant in plants]
+        zone_max = [plant[2] for plant in plants]
+        ph_min = [plant[3] for plant in plants]
+        ph_max = [plant[4] for plant in plants]
+
+        all_plants = (1 << len(plants)) - 1
+        zone_masks = {
+            zone: _bitmask((lo is None or lo <= zone) and (hi is None or hi >= zone)
+                           for lo, hi in zip(zone_min, zone_max))
+            for zone in range(1, 14)
+        }
+
+        ph_cutoff = datetime.utcnow() - self.soil_ph_max_age
+        soil_ph = dict(db.session.query(LatestMeasurement.garden_location_id, LatestMeasurement.value)
+                       .filter(LatestMeasurement.measurement_type == MeasurementType.SOIL_PH,
+                               LatestMeasurement.timestamp >= ph_cutoff))
+        ph_masks: Dict[float, int] = {}
+
+        rows = {}
+        for location_id, zone in (db.session.query(GardenLocation.id, GardenLocation.hardiness_zone)
+                                  .order_by(GardenLocation.id)):
+            row = zone_masks.get(zone, all_plants)
+            ph: Optional[float] = soil_ph.get(location_id)
+            if ph is not None:
+                if ph not in ph_masks:
+                    ph_masks[ph] = _bitmask((lo is None or lo <= ph) and (hi is None or hi >= ph)
+                                            for lo, hi in zip(ph_min, ph_max))
+                row &= ph_masks[ph]
+            rows[location_id] = row
+
+        self._plant_ids = plant_ids
+        self._plant_index = {plant_id: i for i, plant_id in enumerate(plant_ids)}
+        self._rows = rows
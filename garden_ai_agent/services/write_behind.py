@@ -0,0 +1,291 @@
+import fcntl
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+from ..data.database import db
+from .ingest import ingest_measurements
+
+logger = logging.getLogger(__name__)
+
+# Seconds for which the status of a finished submission can still be looked up
+STATUS_RETENTION_SECONDS = 3600
+
+LOG_PATTERN = 'ingest-*.log'
+
+STATUS_DIR = 'status'
+
+# Ingest IDs are file names in the status directory
+INGEST_ID_PATTERN = re.compile(r'[0-9A-Za-z_-]+')
+
+
+class WriteBehindQueue:
+    """
+    Acknowledges measurement submissions before they are committed.
+
+    Validated submissions are appended to a local log (fsynced when `fsync` is
+    set) and queued in memory; a flusher thread ingests everything queued within
+    `max_delay` seconds, or up to `max_batch` readings, in one transaction, and
+    then appends a commit marker for the submissions it stored. The log is
+    truncated whenever nothing is pending.
+
+    Each queue writes its own log file in `log_dir` and holds an exclusive lock
+    on it, so several worker processes can share the directory. On start, logs
+    left behind by processes that died are replayed: submissions without a
+    commit marker are ingested again, where duplicate readings are skipped.
+
+    Submission statuses are files in the `status` subdirectory, so any worker
+    sharing `log_dir` can report them: an empty file while the submission is
+    pending, and its result once it is finished. Results are removed after
+    `STATUS_RETENTION_SECONDS`.
+
+    Args:
+        app: Flask app whose database and anomaly detector are used
+        log_dir: Directory for the append logs
+        max_batch: Readings that trigger a flush regardless of `max_delay`
+        max_delay: Seconds a submission may wait before it is flushed
+        fsync: Whether to fsync the log before acknowledging a submission
+    """
+
+    def __init__(self, app, log_dir: str, max_batch: int = 1000, max_delay: float = 0.05, fsync: bool = True):
+        self.app = app
+        self.log_dir = log_dir
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.status_dir = os.path.join(log_dir, STATUS_DIR)
+        self._queue: queue.Queue = queue.Queue()
+        self._log_lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._pending = set()
+        self._pruned = 0.0
+        self._stopped = threading.Event()
+        self._log = None
+        self._thread = None
+
+    def start(self) -> None:
+        """Opens the log, replays logs left by dead processes and starts the flusher."""
+        os.makedirs(self.status_dir, exist_ok=True)
+        path = os.path.join(self.log_dir, f'ingest-{os.getpid()}-{uuid.uuid4().hex[:8]}.log')
+        self._log = open(path, 'a+b')
+        fcntl.flock(self._log, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._recover()
+        self._thread = threading.Thread(target=self._run, name='write-behind-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flushes everything queued and stops the flusher."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._log.close()
+        os.unlink(self._log.name)
+
+    def submit(self, items: List[dict]) -> str:
+        """
+        Logs and queues validated measurement input.
+
+        Args:
+            items: Measurement input dicts, already validated, with timestamps filled in
+
+        Returns:
+            str: Ingest ID for looking up the submission's status
+        """
+        ingest_id = uuid.uuid4().hex
+        record = json.dumps({'id': ingest_id, 'measurements': items}).encode() + b'\n'
+        with self._status_lock:
+            self._pending.add(ingest_id)
+        # The log is the durable record; the status file only has to be visible to other workers
+        open(self._status_path(ingest_id), 'wb').close()
+        with self._log_lock:
+            self._log.write(record)
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+        self._queue.put((ingest_id, items))
+        return ingest_id
+
+    @property
+    def pending(self) -> int:
+        """Number of submissions acknowledged but not yet committed."""
+        with self._status_lock:
+            return len(self._pending)
+
+    def status(self, ingest_id: str) -> Optional[dict]:
+        """Returns the status of a submission made to any worker sharing the log directory, or None if it is unknown."""
+        if not INGEST_ID_PATTERN.fullmatch(ingest_id):
+            return None
+        try:
+            with open(self._status_path(ingest_id), 'rb') as f:
+                result = f.read()
+        except FileNotFoundError:
+            return None
+        if not result:
+            return {'ingest_id': ingest_id, 'status': 'pending'}
+        return json.loads(result)
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Waits until everything submitted so far has been flushed."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._status_lock:
+                if not self._pending:
+                    return
+            time.sleep(0.005)
+        raise TimeoutError('Write-behind queue did not flush in time')
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            group = [item]
+            size = len(item[1])
+            deadline = time.monotonic() + self.max_delay
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._stopped.set()
+                    break
+                group.append(item)
+                size += len(item[1])
+            self._commit(group)
+            self._prune_statuses()
+            if self._stopped.is_set() and self._queue.empty():
+                return
+
+    def _commit(self, group) -> None:
+        # Imported here to avoid a circular import between the API and services
+        from ..api.measurement import measurement_from_input
+
+        with self.app.app_context():
+            built = []
+            for ingest_id, items in group:
+                try:
+                    built.append((ingest_id, [measurement_from_input(data) for data in items]))
+                except Exception:
+                    self._fail(ingest_id)
+            if built:
+                self._store(built)
+
+    def _store(self, group) -> None:
+        # The same measurements are retried one submission at a time, so
+        # readings the failed group already checked are not checked again
+        try:
+            self._ingest(group)
+        except Exception:
+            db.session.rollback()
+            if len(group) > 1:
+                for item in group:
+                    self._store([item])
+                return
+            self._fail(group[0][0])
+
+    def _fail(self, ingest_id: str) -> None:
+        logger.exception("Failed to store write-behind submission %s", ingest_id)
+        self._finish(ingest_id, {'ingest_id': ingest_id, 'status': 'failed'})
+        self._mark_committed([ingest_id])
+
+    def _ingest(self, group) -> None:
+        measurements = [measurement for _, submission in group for measurement in submission]
+        results = ingest_measurements(measurements, self.app.extensions['anomaly_detector'],
+                                      recent=self.app.extensions.get('recent_readings'))
+        start = 0
+        for ingest_id, submission in group:
+            stored = results[start:start + len(submission)]
+            start += len(submission)
+            self._finish(ingest_id, {
+                'ingest_id': ingest_id,
+                'status': 'committed',
+                'created': [measurement.id for measurement, is_new in stored if is_new],
+                'duplicates': [measurement.id for measurement, is_new in stored if not is_new]
+            })
+        self._mark_committed([ingest_id for ingest_id, _ in group])
+
+    def _status_path(self, ingest_id: str) -> str:
+        return os.path.join(self.status_dir, ingest_id)
+
+    def _finish(self, ingest_id: str, result: dict) -> None:
+        # Replaced atomically, so readers never see a partly written result
+        path = self._status_path(ingest_id)
+        with open(f'{path}.tmp', 'wb') as f:
+            f.write(json.dumps(result).encode())
+        os.replace(f'{path}.tmp', path)
+        with self._status_lock:
+            self._pending.discard(ingest_id)
+
+    def _prune_statuses(self) -> None:
+        now = time.time()
+        if now - self._pruned < STATUS_RETENTION_SECONDS / 10:
+            return
+        self._pruned = now
+        with os.scandir(self.status_dir) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                    # Pending submissions keep their (empty) status file
+                    if stat.st_size and now - stat.st_mtime > STATUS_RETENTION_SECONDS:
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+
+    def _mark_committed(self, ingest_ids: List[str]) -> None:
+        with self._log_lock:
+            with self._status_lock:
+                idle = not self._pending
+            if idle:
+                self._log.truncate(0)
+            else:
+                self._log.write(json.dumps({'committed': ingest_ids}).encode() + b'\n')
+                self._log.flush()
+
+    def _recover(self) -> None:
+        for path in sorted(glob.glob(os.path.join(self.log_dir, LOG_PATTERN))):
+            if path == self._log.name:
+                continue
+            with open(path, 'rb') as log:
+                try:
+                    fcntl.flock(log, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Owned by a live process
+                    continue
+                if os.fstat(log.fileno()).st_nlink == 0:
+                    # Replayed and unlinked by another process after we opened it
+                    continue
+                submissions = OrderedDict()
+                for line in log:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Partially written record from a crash
+                        continue
+                    if 'committed' in record:
+                        for ingest_id in record['committed']:
+                            submissions.pop(ingest_id, None)
+                    else:
+                        submissions[record['id']] = record['measurements']
+                if submissions:
+                    logger.info("Replaying %d uncommitted submissions from %s", len(submissions), path)
+                    for ingest_id, items in submissions.items():
+                        with self._status_lock:
+                            self._pending.add(ingest_id)
+                    self._commit(list(submissions.items()))
+                # Unlinked while still locked, so no other process can replay it again
+                os.unlink(path)
@@ -0,0 +1,4 @@
+from garden_ai_agent.server import main
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,228 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from garden_ai_agent import create_app
+from garden_ai_agent.data.database import db
+from garden_ai_agent.data.fields import MeasurementType, MeasurementUnit
+from garden_ai_agent.data.models import Measurement
+from garden_ai_agent.representations import json_encoder
+from garden_ai_agent.server import check_production_app, serve, server_options
 from .test_api import APITest
 
 class Test_App(APITest):
 
     def test_app_creation(self):
         self.assertIsNotNone(self.app)
+
+    def test_metrics_endpoint(self):
+        self.app.config['SERVER_TIMING_ENABLED'] = True
+        response = self.client.get('/garden_locations/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('sql;dur=', response.headers['Server-Timing'])
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('garden_http_requests_total{endpoint="/garden_locations/",method="GET",status="200"} 1',
+                      response.text)
+        self.assertIn('garden_sql_statements_total{endpoint="/garden_locations/",method="GET"} 1', response.text)
+
+    def test_slow_query_log(self):
+        self.app.extensions['slow_query_log'].threshold = 0
+        with self.assertLogs('sqlalchemy.engine.slow_query', 'WARNING') as logs:
+            response = self.client.get('/measurements/?flagged=true')
+        self.assertEqual(response.status_code, 200)
+        output = '\n'.join(logs.output)
+        self.assertIn('from GET /measurements/', output)
+        self.assertIn('FROM measurements', output)
+        self.assertIn('Query plan:\n  SEARCH measurements USING INDEX', output)
+
+    def test_production_server_refuses_debug(self):
+        check_production_app(self.app)
+        self.app.debug = True
+        with self.assertRaises(RuntimeError):
+            check_production_app(self.app)
+
+        options = server_options(workers=3, threads=4)
+        self.assertEqual(options['workers'], 3)
+        self.assertEqual(options['worker_class'], 'gthread')
+        self.assertFalse(options['preload_app'])
+
+        # The master validates the configuration without starting the write-behind flusher
+        with tempfile.TemporaryDirectory() as directory:
+            log_dir = os.path.join(directory, 'ingest_log')
+            with mock.patch('gunicorn.app.base.BaseApplication.run') as run:
+                serve(options, {'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'WRITE_BEHIND_ENABLED': True,
+                                'WRITE_BEHIND_LOG_DIR': log_dir})
+            run.assert_called_once()
+            self.assertFalse(os.path.exists(log_dir))
+
+    def test_migrate_commands_load_lazily(self):
+        self.assertNotIn('migrate', self.app.extensions)
+        result = self.app.test_cli_runner().invoke(args=['db', '--help'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('upgrade', result.output)
+        self.assertIn('migrate', self.app.extensions)
+
+    def test_cached_openapi_spec(self):
+        response = self.client.get('/swagger.json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['info']['title'], 'Garden API')
+        self.assertIn('/measurements/', response.json['paths'])
+        etag = response.headers['ETag']
+
+        response = self.client.get('/swagger.json', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/swagger.json', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(gzip.decompress(response.data), self.app.extensions['openapi_spec'].body)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'swagger.json')
+            result = self.app.test_cli_runner().invoke(args=['openapi-spec', '--output', path])
+            self.assertEqual(result.exit_code, 0, result.output)
+            with open(path) as f:
+                self.assertEqual(json.load(f)['info']['title'], 'Garden API')
+
+    def test_compressed_and_compact_responses(self):
+        with self.app.app_context():
+            for minute in range(50):
+                db.session.add(Measurement(garden_location_id=1, measurement_type=MeasurementType.TEMPERATURE,
+                                           unit=MeasurementUnit.CELSIUS, value=20.0 + minute,
+                                           timestamp=datetime(2024, 6, 1, 12) + timedelta(minutes=minute)))
+            db.session.commit()
+        plain = self.client.get('/measurements/')
+        self.assertNotIn('Content-Encoding', plain.headers)
+
+        response = self.client.get('/measurements/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(json.loads(gzip.decompress(response.data)), plain.json)
+
+        # Small responses are not worth compressing
+        response = self.client.get('/garden_locations/', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        self.app.config['EXPORT_BATCH_SIZE'] = 10
+        export = self.client.get('/measurements/export')
+        response = self.client.get('/measurements/export', headers={'Accept-Encoding': 'gzip'})
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), export.data)
+
+        response = self.client.get('/measurements/', headers={'Accept': 'application/vnd.garden.columnar+json'})
+        self.assertEqual(response.mimetype, 'application/vnd.garden.columnar+json')
+        self.assertEqual(set(response.vary), {'Accept', 'Accept-Encoding'})
+        columns = response.json['data']
+        self.assertEqual(columns['value'], [m['value'] for m in plain.json['data']])
+        self.assertEqual(set(columns), set(plain.json['data'][0]))
+
+        # Without a matching representation the API falls back to JSON
+        response = self.client.get('/measurements/', headers={'Accept': 'application/x-unknown'})
+        self.assertEqual(response.mimetype, 'application/json')
+
+    def test_json_encoders(self):
+        data = {'timestamp': datetime(2024, 6, 1, 12, 30, 15, 250), 'start_time': time(6, 0),
+                'unit': MeasurementUnit.CELSIUS, 'rate': Decimal('1.25'), 'values': [1, None, 'a']}
+        expected = {'timestamp': '2024-06-01T12:30:15.000250', 'start_time': '06:00:00', 'unit': '°C',
+                    'rate': 1.25, 'values': [1, None, 'a']}
+        for name in ('json', 'orjson'):
+            self.assertEqual(json.loads(json_encoder(name)(data)), expected, name)
+        with self.assertRaises(ValueError):
+            json_encoder('yaml')
+
+        with self.app.app_context():
+            db.session.add(Measurement(garden_location_id=1, measurement_type=MeasurementType.TEMPERATURE,
+                                       unit=MeasurementUnit.CELSIUS, value=20.5, timestamp=datetime(2024, 6, 1)))
+            db.session.commit()
+        stdlib_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                                 'JSON_ENCODER': 'json'})
+        with stdlib_app.app_context():
+            db.create_all()
+            db.session.add(Measurement(garden_location_id=1, measurement_type=MeasurementType.TEMPERATURE,
+                                       unit=MeasurementUnit.CELSIUS, value=20.5, timestamp=datetime(2024, 6, 1)))
+            db.session.commit()
+        response = self.client.get('/measurements/')
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.json, stdlib_app.test_client().get('/measurements/').json)
+        self.assertEqual(self.client.get('/plants/1').status_code, 404)
+
+    def test_rate_limiting(self):
+        class RecordingStore:
+            """Stand-in for a shared store that allows everything but records the buckets used."""
+            def __init__(self):
+                self.taken = []
+
+            def take(self, key, rate, burst):
+                self.taken.append((key, rate, burst))
+                return 0.0
+
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'RATE_LIMIT_ENABLED': True,
+                          'RATE_LIMIT_READ_BURST': 3, 'RATE_LIMIT_WRITE_BURST': 2, 'RATE_LIMIT_WRITE_PER_SECOND': 0.5,
+                          'RATE_LIMIT_TRUSTED_PROXIES': ['127.0.0.1']})
+        with app.app_context():
+            db.create_all()
+        client = app.test_client()
+        gateway = {'X-Client-Id': 'gateway-1'}
+        reading = {'garden_location_id': 1, 'measurement_type': 'temperature', 'unit': 'celsius', 'value': 20.0}
+        for _ in range(2):
+            self.assertEqual(client.post('/measurements/', json=reading, headers=gateway).status_code, 201)
+        response = client.post('/measurements/', json=reading, headers=gateway)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '2')
+        self.assertIn('error', response.json)
+
+        # Reads and other clients have their own budgets
+        self.assertEqual(client.get('/measurements/', headers=gateway).status_code, 200)
+        self.assertEqual(client.post('/measurements/', json=reading, headers={'X-Client-Id': 'gateway-2'}).status_code,
+                         201)
+        for _ in range(2):
+            self.assertEqual(client.get('/garden_locations/', headers=gateway).status_code, 200)
+        self.assertEqual(client.get('/garden_locations/', headers=gateway).status_code, 429)
+        self.assertEqual(client.get('/metrics', headers=gateway).status_code, 200)
+
+        store = RecordingStore()
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'RATE_LIMIT_ENABLED': True,
+                          'RATE_LIMIT_STORE': store})
+        app.test_client().get('/swagger.json', headers=gateway)
+        # The header is only trusted from a configured proxy
+        self.assertEqual(store.taken, [('read:127.0.0.1', 20.0, 100)])
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'RATE_LIMIT_ENABLED': True,
+                          'RATE_LIMIT_STORE': store, 'RATE_LIMIT_TRUSTED_PROXIES': ['127.0.0.1']})
+        app.test_client().get('/swagger.json', headers=gateway)
+        self.assertEqual(store.taken[-1], ('read:gateway-1', 20.0, 100))
+
+    def test_load_shedding(self):
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                          'LOAD_SHED_QUEUE_DEPTH': 100, 'LOAD_SHED_WRITE_WAIT_MS': 50})
+        with app.app_context():
+            db.create_all()
+        client = app.test_client()
+        reading = {'garden_location_id': 1, 'measurement_type': 'temperature', 'unit': 'celsius', 'value': 20.0}
+        self.assertEqual(client.post('/measurements/', json=reading).status_code, 201)
+
+        monitor = app.extensions['write_wait_monitor']
+        self.assertLess(monitor.average(), 0.05)
+        for _ in range(20):
+            monitor.observe(0.5)
+        response = client.post('/measurements/', json=reading)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(client.get('/measurements/').status_code, 200)
+
+        # The average decays while writes are shed
+        monitor.half_life = 0.001
+        self.assertEqual(client.post('/measurements/', json=reading).status_code, 201)
+
+        app.extensions['write_behind'] = SimpleNamespace(pending=100)
+        response = client.post('/measurements/batch', json=[reading])
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('100 writes are queued', response.json['error'])
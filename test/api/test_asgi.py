@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from garden_ai_agent import create_app
+from garden_ai_agent.asgi import create_ingest_app
+from garden_ai_agent.data.database import db
+from garden_ai_agent.data.fields import MeasurementType, MeasurementUnit
+from garden_ai_agent.data.models import Measurement, LatestMeasurement
+from garden_ai_agent.services import ingest
+
+
+async def call(app, method, path, body=None):
+    """Sends one HTTP request to an ASGI app and returns (status, decoded JSON body)."""
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b''}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app({'type': 'http', 'method': method, 'path': path, 'headers': []}, receive, send)
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+async def run_lifespan(app, events: asyncio.Queue, completed: asyncio.Queue):
+    async def send(message):
+        await completed.put(message['type'])
+
+    await app({'type': 'lifespan'}, events.get, send)
+
+
+class Test_AsyncIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = {
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(self.directory.name, 'test.sqlite3')}"
+        }
+        self.flask_app = create_app(self.config)
+        with self.flask_app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.flask_app.app_context():
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def test_concurrent_requests_are_group_committed(self):
+        app = create_ingest_app(self.config)
+        readings = [{
+            'garden_location_id': 1,
+            'measurement_type': 'TEMPERATURE',
+            'unit': 'CELSIUS',
+            'value': 20.0 + i * 0.1,
+            'timestamp': datetime(2024, 5, 1, 12, i).isoformat(),
+            'source': 'GW-1'
+        } for i in range(20)]
+
+        async def scenario():
+            events, completed = asyncio.Queue(), asyncio.Queue()
+            lifespan = asyncio.ensure_future(run_lifespan(app, events, completed))
+            await events.put({'type': 'lifespan.startup'})
+            self.assertEqual(await completed.get(), 'lifespan.startup.complete')
+            results = await asyncio.gather(
+                *[call(app, 'POST', '/measurements/', reading) for reading in readings],
+                call(app, 'POST', '/measurements/batch', readings[:5]),
+                call(app, 'POST', '/measurements/', {'measurement_type': 'TEMPERATURE'}),
+            )
+            await events.put({'type': 'lifespan.shutdown'})
+            await lifespan
+            return results
+
+        results = asyncio.run(scenario())
+        self.assertLess(app.committer.committed_groups, 21)
+        singles, batch, invalid = results[:20], results[20], results[21]
+        self.assertTrue(all(status in (200, 201) for status, _ in singles))
+        self.assertEqual(sum(status == 201 for status, _ in singles), 20 - len(batch[1]['data']['created']))
+        self.assertEqual(len(batch[1]['data']['created']) + len(batch[1]['data']['duplicates']), 5)
+        self.assertEqual(singles[3][1]['data']['source'], 'GW-1')
+        self.assertEqual(invalid[0], 400)
+        self.assertEqual(sorted(invalid[1]['errors']), ['garden_location_id', 'unit', 'value'])
+
+        with self.flask_app.app_context():
+            self.assertEqual(Measurement.query.count(), 20)
+            latest = LatestMeasurement.query.one()
+            self.assertEqual(latest.timestamp, datetime(2024, 5, 1, 12, 19))
+
+    def test_failed_group_is_retried_without_recounting(self):
+        app = create_ingest_app({**self.config, 'ASYNC_INGEST_MAX_DELAY_MS': 100})
+        readings = [{
+            'garden_location_id': 1,
+            'measurement_type': 'TEMPERATURE',
+            'unit': 'CELSIUS',
+            'value': 20.0,
+            'timestamp': datetime(2024, 5, 1, 12, i).isoformat(),
+            'source': 'GW-1'
+        } for i in range(3)]
+        register_sources = ingest._register_sources
+        calls = []
+
+        def fail_once(*args):
+            # Fails the whole group after its readings were checked
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError('lock timeout')
+            return register_sources(*args)
+
+        async def scenario():
+            events, completed = asyncio.Queue(), asyncio.Queue()
+            lifespan = asyncio.ensure_future(run_lifespan(app, events, completed))
+            await events.put({'type': 'lifespan.startup'})
+            await completed.get()
+            results = await asyncio.gather(call(app, 'POST', '/measurements/', readings[0]),
+                                           call(app, 'POST', '/measurements/batch', readings[1:]))
+            await events.put({'type': 'lifespan.shutdown'})
+            await lifespan
+            return results
+
+        with mock.patch.object(ingest, '_register_sources', side_effect=fail_once):
+            results = asyncio.run(scenario())
+        self.assertEqual([status for status, _ in results], [201, 201])
+        self.assertEqual(len(calls), 3)
+        stats = app.committer.detector._streams[(1, MeasurementType.TEMPERATURE, MeasurementUnit.CELSIUS)]
+        self.assertEqual(stats.count, 3)
+
+    def test_failed_request_from_disconnected_client(self):
+        app = create_ingest_app({**self.config, 'ASYNC_INGEST_MAX_DELAY_MS': 100})
+        readings = [{
+            'garden_location_id': 1,
+            'measurement_type': 'TEMPERATURE',
+            'unit': 'CELSIUS',
+            'value': 20.0,
+            'timestamp': datetime(2024, 5, 1, 12, i).isoformat(),
+            'source': 'GW-1'
+        } for i in range(2)]
+        register_sources = ingest._register_sources
+        calls = []
+
+        def fail_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError('lock timeout')
+            return register_sources(*args)
+
+        async def scenario():
+            events, completed = asyncio.Queue(), asyncio.Queue()
+            lifespan = asyncio.ensure_future(run_lifespan(app, events, completed))
+            await events.put({'type': 'lifespan.startup'})
+            await completed.get()
+            # The client disconnects while its request waits for the group to fail
+            disconnected = asyncio.ensure_future(call(app, 'POST', '/measurements/', readings[0]))
+            await asyncio.sleep(0.01)
+            disconnected.cancel()
+            await asyncio.sleep(0.2)
+            # The committer is still running and serves the next request
+            result = await asyncio.wait_for(call(app, 'POST', '/measurements/', readings[1]), 5)
+            await events.put({'type': 'lifespan.shutdown'})
+            await lifespan
+            return result
+
+        with mock.patch.object(ingest, '_register_sources', side_effect=fail_once):
+            status, body = asyncio.run(scenario())
+        self.assertEqual(status, 201, body)
+        self.assertEqual(len(calls), 2)
+        with self.flask_app.app_context():
+            self.assertEqual(Measurement.query.count(), 1)
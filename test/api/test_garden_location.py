@@ -1,7 +1,11 @@
 from garden_ai_agent.config import BASE_URL
 from garden_ai_agent.data.fields import SunExposure, WindExposure, Drainage
-from garden_ai_agent.data.models import GardenLocation
+from garden_ai_agent.data.database import db
+from garden_ai_agent.data.models import GardenLocation, Plant
+from sqlalchemy import update
 from .test_api import APITest
+import os
+import time
 
 class Test_GardenLocation(APITest):
 
@@ -54,4 +58,56 @@ class Test_GardenLocation(APITest):
 
         # Verify deletion
         response = self.client.get(f"{self.BASE_URL}{location_id}")
-        self.assertEqual(response.status_code, 404) 
\ No newline at end of file
+        self.assertEqual(response.status_code, 404) 
+
+    def test_suitable_plants_and_locations(self):
+        """Test plant/location matching on hardiness zone and recent soil pH."""
+        warm = GardenLocation(name='Warm Bed', longitude=-122.4, latitude=37.7, hardiness_zone=9,
+                              sun_exposure=SunExposure.FULL, wind_exposure=WindExposure.PROTECTED,
+                              drainage=Drainage.GOOD, irrigation_zone_id=1)
+        cold = GardenLocation(name='Cold Bed', longitude=-122.4, latitude=37.7, hardiness_zone=4,
+                              sun_exposure=SunExposure.FULL, wind_exposure=WindExposure.PROTECTED,
+                              drainage=Drainage.GOOD, irrigation_zone_id=1)
+        warm_id = self.client.post(self.BASE_URL, json=warm.json()).json['data']['id']
+        cold_id = self.client.post(self.BASE_URL, json=cold.json()).json['data']['id']
+
+        plant_fields = {'garden_location_id': warm_id, 'growth_form': 'SHRUB',
+                        'life_cycle': 'PERENNIAL', 'primary_use': 'FRUIT'}
+        blueberry = self.client.post('/plants/', json={
+            **plant_fields, 'name': 'Blueberry', 'hardiness_zone_min': 3, 'hardiness_zone_max': 9,
+            'preferred_soil_ph_min': 4.5, 'preferred_soil_ph_max': 5.5}).json['data']['id']
+        fig = self.client.post('/plants/', json={
+            **plant_fields, 'name': 'Fig', 'hardiness_zone_min': 7, 'hardiness_zone_max': 11}).json['data']['id']
+
+        response = self.client.get(f"{self.BASE_URL}{warm_id}/suitable_plants")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['id'] for p in response.json['data']], [blueberry, fig])
+
+        response = self.client.get(f"{self.BASE_URL}{cold_id}/suitable_plants")
+        self.assertEqual([p['id'] for p in response.json['data']], [blueberry])
+
+        # An alkaline soil reading rules out the blueberry at the warm bed
+        response = self.client.post('/measurements/', json={
+            'garden_location_id': warm_id, 'measurement_type': 'SOIL_PH', 'unit': 'PH', 'value': 7.4})
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.get(f"/plants/{blueberry}/suitable_locations")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([location['id'] for location in response.json['data']], [cold_id])
+
+        response = self.client.get(f"{self.BASE_URL}{warm_id}/suitable_plants")
+        self.assertEqual([p['id'] for p in response.json['data']], [fig])
+
+        # A change committed by another process is picked up once it bumps the shared generation
+        with self.app.app_context():
+            db.session.execute(update(Plant).where(Plant.id == fig).values(hardiness_zone_min=10))
+            db.session.commit()
+        response = self.client.get(f"{self.BASE_URL}{warm_id}/suitable_plants")
+        self.assertEqual([p['id'] for p in response.json['data']], [fig])
+        path = self.app.config['SUITABILITY_GENERATION_PATH']
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns + 1))
+        response = self.client.get(f"{self.BASE_URL}{warm_id}/suitable_plants")
+        self.assertEqual(response.json['data'], [])
+
+        response = self.client.get(f"{self.BASE_URL}999/suitable_plants")
+        self.assertEqual(response.status_code, 404)
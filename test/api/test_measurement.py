@@ -1,12 +1,43 @@
 from garden_ai_agent.config import BASE_URL
 from garden_ai_agent.data.fields import MeasurementType, MeasurementUnit, SunExposure, WindExposure, Drainage
-from garden_ai_agent.data.models import Measurement, GardenLocation
-from datetime import datetime
+from garden_ai_agent.data.models import Measurement, GardenLocation, LatestMeasurement, MeasurementStatistics
+from garden_ai_agent import create_app
+from garden_ai_agent.data.database import db
+from garden_ai_agent.data.partitions import measurement_selects, partition_table
+from garden_ai_agent.services.anomaly import AnomalyDetector
+from sqlalchemy import select
+from datetime import datetime, timedelta
+import csv
+import glob
+import io
+import json
+import os
+import statistics
+import tempfile
+import unittest
 from .test_api import APITest
 
+IMPORT_COLUMNS = ('garden_location_id', 'measurement_type', 'unit', 'value', 'timestamp', 'source')
+
+
+def reading(timestamp, value=20.0, **fields):
+    """Returns the request body of a temperature reading at garden location 1."""
+    return {'garden_location_id': 1, 'measurement_type': 'TEMPERATURE', 'unit': 'CELSIUS', 'value': value,
+            'timestamp': timestamp.isoformat(), **fields}
+
+
+def write_csv(path, rows, header=IMPORT_COLUMNS):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
 class Test_Measurement(APITest):
 
     BASE_URL = BASE_URL + '/measurements/'
+    RECENT_URL = f"{BASE_URL}recent?garden_location_id=1&measurement_type=temperature"
+    FILTER_QUERY = 'garden_location_id=1&measurement_type=temperature&start=2024-06-01T12:01:00&end=2024-06-01T12:05:00'
 
     def test_create_verify_delete_measurement(self):
         """Test CRUD operations for Measurement API endpoint.
@@ -79,4 +110,659 @@ class Test_Measurement(APITest):
 
         # Verify deletion
         response = self.client.get(f"{self.BASE_URL}{measurement_id}")
-        self.assertEqual(response.status_code, 404) 
\ No newline at end of file
+        self.assertEqual(response.status_code, 404)
+
+    def _create_garden_location(self, app=None):
+        """Creates a garden location through the API and returns its ID."""
+        garden_location = GardenLocation(
+            name='Test Garden',
+            longitude=-122.4194,
+            latitude=37.7749,
+            sun_exposure=SunExposure.FULL,
+            wind_exposure=WindExposure.PROTECTED,
+            drainage=Drainage.GOOD,
+            irrigation_zone_id=1
+        )
+        response = (app or self.app).test_client().post('/garden_locations/', json=garden_location.json())
+        self.assertEqual(response.status_code, 201, response.text)
+        return response.json['data']['id']
+
+    def _post_moisture(self, value, minute):
+        response = self.client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 0, minute), value,
+                                                                measurement_type='SOIL_MOISTURE', unit='PERCENT'))
+        self.assertEqual(response.status_code, 201, response.text)
+        return response.json['data']
+
+    def test_latest_measurements(self):
+        """Test that /measurements/latest tracks the newest reading per location and type."""
+        self._create_garden_location()
+        self._post_moisture(30.0, 0)
+        newest_id = self._post_moisture(35.0, 20)['id']
+        self._post_moisture(32.0, 10)  # Late arrival, older reading
+
+        response = self.client.get(f"{self.BASE_URL}latest")
+        self.assertEqual(response.status_code, 200)
+        latest = response.json['data']
+        self.assertEqual(len(latest), 1)
+        self.assertEqual(latest[0]['measurement_id'], newest_id)
+        self.assertEqual(latest[0]['value'], 35.0)
+
+        response = self.client.get(f"{self.BASE_URL}latest?measurement_type=TEMPERATURE")
+        self.assertEqual(response.json['data'], [])
+
+    def test_deleting_latest_measurement(self):
+        """Test that deleting the newest reading falls back to the next most recent one."""
+        garden_location_id = self._create_garden_location()
+        self._post_moisture(30.0, 0)
+        newest_id = self._post_moisture(35.0, 20)['id']
+        self._post_moisture(32.0, 10)
+
+        response = self.client.delete(f"{self.BASE_URL}{newest_id}")
+        self.assertEqual(response.status_code, 204)
+        response = self.client.get(f"{self.BASE_URL}latest?garden_location_id={garden_location_id}")
+        self.assertEqual(response.json['data'][0]['value'], 32.0)
+
+    def test_flag_implausible_measurement(self):
+        """Test that a reading outside its unit's plausible range is flagged without any history."""
+        self._create_garden_location()
+        self.assertTrue(self._post_moisture(400.0, 0)['flagged'])
+
+        response = self.client.get(f"{self.BASE_URL}?flagged=true")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['value'] for m in response.json['data']], [400.0])
+        self.assertEqual(self.client.get(f"{self.BASE_URL}latest").json['data'], [])
+
+    def test_flag_outlying_measurement(self):
+        """Test that a reading far outside its stream's distribution is flagged and kept out of the latest values."""
+        self._create_garden_location()
+        for minute in range(40):
+            self.assertFalse(self._post_moisture(30.0 + (minute % 5) * 0.5, minute)['flagged'])
+
+        self.assertTrue(self._post_moisture(75.0, 40)['flagged'])
+        self.assertEqual(self.client.get(f"{self.BASE_URL}latest").json['data'][0]['value'], 32.0)
+        # The outlier did not shift the statistics
+        self.assertFalse(self._post_moisture(31.0, 41)['flagged'])
+
+        response = self.client.get(f"{self.BASE_URL}?flagged=false")
+        self.assertEqual(len(response.json['data']), 41)
+
+    def test_anomaly_statistics_are_merged_across_workers(self):
+        """Test that workers sharing the database add to each other's statistics instead of overwriting them."""
+        key = (1, MeasurementType.SOIL_MOISTURE, MeasurementUnit.PERCENT)
+        values = [[10.0, 12.0, 14.0], [20.0, 22.0, 24.0, 26.0]]
+        with self.app.app_context():
+            workers = [AnomalyDetector(), AnomalyDetector()]
+            for detector, worker_values in zip(workers, values):
+                for minute, value in enumerate(worker_values):
+                    detector.check(Measurement(garden_location_id=1, measurement_type=MeasurementType.SOIL_MOISTURE,
+                                               unit=MeasurementUnit.PERCENT, value=value,
+                                               timestamp=datetime(2024, 6, 1, 0, minute)))
+            for detector in workers:
+                detector.persist()
+
+            readings = values[0] + values[1]
+            row = db.session.get(MeasurementStatistics, key)
+            self.assertEqual(row.count, len(readings))
+            self.assertAlmostEqual(row.mean, statistics.fmean(readings))
+            self.assertAlmostEqual(row.variance, statistics.pvariance(readings))
+            # The last worker to write continues from the merged statistics
+            self.assertEqual(workers[1]._streams[key].count, len(readings))
+
+            # Nothing new is written twice
+            workers[0].persist()
+            self.assertEqual(db.session.get(MeasurementStatistics, key).count, len(readings))
+
+    def test_retried_reading_is_not_duplicated(self):
+        """Test that a retried sourced reading returns the stored reading instead of inserting another row."""
+        self._create_garden_location()
+        response = self.client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 12, 0), source='gateway-1'))
+        self.assertEqual(response.status_code, 201)
+        first_id = response.json['data']['id']
+
+        response = self.client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 12, 0), source='gateway-1'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['data']['id'], first_id)
+        self.assertEqual(len(self.client.get(self.BASE_URL).json['data']), 1)
+
+    def test_batch_skips_duplicate_readings(self):
+        """Test that a batch stores new readings once and reports stored and repeated ones as duplicates."""
+        self._create_garden_location()
+        first_id = self.client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 12, 0), source='gateway-1')) \
+            .json['data']['id']
+        batch = [reading(datetime(2024, 6, 1, 12, 0), source='gateway-1'),
+                 reading(datetime(2024, 6, 1, 12, 1), source='gateway-1'),
+                 reading(datetime(2024, 6, 1, 12, 1), source='gateway-1'),
+                 reading(datetime(2024, 6, 1, 12, 2), source='gateway-2')]
+
+        response = self.client.post(f"{self.BASE_URL}batch", json=batch)
+        self.assertEqual(response.status_code, 201, response.text)
+        self.assertEqual(len(response.json['data']['created']), 2)
+        self.assertEqual(len(response.json['data']['duplicates']), 2)
+        self.assertIn(first_id, response.json['data']['duplicates'])
+
+        response = self.client.post(f"{self.BASE_URL}batch", json=batch)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['data']['created'], [])
+        self.assertEqual(len(self.client.get(self.BASE_URL).json['data']), 3)
+
+        response = self.client.get(f"{self.BASE_URL}sources")
+        self.assertEqual([s['name'] for s in response.json['data']], ['GATEWAY-1', 'GATEWAY-2'])
+
+    def test_update_onto_existing_reading_conflicts(self):
+        """Test that moving a reading onto another reading's key is rejected and changes nothing."""
+        self._create_garden_location()
+        first_id = self.client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 12, 0), source='gateway-1')) \
+            .json['data']['id']
+        self.client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 12, 1), source='gateway-1'))
+
+        response = self.client.put(f"{self.BASE_URL}{first_id}", json={'timestamp': '2024-06-01T12:01:00'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(f"{self.BASE_URL}{first_id}").json['data']['timestamp'], '2024-06-01T12:00:00')
+
+    def test_invalid_batch_stores_nothing(self):
+        """Test that every invalid field of every batch item is reported and no item is stored."""
+        self._create_garden_location()
+        response = self.client.post(f"{self.BASE_URL}batch", json=[reading(datetime(2024, 6, 1, 12, 0)),
+                                                                   {'value': 1.0}])
+        self.assertEqual(response.status_code, 400)
+
+        invalid = [{**reading(datetime(2024, 6, 1, 12, 1)), 'unit': 'LIGHTYEARS'},
+                   reading(datetime(2024, 6, 1, 12, 2)),
+                   {**reading(datetime(2024, 6, 1, 12, 3)), 'value': 'high', 'source': 7}]
+        response = self.client.post(f"{self.BASE_URL}batch", json=invalid)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['error'], "Item 0: Invalid value for field: 'unit'")
+        self.assertEqual(response.json['errors'], {
+            '0': {'unit': "Invalid value for field: 'unit'"},
+            '2': {'value': "Invalid value for field: 'value'", 'source': "Invalid value for field: 'source'"}
+        })
+        self.assertEqual(self.client.get(self.BASE_URL).json['data'], [])
+
+    def test_offset_timestamps_are_stored_as_utc(self):
+        """Test that a reading with a UTC offset is stored as UTC and recognised when retried."""
+        self._create_garden_location()
+        offset_reading = {**reading(datetime(2024, 6, 1, 12, 0), 21.0, source='gateway-1'),
+                          'timestamp': '2024-06-01T14:00:00+02:00'}
+
+        response = self.client.post(self.BASE_URL, json=offset_reading)
+        self.assertEqual(response.status_code, 201, response.text)
+        self.assertEqual(response.json['data']['timestamp'], '2024-06-01T12:00:00')
+        measurement_id = response.json['data']['id']
+
+        response = self.client.post(self.BASE_URL, json=offset_reading)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json['data']['id'], measurement_id)
+
+    def test_offset_timestamp_filters(self):
+        """Test that list filters with a UTC offset select the same instants as their UTC equivalent."""
+        self._create_garden_location()
+        self.client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 11, 0)))
+        measurement_id = self.client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 12, 0))).json['data']['id']
+
+        response = self.client.get(self.BASE_URL, query_string={'start': '2024-06-01T13:30:00+02:00'})
+        self.assertEqual([m['id'] for m in response.json['data']], [measurement_id])
+
+    def _write_behind_config(self):
+        """Returns the configuration of workers sharing a database file and write-behind log directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        config = {
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory.name, 'test.sqlite3')}",
+            'WRITE_BEHIND_LOG_DIR': os.path.join(directory.name, 'ingest_log'),
+            'WRITE_BEHIND_MAX_DELAY_MS': 1
+        }
+        with create_app(config).app_context():
+            db.create_all()
+        return config
+
+    def _start_write_behind(self, config):
+        app = create_app({**config, 'WRITE_BEHIND_ENABLED': True})
+        self.addCleanup(app.extensions['write_behind'].stop)
+        return app
+
+    def test_write_behind_ingest(self):
+        """Test that write-behind submissions are acknowledged, then committed with their results."""
+        app = self._start_write_behind(self._write_behind_config())
+        client = app.test_client()
+
+        response = client.post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 12, 2), source='gw-1'))
+        self.assertEqual(response.status_code, 202)
+        ingest_id = response.json['data']['ingest_id']
+        self.assertTrue(response.headers['Location'].endswith(f'/measurements/ingest/{ingest_id}'))
+
+        response = client.post(f"{self.BASE_URL}batch", json=[reading(datetime(2024, 6, 1, 12, 2), source='gw-1'),
+                                                              reading(datetime(2024, 6, 1, 12, 3), source='gw-1')])
+        self.assertEqual(response.status_code, 202)
+        batch_id = response.json['data']['ingest_id']
+
+        app.extensions['write_behind'].flush()
+        response = client.get(f"{self.BASE_URL}ingest/{ingest_id}")
+        self.assertEqual(response.json['data']['status'], 'committed')
+        self.assertEqual(len(response.json['data']['created']), 1)
+        response = client.get(f"{self.BASE_URL}ingest/{batch_id}")
+        self.assertEqual(len(response.json['data']['duplicates']), 1)
+        self.assertEqual(client.get(f"{self.BASE_URL}ingest/unknown").status_code, 404)
+        self.assertEqual(client.get(f"{self.BASE_URL}ingest/..").status_code, 404)
+
+    def test_write_behind_replays_crashed_worker_log(self):
+        """Test that submissions a crashed worker logged but never committed are stored on startup."""
+        config = self._write_behind_config()
+        os.makedirs(config['WRITE_BEHIND_LOG_DIR'])
+        with open(os.path.join(config['WRITE_BEHIND_LOG_DIR'], 'ingest-1-dead.log'), 'w') as log:
+            lost, done = reading(datetime(2024, 6, 1, 12, 0), source='gw-1'), reading(datetime(2024, 6, 1, 12, 1))
+            log.write(json.dumps({'id': 'lost', 'measurements': [lost]}) + '\n')
+            log.write(json.dumps({'id': 'done', 'measurements': [done]}) + '\n')
+            log.write(json.dumps({'committed': ['done']}) + '\n')
+
+        app = self._start_write_behind(config)
+        app.extensions['write_behind'].flush()
+        client = app.test_client()
+        self.assertEqual(client.get(f"{self.BASE_URL}ingest/lost").json['data']['status'], 'committed')
+        self.assertEqual([m['timestamp'] for m in client.get(self.BASE_URL).json['data']], [lost['timestamp']])
+
+    def test_write_behind_status_from_other_worker(self):
+        """Test that any worker sharing the log directory reports a submission's status."""
+        config = self._write_behind_config()
+        app, other = self._start_write_behind(config), self._start_write_behind(config)
+        response = app.test_client().post(self.BASE_URL, json=reading(datetime(2024, 6, 1, 12, 0)))
+        ingest_id = response.json['data']['ingest_id']
+        app.extensions['write_behind'].flush()
+
+        response = other.test_client().get(f"{self.BASE_URL}ingest/{ingest_id}")
+        self.assertEqual(response.json['data']['status'], 'committed')
+        self.assertEqual(sorted(glob.glob(os.path.join(config['WRITE_BEHIND_LOG_DIR'], 'ingest-*.log'))),
+                         sorted([app.extensions['write_behind']._log.name, other.extensions['write_behind']._log.name]))
+
+    def _recent_readings_app(self):
+        """Returns an app with the recent readings buffer, a stored reading from an hour ago, and the time."""
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                          'RECENT_READINGS_ENABLED': True})
+        now = datetime.utcnow()
+        with app.app_context():
+            db.create_all()
+            db.session.add(Measurement(garden_location_id=1, measurement_type=MeasurementType.TEMPERATURE,
+                                       unit=MeasurementUnit.CELSIUS, value=10.0, timestamp=now - timedelta(hours=1)))
+            db.session.commit()
+        response = app.test_client().post(f"{self.BASE_URL}batch", json=[
+            reading(now - timedelta(minutes=30), 20.0), reading(now - timedelta(minutes=10), 30.0),
+            reading(now - timedelta(minutes=5), 55.0, measurement_type='HUMIDITY', unit='PERCENT')])
+        self.assertEqual(response.status_code, 201, response.text)
+        return app, now
+
+    def test_recent_readings(self):
+        """Test that recent readings are served from the in-memory buffer along with their statistics."""
+        app, _ = self._recent_readings_app()
+        data = app.test_client().get(self.RECENT_URL).json['data']
+        self.assertEqual([r['value'] for r in data['readings']], [10.0, 20.0, 30.0])
+        self.assertEqual((data['count'], data['min'], data['max'], data['mean']), (3, 10.0, 30.0, 20.0))
+        self.assertEqual(app.extensions['recent_readings'].hits, 1)
+
+    def test_deleted_reading_leaves_recent_readings(self):
+        """Test that a deleted reading is removed from the buffer, which keeps serving the stream."""
+        app, _ = self._recent_readings_app()
+        client = app.test_client()
+        middle_id = client.get(self.RECENT_URL).json['data']['readings'][1]['id']
+
+        self.assertEqual(client.delete(f"{self.BASE_URL}{middle_id}").status_code, 204)
+        data = client.get(self.RECENT_URL).json['data']
+        self.assertEqual([r['value'] for r in data['readings']], [10.0, 30.0])
+        self.assertEqual(app.extensions['recent_readings'].hits, 2)
+
+    def test_recent_readings_older_than_buffer(self):
+        """Test that a window older than the buffer is read from the database with the same result."""
+        app, now = self._recent_readings_app()
+        client = app.test_client()
+        from_memory = client.get(self.RECENT_URL).json['data']['readings']
+
+        start = (now - timedelta(days=30)).isoformat()
+        from_database = client.get(f"{self.RECENT_URL}&start={start}").json['data']['readings']
+        self.assertEqual(app.extensions['recent_readings'].misses, 1)
+        self.assertEqual(from_database, from_memory)
+
+    def test_recent_readings_without_buffer(self):
+        """Test that recent readings are read from the database when the buffer is off."""
+        self.client.post(self.BASE_URL, json=reading(datetime.utcnow() - timedelta(minutes=5)))
+        self.assertEqual(self.client.get(self.RECENT_URL).json['data']['count'], 1)
+        self.assertEqual(self.client.get(f"{self.BASE_URL}recent?garden_location_id=1").status_code, 400)
+
+    def _shared_recent_readings_apps(self):
+        """Returns two workers sharing a database and recent readings file, with two readings posted."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        config = {
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory.name, 'test.sqlite3')}",
+            'RECENT_READINGS_ENABLED': True,
+            'RECENT_READINGS_SHARED_PATH': os.path.join(directory.name, 'recent.bin'),
+            'RECENT_READINGS_CAPACITY': 64,
+            'RECENT_READINGS_MAX_STREAMS': 16
+        }
+        writer, reader = create_app(config), create_app(config)
+        with writer.app_context():
+            db.create_all()
+        self._create_garden_location(writer)
+        now = datetime.utcnow()
+        writer.test_client().post(f"{self.BASE_URL}batch", json=[reading(now - timedelta(minutes=30), 20.0),
+                                                                 reading(now - timedelta(minutes=10), 30.0)])
+        return writer, reader, directory.name
+
+    def test_shared_recent_readings(self):
+        """Test that worker processes share recent readings and latest values through one mapped file."""
+        writer, reader, _ = self._shared_recent_readings_apps()
+        data = reader.test_client().get(self.RECENT_URL).json['data']
+        self.assertEqual([r['value'] for r in data['readings']], [20.0, 30.0])
+        self.assertEqual(reader.extensions['recent_readings'].hits, 1)
+        latest = reader.test_client().get(f"{self.BASE_URL}latest").json['data']
+        self.assertEqual([(r['measurement_id'], r['value']) for r in latest], [(data['readings'][1]['id'], 30.0)])
+
+    def test_shared_recent_readings_invalidation(self):
+        """Test that a reading deleted by one worker leaves the other worker's recent and latest readings."""
+        writer, reader, _ = self._shared_recent_readings_apps()
+        newest_id = writer.test_client().get(f"{self.BASE_URL}latest").json['data'][0]['measurement_id']
+
+        self.assertEqual(reader.test_client().delete(f"{self.BASE_URL}{newest_id}").status_code, 204)
+        self.assertEqual(writer.test_client().get(f"{self.BASE_URL}latest").json['data'][0]['value'], 20.0)
+        data = writer.test_client().get(self.RECENT_URL).json['data']
+        self.assertEqual([r['value'] for r in data['readings']], [20.0])
+        self.assertEqual(writer.extensions['recent_readings'].hits, 1)
+
+    def test_import_resets_shared_recent_readings(self):
+        """Test that an import, which bypasses the buffer, resets it for every worker."""
+        writer, reader, directory = self._shared_recent_readings_apps()
+        path = os.path.join(directory, 'import.csv')
+        write_csv(path, [[1, 'TEMPERATURE', 'CELSIUS', '25.0', (datetime.utcnow() - timedelta(minutes=5)).isoformat()]],
+                  header=IMPORT_COLUMNS[:-1])
+        result = writer.test_cli_runner().invoke(args=['import-measurements', path])
+        self.assertIn('1 inserted', result.output)
+
+        self.assertEqual(reader.test_client().get(f"{self.BASE_URL}latest").json['data'][0]['value'], 25.0)
+        data = reader.test_client().get(self.RECENT_URL).json['data']
+        self.assertEqual([r['value'] for r in data['readings']], [20.0, 30.0, 25.0])
+
+    def _create_readings(self):
+        with self.app.app_context():
+            for minute in range(5):
+                for measurement_type, unit in ((MeasurementType.TEMPERATURE, MeasurementUnit.CELSIUS),
+                                               (MeasurementType.HUMIDITY, MeasurementUnit.PERCENT)):
+                    db.session.add(Measurement(garden_location_id=1 + minute % 2, measurement_type=measurement_type,
+                                               unit=unit, value=20.0 + minute,
+                                               timestamp=datetime(2024, 6, 1, 12, minute), source='gw-1'))
+            db.session.commit()
+
+    def test_enum_spellings(self):
+        """Test that enum fields accept member names in any case and member values."""
+        measurement = Measurement(measurement_type='soil_Moisture', unit='°c')
+        self.assertIs(measurement.measurement_type, MeasurementType.SOIL_MOISTURE)
+        self.assertIs(measurement.unit, MeasurementUnit.CELSIUS)
+        with self.assertRaises(ValueError):
+            measurement.unit = 'kelvin'
+
+        body = {'garden_location_id': 1, 'measurement_type': 'temperature', 'unit': '°F', 'value': 70.0,
+                'timestamp': '2024-06-01T12:00:00'}
+        response = self.client.post(self.BASE_URL, json=body)
+        self.assertEqual(response.status_code, 201, response.text)
+        self.assertEqual(len(self.client.get(f"{self.BASE_URL}?measurement_type=Temperature").json['data']), 1)
+        with self.app.app_context():
+            self.assertIs(Measurement.query.one().unit, MeasurementUnit.FAHRENHEIT)
+
+    def test_list_filters(self):
+        """Test that the list endpoint applies location, type and time range filters."""
+        self._create_readings()
+        response = self.client.get(f"{self.BASE_URL}?{self.FILTER_QUERY}")
+        self.assertEqual([m['timestamp'] for m in response.json['data']],
+                         ['2024-06-01T12:02:00', '2024-06-01T12:04:00'])
+        self.assertEqual(self.client.get(f"{self.BASE_URL}?start=yesterday").status_code, 400)
+
+    def test_csv_export(self):
+        """Test that the CSV export applies the list filters across export batches."""
+        self._create_readings()
+        self.app.config['EXPORT_BATCH_SIZE'] = 1
+        response = self.client.get(f"{self.BASE_URL}export?{self.FILTER_QUERY}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        self.assertEqual([(r['measurement_type'], r['unit'], r['value'], r['timestamp']) for r in rows],
+                         [('TEMPERATURE', 'CELSIUS', '22.0', '2024-06-01T12:02:00'),
+                          ('TEMPERATURE', 'CELSIUS', '24.0', '2024-06-01T12:04:00')])
+        self.assertEqual(self.client.get(f"{self.BASE_URL}export?format=xml").status_code, 400)
+
+    def test_export_measurements_command(self):
+        """Test that the export command writes the filtered readings to a file."""
+        self._create_readings()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'export.csv')
+            result = self.app.test_cli_runner().invoke(
+                args=['export-measurements', '--output', output, '--measurement-type', 'humidity'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            with open(output) as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 5)
+
+    def test_columnar_export(self):
+        """Test Arrow and Parquet exports when pyarrow is installed."""
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise unittest.SkipTest('pyarrow is not installed')
+        self._create_readings()
+        self.app.config['EXPORT_BATCH_SIZE'] = 3
+
+        response = self.client.get(f"{self.BASE_URL}export?format=arrow&measurement_type=HUMIDITY")
+        table = pyarrow.ipc.open_stream(response.data).read_all()
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(set(table.column('measurement_type').to_pylist()), {'HUMIDITY'})
+
+        response = self.client.get(f"{self.BASE_URL}export?format=parquet")
+        table = pyarrow.parquet.read_table(io.BytesIO(response.data))
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(table.column('timestamp').to_pylist()[0], datetime(2024, 6, 1, 12, 0))
+
+    def _import(self, rows, app=None, *args):
+        """Imports `rows` as a CSV file and returns the command result and the rejected rows."""
+        with tempfile.TemporaryDirectory() as directory:
+            path, rejects = os.path.join(directory, 'history.csv'), os.path.join(directory, 'rejects.csv')
+            write_csv(path, rows)
+            result = (app or self.app).test_cli_runner().invoke(
+                args=['import-measurements', path, '--rejects', rejects, *args])
+            self.assertEqual(result.exit_code, 0, result.output)
+            with open(rejects) as f:
+                return result, list(csv.reader(f))[1:]
+
+    def test_import_measurements_command(self):
+        """Test bulk importing a CSV file with valid, duplicate and invalid rows."""
+        self._create_garden_location()
+        result, rejected = self._import([
+            [1, 'temperature', '°C', '21.5', '2023-01-01T00:00:00', 'station-1'],
+            [1, 'TEMPERATURE', 'celsius', '22.5', '2023-01-01T01:00:00', 'station-1'],
+            [1, 'TEMPERATURE', 'celsius', '22.5', '2023-01-01T01:00:00', 'station-1'],
+            [1, 'SOIL_PH', 'pH', 'acidic', '2023-01-01T01:00:00', 'station-1'],
+            [2, 'SOIL_PH', 'pH', '6.5', '2023-01-01T01:00:00', 'station-1'],
+            [1, 'HUMIDITY', 'furlongs', '50', '2023-01-01T01:00:00', ''],
+            [1, 'HUMIDITY', 'percent', '50'],
+            [1, 'HUMIDITY', 'percent', '50', '2023-01-01T01:00:00', 'station-1', 'extra']
+        ], None, '--chunk-size', '2')
+        self.assertIn('2 inserted, 1 duplicates skipped, 5 rejected', result.output)
+        self.assertEqual(rejected, [
+            ['5', "Invalid value for field: 'value'"],
+            ['6', 'Garden location 2 does not exist'],
+            ['7', "Invalid value for field: 'unit'"],
+            ['8', 'Expected 6 fields, found 4'],
+            ['9', 'Expected 6 fields, found 7']
+        ])
+
+    def test_import_updates_latest_and_sources(self):
+        """Test that an import rebuilds the latest values and registers its sources, whatever their UTC offsets."""
+        self._create_garden_location()
+        self._import([[1, 'TEMPERATURE', 'CELSIUS', '22.5', '2023-01-01T01:00:00', 'station-1'],
+                      [1, 'TEMPERATURE', 'CELSIUS', '21.5', '2023-01-01T02:00:00+02:00', 'station-1']])
+
+        response = self.client.get(f"{self.BASE_URL}latest")
+        self.assertEqual(response.json['data'][0]['value'], 22.5)
+        [source] = self.client.get(f"{self.BASE_URL}sources").json['data']
+        self.assertEqual((source['first_seen_at'], source['last_seen_at']), ('2023-01-01T00:00:00', '2023-01-01T01:00:00'))
+
+    def test_import_empty_file(self):
+        """Test that importing a file without a header row fails."""
+        with tempfile.TemporaryDirectory() as directory:
+            empty = os.path.join(directory, 'empty.csv')
+            open(empty, 'w').close()
+            result = self.app.test_cli_runner().invoke(args=['import-measurements', empty])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('Empty file', result.output)
+
+    def _partitioned_app(self):
+        """
+        Returns an app with its own segment store and readings on the 1st and
+        15th of January to March 2024, the latest of which is cached.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                          'SEGMENT_STORE_DIR': directory.name})
+        with app.app_context():
+            db.create_all()
+        self._create_garden_location(app)
+        with app.app_context():
+            for month in (1, 2, 3):
+                for day in (1, 15):
+                    db.session.add(Measurement(garden_location_id=1, measurement_type=MeasurementType.TEMPERATURE,
+                                               unit=MeasurementUnit.CELSIUS, value=float(month),
+                                               timestamp=datetime(2024, month, day), source='gw-1',
+                                               notes='frost' if day == 1 else None))
+            db.session.commit()
+            LatestMeasurement.rebuild()
+            db.session.commit()
+        return app
+
+    def _partitions(self, app, *args):
+        result = app.test_cli_runner().invoke(args=['measurement-partitions', *args])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def test_archive_partitions(self):
+        """Test archiving months into partitions and reading them through the list and export."""
+        app = self._partitioned_app()
+        client = app.test_client()
+        self.assertIn('Archived 4 rows into 2 partitions', self._partitions(app, 'archive', '--before', '2024-03-10'))
+
+        response = client.get(self.BASE_URL)
+        self.assertEqual([m['value'] for m in response.json['data']], [1.0, 1.0, 2.0, 2.0, 3.0, 3.0])
+        response = client.get(f"{self.BASE_URL}?start=2024-02-01T00:00:00&end=2024-02-10T00:00:00")
+        self.assertEqual([m['timestamp'] for m in response.json['data']], ['2024-02-01T00:00:00'])
+        response = client.get(f"{self.BASE_URL}export?start=2024-01-10T00:00:00")
+        self.assertEqual(len(response.text.splitlines()), 1 + 5)
+
+        with app.app_context():
+            tables = [s.get_final_froms()[0].name for s in measurement_selects(['id'], start=datetime(2024, 2, 5))]
+            self.assertEqual(tables, ['measurements_2024_02', 'measurements'])
+            self.assertEqual(Measurement.query.count(), 2)
+
+    def test_archived_reading_sent_again(self):
+        """Test that a reading sent again after its month was archived is a duplicate."""
+        app = self._partitioned_app()
+        self._partitions(app, 'archive', '--before', '2024-03-10')
+        with app.app_context():
+            archived_id = db.session.scalar(select(partition_table('measurements_2024_02').c.id).limit(1))
+
+        response = app.test_client().post(self.BASE_URL, json=reading(datetime(2024, 2, 1), 2.0, source='gw-1'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['data']['id'], archived_id)
+
+        # A copy that reached the hot table anyway is dropped by the next archive
+        with app.app_context():
+            db.session.add(Measurement(garden_location_id=1, measurement_type=MeasurementType.TEMPERATURE,
+                                       unit=MeasurementUnit.CELSIUS, value=2.0, timestamp=datetime(2024, 2, 15),
+                                       source='gw-1'))
+            db.session.commit()
+        self.assertIn('Archived 0 rows into 0 partitions', self._partitions(app, 'archive', '--before', '2024-03-10'))
+        with app.app_context():
+            self.assertEqual(Measurement.query.count(), 2)
+
+    def test_drop_partitions(self):
+        """Test that dropping old partitions removes their readings and keeps the others."""
+        app = self._partitioned_app()
+        self._partitions(app, 'archive', '--before', '2024-03-10')
+
+        output = self._partitions(app, 'drop', '--before', '2024-02-01', '--yes')
+        self.assertIn('Dropped 1 partitions: measurements_2024_01', output)
+        output = self._partitions(app, 'list')
+        self.assertIn('measurements_2024_02  2024-02-01 - 2024-03-01  2 rows', output)
+        self.assertEqual(len(app.test_client().get(self.BASE_URL).json['data']), 4)
+
+    def test_import_into_archived_month(self):
+        """Test that a backfill skips readings already archived, whatever their UTC offset."""
+        app = self._partitioned_app()
+        self._partitions(app, 'archive', '--before', '2024-03-10')
+
+        result, rejected = self._import([
+            [1, 'TEMPERATURE', 'CELSIUS', '2.0', '2024-02-01T00:00:00', 'gw-1'],
+            [1, 'TEMPERATURE', 'CELSIUS', '2.0', '2024-02-15T02:00:00+02:00', 'gw-1'],
+            [1, 'TEMPERATURE', 'CELSIUS', '2.5', '2024-02-20T02:00:00+02:00', 'gw-1']
+        ], app)
+        self.assertIn('1 inserted, 2 duplicates skipped, 0 rejected', result.output)
+        response = app.test_client().get(f"{self.BASE_URL}?start=2024-02-01T00:00:00&end=2024-03-01T00:00:00")
+        self.assertEqual(sorted(m['timestamp'] for m in response.json['data']),
+                         ['2024-02-01T00:00:00', '2024-02-15T00:00:00', '2024-02-20T00:00:00'])
+
+    def test_import_into_frozen_month(self):
+        """Test that a backfill rejects readings of frozen months, which cannot be checked for duplicates."""
+        app = self._partitioned_app()
+        self._partitions(app, 'archive', '--before', '2024-03-10')
+        self._partitions(app, 'freeze', '--before', '2024-02-01')
+
+        result, rejected = self._import([[1, 'TEMPERATURE', 'CELSIUS', '1.5', '2024-01-20T00:00:00', 'gw-1']], app)
+        self.assertIn('0 inserted, 0 duplicates skipped, 1 rejected', result.output)
+        self.assertEqual(rejected, [['2', 'Month 2024-01 is frozen']])
+
+    def test_freeze_partitions(self):
+        """Test freezing partitions into segment files and reading them through the list, export and summary."""
+        app = self._partitioned_app()
+        client = app.test_client()
+        expected = client.get(self.BASE_URL).json['data']
+        self._partitions(app, 'archive', '--before', '2024-03-10')
+
+        self.assertIn('Froze 2 rows of measurements_2024_01', self._partitions(app, 'freeze', '--before', '2024-02-01'))
+        segments = app.config['SEGMENT_STORE_DIR']
+        self.assertTrue(os.path.exists(os.path.join(segments, '2024-01', '1', 'TEMPERATURE.seg')))
+        self.assertIn('measurements_2024_01  2024-01-01 - 2024-02-01  2 rows  (frozen)', self._partitions(app, 'list'))
+
+        self.assertEqual(client.get(self.BASE_URL).json['data'], expected)
+        response = client.get(f"{self.BASE_URL}?start=2024-01-10T00:00:00&end=2024-02-05T00:00:00")
+        self.assertEqual([m['timestamp'] for m in response.json['data']],
+                         ['2024-01-15T00:00:00', '2024-02-01T00:00:00'])
+        response = client.get(f"{self.BASE_URL}export")
+        self.assertEqual(response.text.splitlines()[1].split(',')[-3:], ['GW-1', 'frost', '0'])
+        [summary] = client.get(f"{self.BASE_URL}summary?garden_location_id=1").json['data']
+        self.assertEqual((summary['count'], summary['min'], summary['max'], summary['mean']), (6, 1.0, 3.0, 2.0))
+
+    def test_late_reading_for_frozen_month(self):
+        """Test that a late reading for a frozen month stays in the hot table, where reads still find it."""
+        app = self._partitioned_app()
+        client = app.test_client()
+        self._partitions(app, 'archive', '--before', '2024-03-10')
+        self._partitions(app, 'freeze', '--before', '2024-02-01')
+
+        response = client.post(self.BASE_URL, json=reading(datetime(2024, 1, 20), 1.5, source='gw-1'))
+        self.assertEqual(response.status_code, 201)
+        self._partitions(app, 'archive', '--before', '2024-03-10')
+        self._partitions(app, 'freeze', '--before', '2024-02-01')
+        response = client.get(f"{self.BASE_URL}?end=2024-02-01T00:00:00")
+        self.assertEqual([m['timestamp'] for m in response.json['data']],
+                         ['2024-01-01T00:00:00', '2024-01-15T00:00:00', '2024-01-20T00:00:00'])
+        self.assertIn('measurements_2024_01  2024-01-01 - 2024-02-01  2 rows  (frozen)', self._partitions(app, 'list'))
+
+    def test_drop_frozen_partition(self):
+        """Test that dropping a frozen month removes its segment files and leaves the other months' untouched."""
+        app = self._partitioned_app()
+        self._partitions(app, 'archive', '--before', '2024-03-10')
+        self._partitions(app, 'freeze', '--before', '2024-03-01')
+        segments = app.config['SEGMENT_STORE_DIR']
+        february = os.stat(os.path.join(segments, '2024-02', '1', 'TEMPERATURE.seg'))
+
+        output = self._partitions(app, 'drop', '--before', '2024-02-01', '--yes')
+        self.assertIn('Dropped 1 partitions: measurements_2024_01', output)
+        self.assertFalse(os.path.exists(os.path.join(segments, '2024-01')))
+        after = os.stat(os.path.join(segments, '2024-02', '1', 'TEMPERATURE.seg'))
+        self.assertEqual((after.st_ino, after.st_mtime_ns), (february.st_ino, february.st_mtime_ns))
+        self.assertEqual(len(app.test_client().get(self.BASE_URL).json['data']), 4)
@@ -3,6 +3,7 @@ from garden_ai_agent.data.fields import ObservationType, GrowthStage
 from datetime import datetime
 from .test_api import APITest
 from garden_ai_agent.data.models import GardenLocation, Plant, Observation
+from garden_ai_agent.data.database import db
 from garden_ai_agent.data.fields import SunExposure, WindExposure, Drainage, GrowthForm, LifeCycle, UseCategory
 
 class Test_Observation(APITest):
@@ -84,4 +85,29 @@ class Test_Observation(APITest):
 
         # Verify deletion
         response = self.client.get(f"{self.BASE_URL}{observation_id}")
-        self.assertEqual(response.status_code, 404) 
\ No newline at end of file
+        self.assertEqual(response.status_code, 404) 
+
+    def test_bulk_delete_observations(self):
+        """Test deleting the observations matching a filter with one request."""
+        with self.app.app_context():
+            for plant_id in (1, 2):
+                for day in range(1, 6):
+                    db.session.add(Observation(plant_id=plant_id, timestamp=datetime(2024, 6, day),
+                                               observation_type=ObservationType.HEIGHT, numeric_value=float(day),
+                                               recorded_by='importer' if day % 2 else 'Test User'))
+            db.session.commit()
+
+        query = 'plant_id=1&recorded_by=importer&start=2024-06-02&end=2024-06-05'
+        self.assertEqual([o['timestamp'] for o in self.client.get(f"{self.BASE_URL}?{query}").json['data']],
+                         ['2024-06-03T00:00:00'])
+        response = self.client.delete(f"{self.BASE_URL}?plant_id=1&recorded_by=importer")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['data'], {'deleted': 3})
+        self.assertEqual(len(self.client.get(f"{self.BASE_URL}?plant_id=1").json['data']), 2)
+        self.assertEqual(len(self.client.get(f"{self.BASE_URL}?observation_type=height").json['data']), 7)
+
+        # Deleting everything needs an explicit filter, and filters must be valid
+        self.assertEqual(self.client.delete(self.BASE_URL).status_code, 400)
+        self.assertEqual(self.client.delete(f"{self.BASE_URL}?observation_type=weight_ish").status_code, 400)
+        self.assertEqual(self.client.delete(f"{self.BASE_URL}?start=last-week").status_code, 400)
+        self.assertEqual(len(self.client.get(self.BASE_URL).json['data']), 7)
@@ -1,5 +1,6 @@
 from garden_ai_agent.config import BASE_URL
 from garden_ai_agent.data.fields import GrowthForm, LifeCycle, UseCategory
+from garden_ai_agent.data.database import db
 from garden_ai_agent.data.models import Plant
 from .test_api import APITest
 
@@ -60,6 +61,12 @@ class Test_Plant(APITest):
         self.assertEqual(created_plant['name'], plant.name)
         plant_id = created_plant['id']
 
+        # Invalid input is rejected with an error per field
+        invalid = {**plant.json(), 'name': None, 'growth_form': 'BUSH', 'spacing_inches': '24'}
+        response = self.client.post(self.BASE_URL, json=invalid)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.json['errors']), ['growth_form', 'name', 'spacing_inches'])
+
         # Get the specific plant
         response = self.client.get(f"{self.BASE_URL}{plant_id}")
         self.assertEqual(response.status_code, 200)
@@ -84,4 +91,110 @@ class Test_Plant(APITest):
 
         # Delete the plant
         response = self.client.delete(f"{self.BASE_URL}{plant_id}")
-        self.assertEqual(response.status_code, 204) 
\ No newline at end of file
+        self.assertEqual(response.status_code, 204)
+
+    def test_search_plants(self):
+        """Test full-text plant search with relevance ordering and filters."""
+        garden_location_data = {
+            'name': 'Test Garden',
+            'longitude': -122.4194,
+            'latitude': 37.7749,
+            'sun_exposure': 'FULL',
+            'wind_exposure': 'PROTECTED',
+            'drainage': 'GOOD',
+            'irrigation_zone_id': 1
+        }
+        response = self.client.post('/garden_locations/', json=garden_location_data)
+        garden_location_id = response.json['data']['id']
+
+        plants = [
+            Plant(name='Tomato', growth_form=GrowthForm.HERB, life_cycle=LifeCycle.ANNUAL,
+                  primary_use=UseCategory.VEGETABLE, hardiness_zone_min=5, hardiness_zone_max=9,
+                  description='Indeterminate tomato variety', garden_location_id=garden_location_id),
+            Plant(name='Basil', growth_form=GrowthForm.HERB, life_cycle=LifeCycle.ANNUAL,
+                  primary_use=UseCategory.HERB_CULINARY, hardiness_zone_min=10, hardiness_zone_max=11,
+                  care_instructions='Plant next to tomatoes', garden_location_id=garden_location_id),
+            Plant(name='Climbing Rose', growth_form=GrowthForm.VINE, life_cycle=LifeCycle.PERENNIAL,
+                  primary_use=UseCategory.ORNAMENTAL, garden_location_id=garden_location_id)
+        ]
+        for plant in plants:
+            response = self.client.post(self.BASE_URL, json=plant.json())
+            self.assertEqual(response.status_code, 201)
+
+        # Name matches rank above matches in care text
+        response = self.client.get(f"{self.BASE_URL}search?q=tomato")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['name'] for p in response.json['data']], ['Tomato', 'Basil'])
+
+        response = self.client.get(f"{self.BASE_URL}search?q=tomato&primary_use=herb_culinary")
+        self.assertEqual([p['name'] for p in response.json['data']], ['Basil'])
+
+        response = self.client.get(f"{self.BASE_URL}search?q=tomato&hardiness_zone=6")
+        self.assertEqual([p['name'] for p in response.json['data']], ['Tomato'])
+
+        # Updates are reflected in the index
+        plants[2].name = 'Tomato Rose'
+        response = self.client.put(f"{self.BASE_URL}3", json=plants[2].json())
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f"{self.BASE_URL}search?q=rose&growth_form=VINE")
+        self.assertEqual([p['name'] for p in response.json['data']], ['Tomato Rose'])
+
+        response = self.client.get(f"{self.BASE_URL}search?q=")
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_update_plants(self):
+        """Test updating many plants with one PATCH request."""
+        garden_location_data = {
+            'name': 'Test Garden',
+            'longitude': -122.4194,
+            'latitude': 37.7749,
+            'sun_exposure': 'FULL',
+            'wind_exposure': 'PROTECTED',
+            'drainage': 'GOOD',
+            'irrigation_zone_id': 1
+        }
+        old_id = self.client.post('/garden_locations/', json=garden_location_data).json['data']['id']
+        garden_location_data['name'] = 'New Bed'
+        new_id = self.client.post('/garden_locations/', json=garden_location_data).json['data']['id']
+        with self.app.app_context():
+            for i in range(5):
+                db.session.add(Plant(name=f'Tomato {i}', growth_form=GrowthForm.HERB, life_cycle=LifeCycle.ANNUAL,
+                                     primary_use=UseCategory.VEGETABLE, garden_location_id=old_id))
+            db.session.commit()
+
+        response = self.client.patch(self.BASE_URL, json={
+            'ids': [1, 2, 3, 99], 'values': {'garden_location_id': new_id, 'life_cycle': 'perennial', 'notes': 'Moved'}
+        })
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json['data'], {'updated': 3})
+        plants = self.client.get(self.BASE_URL).json['data']
+        self.assertEqual([(p['garden_location_id'], p['notes']) for p in plants],
+                         [(new_id, 'Moved')] * 3 + [(old_id, None)] * 2)
+        with self.app.app_context():
+            self.assertIs(db.session.get(Plant, 1).life_cycle, LifeCycle.PERENNIAL)
+
+        # Nothing is updated unless every value is valid
+        for body in ({'ids': [1], 'values': {'name': None}},
+                     {'ids': [1], 'values': {'hardiness_zone_min': 20}},
+                     {'ids': [1], 'values': {'growth_form': 'tree-ish'}},
+                     {'ids': [1], 'values': {'id': 7}},
+                     {'ids': [1], 'values': {}},
+                     {'ids': [1], 'values': {'garden_location_id': 99}},
+                     {'ids': [], 'values': {'notes': 'x'}},
+                     {'ids': ['1'], 'values': {'notes': 'x'}}):
+            response = self.client.patch(self.BASE_URL, json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', response.json)
+        self.assertEqual(self.client.get(f"{self.BASE_URL}1").json['data']['notes'], 'Moved')
+
+        # Moving plants out of a location's hardiness zone updates its suitable plants
+        zone_5_id = self.client.post('/garden_locations/', json={
+            **garden_location_data, 'name': 'Zone 5 Bed', 'hardiness_zone': 5}).json['data']['id']
+        self.client.patch(self.BASE_URL, json={'ids': [4], 'values': {'hardiness_zone_min': 4, 'hardiness_zone_max': 6}})
+        response = self.client.get(f"/garden_locations/{zone_5_id}/suitable_plants")
+        self.assertIn(4, [p['id'] for p in response.json['data']])
+        response = self.client.patch(self.BASE_URL, json={
+            'ids': [4], 'values': {'hardiness_zone_min': 8, 'hardiness_zone_max': 9}})
+        self.assertEqual(response.status_code, 200, response.text)
+        response = self.client.get(f"/garden_locations/{zone_5_id}/suitable_plants")
+        self.assertNotIn(4, [p['id'] for p in response.json['data']])